@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Keyword and regex alerts on incoming messages.
+
+Rules are read from ALERT_RULES_PATH (default: alert_rules.json, see
+alert_rules.example.json) and re-read when the file changes. Alerts are
+appended to outputs/alerts.jsonl.
+
+Usage:
+    python scripts/alerts.py scan --days 1
+    python scripts/alerts.py check "Can you send a quote? Acme offers $20k"
+    python scripts/alerts.py event event.json
+    python scripts/alerts.py rules
+"""
+import sys
+import json
+import argparse
+from pathlib import Path
+from datetime import datetime, timezone
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+from src.unipile_client import UniPileClient, UniPileError
+from src.alerts import AlertEngine, AlertLog
+from src.models import Message
+from src.timeline import merge_timeline
+from src.triage import webhook_message
+from src.pipeline import Pipeline, add_pipeline_arguments
+from src.profiling import add_profile_arguments, start_profile
+from scripts.reports import print_pipeline_stats, print_profile_summary
+
+console = Console()
+
+
+def print_alert(alert) -> None:
+    msg = alert.message
+    when = msg.timestamp.astimezone().strftime("%Y-%m-%d %H:%M") if msg.timestamp else "-"
+    text = (msg.text or "").replace("\n", " ")
+    if len(text) > 60:
+        text = text[:60] + "..."
+    console.print(
+        f"[dim]{when}[/dim] [bold yellow]{alert.rule_id}[/bold yellow] "
+        f"[cyan]{msg.sender_name or msg.sender_id or 'Unknown'}[/cyan] "
+        f"[dim]({', '.join(alert.terms)})[/dim] {text}"
+    )
+
+
+def cmd_scan(engine: AlertEngine, args) -> None:
+    client = UniPileClient()
+    account_ids = [args.account_id] if args.account_id else [a.id for a in client.list_accounts(usable_only=True)]
+    since = datetime.now(timezone.utc).timestamp() - args.days * 86400
+    alert_log = None if args.no_log else AlertLog()
+    skipped = []
+    total = 0
+
+    def messages():
+        for account_id in account_ids:
+            timeline = merge_timeline(
+                client, account_id, since=since, on_error=lambda chat, e: skipped.append(chat.id)
+            )
+            for entry in timeline:
+                yield account_id, entry.message
+
+    def report(alerts) -> None:
+        nonlocal total
+        total += len(alerts)
+        if alert_log:
+            alert_log.append(alerts)
+        for alert in alerts:
+            print_alert(alert)
+
+    console.print(
+        f"[dim]Scanning {len(account_ids)} account(s), last {args.days} day(s), "
+        f"{len(engine.ruleset.rules)} rule(s) / {engine.ruleset.term_count} term(s)...[/dim]\n"
+    )
+    pipeline = (
+        Pipeline("alerts", messages())
+        .map("match", lambda item: engine.match(item[1], item[0]), phase="parse")
+        .filter("alerts", bool)
+        .sink("report", report)
+    )
+    pipeline.run()
+
+    stats = engine.stats
+    console.print(
+        f"\n[dim]{total} alert(s) in {stats['messages']} message(s)"
+        + (", logged to outputs/alerts.jsonl" if alert_log and total else "")
+        + "[/dim]"
+    )
+    if skipped:
+        console.print(f"[dim]{len(skipped)} chat(s) could not be read and were skipped[/dim]")
+    if args.pipeline_stats:
+        print_pipeline_stats(pipeline)
+
+
+def cmd_check(engine: AlertEngine, args) -> None:
+    alerts = engine.match(Message(id="check", text=args.text, is_sender=args.outbound))
+    if not alerts:
+        console.print("[green]No rule matches[/green]")
+        return
+    for alert in alerts:
+        console.print(f"[bold yellow]{alert.rule_id}[/bold yellow]: {', '.join(alert.terms)}")
+
+
+def cmd_event(engine: AlertEngine, args) -> None:
+    raw = sys.stdin.read() if args.file == "-" else Path(args.file).read_text()
+    parsed = webhook_message(json.loads(raw))
+    if parsed is None:
+        console.print("[yellow]Event ignored[/yellow]")
+        return
+    account_id, message = parsed
+    alerts = engine.match(message, account_id)
+    if not alerts:
+        console.print("[green]No rule matches[/green]")
+        return
+    AlertLog().append(alerts)
+    for alert in alerts:
+        print_alert(alert)
+
+
+def cmd_rules(engine: AlertEngine, args) -> None:
+    table = Table(title=f"Alert Rules ({engine.path.name})", box=box.ROUNDED, show_header=True)
+    table.add_column("Rule", style="yellow", no_wrap=True)
+    table.add_column("Keywords", justify="right")
+    table.add_column("Regex", justify="right")
+    table.add_column("Messages")
+    table.add_column("Match")
+    table.add_column("Examples", style="dim", max_width=40)
+    for rule in engine.ruleset.rules.values():
+        table.add_row(
+            rule.id,
+            str(len(rule.keywords)),
+            str(len(rule.regex)),
+            "inbound" if rule.inbound_only else "all",
+            "whole words" if rule.whole_words else "substring",
+            ", ".join(rule.keywords[:5]) + (", ..." if len(rule.keywords) > 5 else ""),
+        )
+    console.print(table)
+    console.print(f"[dim]{engine.ruleset.term_count} distinct term(s) in one automaton[/dim]")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Keyword and regex alerts on incoming messages",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python scripts/alerts.py scan --days 1
+  python scripts/alerts.py check "Can you send a quote?"
+  python scripts/alerts.py event event.json     # UniPile webhook payload
+  python scripts/alerts.py rules
+        """
+    )
+    parser.add_argument("--rules", type=Path, help="Rules file (default: ALERT_RULES_PATH)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scan_parser = subparsers.add_parser("scan", help="Match recent messages of all accounts")
+    scan_parser.add_argument("--days", "-d", type=int, default=1, help="Messages from last N days (default: 1)")
+    scan_parser.add_argument("--account-id", "-a", help="Only this account (default: all accounts)")
+    scan_parser.add_argument("--no-log", action="store_true", help="Don't append alerts to outputs/alerts.jsonl")
+    add_pipeline_arguments(scan_parser)
+
+    check_parser = subparsers.add_parser("check", help="Match a text")
+    check_parser.add_argument("text", help="Text to match")
+    check_parser.add_argument("--outbound", action="store_true", help="Treat the text as sent by us")
+
+    event_parser = subparsers.add_parser("event", help="Match a webhook payload")
+    event_parser.add_argument("file", help="UniPile webhook payload (JSON file, '-' for stdin)")
+
+    subparsers.add_parser("rules", help="Show the loaded rules")
+
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profile(args, "alerts", report=print_profile_summary)
+
+    try:
+        engine = AlertEngine(args.rules) if args.rules else AlertEngine()
+        if args.command == "scan":
+            cmd_scan(engine, args)
+        elif args.command == "check":
+            cmd_check(engine, args)
+        elif args.command == "event":
+            cmd_event(engine, args)
+        else:
+            cmd_rules(engine, args)
+
+    except (UniPileError, ValueError) as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
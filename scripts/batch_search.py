@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Run many LinkedIn people searches concurrently and merge the results.
+
+Queries run in parallel under the shared search rate budget
+(SEARCH_RATE_PER_MINUTE). People are deduplicated by User ID across
+queries and streamed to the output file as soon as each page arrives.
+Runs as a pipeline: queries -> search (--workers) -> report.
+
+Query file formats:
+    CSV with a header:   keywords,api[,limit]
+    Plain text:          one query per line, optionally "keywords<TAB>api"
+
+Usage:
+    python scripts/batch_search.py queries.csv --output people.jsonl
+    python scripts/batch_search.py queries.txt --output people.csv --workers 8
+"""
+import sys
+import csv
+import json
+import argparse
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rich.console import Console
+
+from src.unipile_client import UniPileClient, UniPileError
+from src.config import Config
+from src.rate_limit import RateLimiter
+from src.search_cache import SearchCache, person_provider_id
+from src.log_context import correlation
+from src.pipeline import Pipeline, add_pipeline_arguments
+from src.profiling import add_profile_arguments, start_profile
+from scripts.logger import setup_logging
+from scripts.reports import print_pipeline_stats, print_profile_summary
+
+console = Console()
+
+APIS = ("classic", "sales_navigator", "recruiter")
+CSV_FIELDS = ["user_id", "name", "headline", "location", "query", "api"]
+
+
+def load_queries(path: Path, default_api: str, default_limit: int) -> List[Dict[str, Any]]:
+    """Read queries from a CSV (with header) or plain text file."""
+    queries = []
+    with open(path, newline="", encoding="utf-8") as f:
+        first = f.readline()
+        f.seek(0)
+
+        if "keywords" in first.lower().split(","):
+            rows = csv.DictReader(f)
+            for row in rows:
+                row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+                if row.get("keywords"):
+                    queries.append({
+                        "keywords": row["keywords"],
+                        "api": row.get("api") or default_api,
+                        "limit": int(row["limit"]) if row.get("limit") else default_limit,
+                    })
+        else:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                keywords, _, api = line.partition("\t")
+                queries.append({
+                    "keywords": keywords.strip(),
+                    "api": api.strip() or default_api,
+                    "limit": default_limit,
+                })
+
+    for q in queries:
+        if q["api"] not in APIS:
+            raise ValueError(f"Unknown api '{q['api']}' for query '{q['keywords']}' (use one of {', '.join(APIS)})")
+    return queries
+
+
+class MergedPeopleWriter:
+    """Thread-safe writer that streams each person once (first matching query wins)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.format = "csv" if path.suffix.lower() == ".csv" else "jsonl"
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.seen: Dict[str, set] = {}  # user_id -> queries that matched
+        self.written = 0
+        self._lock = threading.Lock()
+        if self.format == "csv":
+            self.csv = csv.DictWriter(self.file, fieldnames=CSV_FIELDS)
+            self.csv.writeheader()
+
+    def write(self, people: List[Dict[str, Any]], query: Dict[str, Any]) -> int:
+        """Write people not yet seen. Returns number of new people written."""
+        new = 0
+        with self._lock:
+            for person in people:
+                user_id = person_provider_id(person)
+                if not user_id:
+                    continue
+                if user_id in self.seen:
+                    self.seen[user_id].add(query["keywords"])
+                    continue
+                self.seen[user_id] = {query["keywords"]}
+                self._write_row(person, user_id, query)
+                new += 1
+            self.file.flush()
+            self.written += new
+        return new
+
+    def _write_row(self, person: Dict[str, Any], user_id: str, query: Dict[str, Any]) -> None:
+        name = f"{person.get('first_name', '')} {person.get('last_name', '')}".strip()
+        row = {
+            "user_id": user_id,
+            "name": name or person.get("name"),
+            "headline": person.get("headline"),
+            "location": person.get("location"),
+            "query": query["keywords"],
+            "api": query["api"],
+        }
+        if self.format == "csv":
+            self.csv.writerow(row)
+        else:
+            row["person"] = person
+            self.file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run many LinkedIn searches concurrently and merge results",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # CSV with header "keywords,api,limit"
+  python scripts/batch_search.py queries.csv --output people.jsonl
+
+  # Plain text, one query per line ("keywords<TAB>api" optional)
+  python scripts/batch_search.py queries.txt --output people.csv --workers 8
+        """
+    )
+    parser.add_argument("queries", type=Path, help="Query file (CSV with header or plain text)")
+    parser.add_argument(
+        "--output", "-o",
+        type=Path,
+        default=Config.OUTPUTS_DIR / "batch_search.jsonl",
+        help="Output file, .jsonl or .csv (default: outputs/batch_search.jsonl)",
+    )
+    parser.add_argument(
+        "--account-id", "-a",
+        help="UniPile account ID (if not provided, uses first account)",
+    )
+    parser.add_argument(
+        "--limit", "-l",
+        type=int,
+        default=10,
+        help="Default max results per query (default: 10)",
+    )
+    parser.add_argument(
+        "--api",
+        choices=APIS,
+        default="classic",
+        help="Default LinkedIn interface for rows without api (default: classic)",
+    )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=4,
+        help="Concurrent queries (default: 4)",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached results and search again",
+    )
+    add_pipeline_arguments(parser)
+
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profile(args, "batch_search", report=print_profile_summary)
+
+    try:
+        queries = load_queries(args.queries, args.api, args.limit)
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(1)
+
+    if not queries:
+        console.print("[yellow]No queries found.[/yellow]")
+        return
+
+    try:
+        client = UniPileClient()
+
+        # Get account ID if not provided
+        if not args.account_id:
+            accounts = client.list_accounts()
+            if not accounts:
+                console.print("[red]Error: No accounts connected[/red]")
+                return
+            args.account_id = accounts[0].id
+            console.print(f"[dim]Using account: {accounts[0].name}[/dim]\n")
+
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        cache = SearchCache()
+        limiter = RateLimiter(Config.SEARCH_RATE_PER_MINUTE, burst=Config.SEARCH_RATE_BURST)
+        writer = MergedPeopleWriter(args.output)
+
+        logger = setup_logging("batch_search")
+
+        def run_query(query: Dict[str, Any]) -> tuple[Dict[str, Any], int, int]:
+            # One correlation id per query: its API pages share it in the log
+            with correlation():
+                results, _, pages = cache.search(
+                    client,
+                    account_id=args.account_id,
+                    keywords=query["keywords"],
+                    api=query["api"],
+                    limit=query["limit"],
+                    refresh=args.refresh,
+                    on_page=lambda people: writer.write(people, query),
+                    limiter=limiter,
+                )
+                # Cached results never went through on_page; writer skips people already written
+                writer.write(results, query)
+                logger.info(
+                    "query done",
+                    extra={"keywords": query["keywords"], "api": query["api"], "results": len(results), "pages": pages},
+                )
+            return query, len(results), pages
+
+        console.print(
+            f"[dim]Running {len(queries)} quer(ies) with {args.workers} worker(s), "
+            f"budget {Config.SEARCH_RATE_PER_MINUTE:g} page(s)/min...[/dim]\n"
+        )
+        failed = 0
+
+        def report(result: tuple[Dict[str, Any], int, int]) -> None:
+            query, count, pages = result
+            source = "cache" if not pages else f"{pages} page(s)"
+            console.print(
+                f"[green]✓[/green] {query['keywords']} [dim]({query['api']}, "
+                f"{count} result(s), {source}, {writer.written} unique so far)[/dim]"
+            )
+
+        def on_failure(query: Dict[str, Any], error: Exception) -> None:
+            nonlocal failed
+            if not isinstance(error, UniPileError):
+                raise error
+            failed += 1
+            console.print(f"[red]✗[/red] {query['keywords']}: {error}")
+
+        pipeline = (
+            Pipeline("batch_search", queries)
+            .map("search", run_query, workers=args.workers, on_error=on_failure)
+            .sink("report", report)
+        )
+        try:
+            pipeline.run()
+        finally:
+            writer.close()
+            cache.close()
+
+        overlaps = sum(1 for matched in writer.seen.values() if len(matched) > 1)
+        console.print(
+            f"\n[dim]Total: {writer.written} unique people from {len(queries)} quer(ies) "
+            f"({overlaps} found by several queries, {failed} failed)[/dim]"
+        )
+        console.print(f"[dim]Saved to {args.output}[/dim]")
+        if args.pipeline_stats:
+            print_pipeline_stats(pipeline)
+
+    except UniPileError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark alert matching throughput.
+
+Generates a watch list and synthetic message texts, then matches them
+with a per-term `in` loop (the naive approach), the pure Python
+Aho-Corasick automaton and pyahocorasick (if installed). All methods use
+substring matching here, so their results must be identical.
+
+Usage:
+    python scripts/bench_alerts.py [--terms 5000] [--messages 20000]
+"""
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+import src.alerts as alerts
+from src.alerts import Rule, RuleSet
+from src.profiling import add_profile_arguments, start_profile
+from scripts.reports import print_profile_summary
+
+console = Console()
+
+SYLLABLES = "ka lo mi ra te su vo ne pa ri do ze lu ba ko fi ta ge no si".split()
+WORDS = (
+    "hi hello thanks meeting tomorrow product manager role prague offer call "
+    "great sounds good let me know interview schedule team salary remote next week"
+).split()
+
+
+def synthetic_data(terms: int, messages: int, hit_rate: float, seed: int = 7):
+    """(watched terms, message texts); about hit_rate of the texts contain a term."""
+    rng = random.Random(seed)
+    watch = set()
+    while len(watch) < terms:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        watch.add(word if rng.random() < 0.8 else f"{word} {rng.choice(WORDS)}")
+    watch = sorted(watch)
+
+    texts = []
+    for _ in range(messages):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(5, 60))]
+        if rng.random() < hit_rate:
+            words.insert(rng.randrange(len(words)), rng.choice(watch).title())
+        texts.append(" ".join(words))
+    return watch, texts
+
+
+def naive_match(terms, text: str) -> set:
+    folded = text.casefold()
+    return {term for term in terms if term in folded}
+
+
+def ruleset_match(ruleset: RuleSet, text: str) -> set:
+    return set(ruleset.match(text).get("watch", ()))
+
+
+def measure(fn, texts) -> tuple[float, list]:
+    started = time.perf_counter()
+    results = [fn(text) for text in texts]
+    return time.perf_counter() - started, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark alert matching throughput")
+    parser.add_argument("--terms", "-t", type=int, default=5000, help="Watched terms (default: 5000)")
+    parser.add_argument("--messages", "-n", type=int, default=20000, help="Messages to match (default: 20000)")
+    parser.add_argument(
+        "--naive-messages", type=int, default=2000, help="Messages for the slow naive loop (default: 2000)"
+    )
+    parser.add_argument("--hit-rate", type=float, default=0.05, help="Share of messages with a term (default: 0.05)")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profile(args, "bench_alerts", report=print_profile_summary)
+
+    terms, texts = synthetic_data(args.terms, args.messages, args.hit_rate)
+    folded_terms = [t.casefold() for t in terms]
+    chars = sum(len(t) for t in texts)
+    console.print(
+        f"[dim]{len(terms)} terms, {len(texts)} messages ({chars / len(texts):.0f} chars avg)[/dim]"
+    )
+
+    rule = Rule(id="watch", keywords=terms, whole_words=False)
+    methods = []
+    naive_texts = texts[:args.naive_messages]
+    seconds, naive_results = measure(lambda text: naive_match(folded_terms, text), naive_texts)
+    methods.append(("term in text loop", 0.0, seconds, len(naive_texts), sum(map(len, naive_texts)), naive_results))
+
+    native, alerts.ahocorasick = alerts.ahocorasick, None
+    started = time.perf_counter()
+    pure = RuleSet([rule])
+    build = time.perf_counter() - started
+    alerts.ahocorasick = native
+    seconds, results = measure(lambda text: ruleset_match(pure, text), texts)
+    methods.append((f"Aho-Corasick, Python ({len(pure.automaton)} states)", build, seconds, len(texts), chars, results))
+
+    if native is not None:
+        started = time.perf_counter()
+        fast = RuleSet([rule])
+        build = time.perf_counter() - started
+        seconds, results = measure(lambda text: ruleset_match(fast, text), texts)
+        methods.append(("Aho-Corasick, pyahocorasick", build, seconds, len(texts), chars, results))
+
+    table = Table(title="Alert Matching", box=box.ROUNDED, show_header=True)
+    table.add_column("Method")
+    table.add_column("Build", justify="right")
+    table.add_column("Messages", justify="right")
+    table.add_column("Msg/s", justify="right", style="cyan")
+    table.add_column("MB/s", justify="right")
+    table.add_column("Alerts", justify="right")
+    table.add_column("Speedup", justify="right", style="green")
+
+    naive_rate = methods[0][3] / methods[0][2]
+    for name, build, seconds, count, size, results in methods:
+        if results[:len(naive_results)] != naive_results:
+            console.print(f"[bold red]Error:[/bold red] {name} results differ from the naive loop")
+            sys.exit(1)
+        rate = count / seconds
+        table.add_row(
+            name,
+            f"{build * 1000:.0f} ms" if build else "-",
+            str(count),
+            f"{rate:,.0f}",
+            f"{size / seconds / 1e6:.2f}",
+            str(sum(bool(r) for r in results)),
+            f"{rate / naive_rate:.1f}x",
+        )
+    console.print(table)
+    if native is None:
+        console.print("[dim]pyahocorasick not installed (pip install pyahocorasick) - Python automaton only[/dim]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark the segment message archive against plain JSONL.
+
+Generates a synthetic inbox, writes it both as JSONL and as an archive
+segment, then compares file size, write time and the time of a
+"chat X between dates" query.
+
+Usage:
+    python scripts/bench_archive.py [--messages 200000] [--chats 2000]
+"""
+import sys
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+from src.models import Message
+from src.archive import MessageArchive, default_codec
+from src.profiling import add_profile_arguments, start_profile
+from scripts.reports import print_profile_summary
+
+console = Console()
+
+WORDS = (
+    "hi hello thanks meeting tomorrow product manager role prague offer call "
+    "great sounds good let me know interview schedule team salary remote"
+).split()
+
+
+def synthetic_messages(count: int, chats: int, seed: int = 42) -> list[Message]:
+    """Synthetic inbox: messages spread over chats and the last 365 days."""
+    rng = random.Random(seed)
+    start = datetime.now(timezone.utc) - timedelta(days=365)
+    people = [(f"ACoAA{i:08d}", f"Person {i}") for i in range(chats)]
+    messages = []
+    for i in range(count):
+        chat = rng.randrange(chats)
+        sender_id, sender_name = people[chat]
+        is_sender = rng.random() < 0.4
+        messages.append(Message(
+            id=f"msg_{i:09d}",
+            chat_id=f"chat_{chat:06d}",
+            sender_id=None if is_sender else sender_id,
+            sender_name=None if is_sender else sender_name,
+            text=" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 40))),
+            timestamp=start + timedelta(seconds=rng.randrange(365 * 86400)),
+            is_sender=is_sender,
+        ))
+    return messages
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark message archive vs JSONL")
+    parser.add_argument("--messages", "-n", type=int, default=200_000, help="Messages to generate")
+    parser.add_argument("--chats", "-c", type=int, default=2_000, help="Number of chats")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profile(args, "bench_archive", report=print_profile_summary)
+
+    console.print(f"[dim]Generating {args.messages} messages in {args.chats} chats...[/dim]")
+    messages = synthetic_messages(args.messages, args.chats)
+    target_chat = messages[0].chat_id
+    q_end = datetime.now(timezone.utc)
+    q_start = q_end - timedelta(days=90)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        jsonl_path = tmp / "messages.jsonl"
+
+        def write_jsonl():
+            with open(jsonl_path, "w", encoding="utf-8") as f:
+                for m in messages:
+                    f.write(m.model_dump_json() + "\n")
+
+        def query_jsonl():
+            found = 0
+            with open(jsonl_path, encoding="utf-8") as f:
+                for line in f:
+                    m = Message.model_validate_json(line)
+                    if m.chat_id == target_chat and m.timestamp and q_start <= m.timestamp <= q_end:
+                        found += 1
+            return found
+
+        archive = MessageArchive(tmp / "archive")
+
+        _, jsonl_write = timed(write_jsonl)
+        jsonl_found, jsonl_query = timed(query_jsonl)
+        _, archive_write = timed(lambda: archive.append(messages))
+        archive_found, archive_query = timed(
+            lambda: sum(1 for _ in archive.query(target_chat, q_start, q_end))
+        )
+        stats = archive.stats()
+        archive.close()
+
+        jsonl_size = jsonl_path.stat().st_size
+
+    table = Table(
+        title=f"Archive vs JSONL ({args.messages} messages, codec: {default_codec()})",
+        box=box.ROUNDED,
+        show_header=True,
+    )
+    table.add_column("Metric")
+    table.add_column("JSONL", justify="right")
+    table.add_column("Archive", justify="right")
+    table.add_column("Ratio", justify="right", style="cyan")
+
+    table.add_row(
+        "Size",
+        f"{jsonl_size / 1024 / 1024:.1f} MB",
+        f"{stats['bytes'] / 1024 / 1024:.1f} MB",
+        f"{jsonl_size / stats['bytes']:.1f}x smaller",
+    )
+    table.add_row(
+        "Write",
+        f"{jsonl_write:.2f} s",
+        f"{archive_write:.2f} s",
+        f"{jsonl_write / archive_write:.1f}x",
+    )
+    table.add_row(
+        "Query chat + 90 days",
+        f"{jsonl_query * 1000:.0f} ms",
+        f"{archive_query * 1000:.1f} ms",
+        f"{jsonl_query / archive_query:.0f}x faster",
+    )
+
+    console.print(table)
+    console.print(
+        f"[dim]Matches: {jsonl_found} (JSONL) / {archive_found} (archive) | "
+        f"{stats['blocks']} block(s) in {stats['segments']} segment(s)[/dim]"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Benchmark the memory saved by interning chats and messages.
+
+Generates a synthetic inbox as raw API pages, parses it through the
+client's list_chats / list_messages with the process-wide interner and
+with interning disabled, and compares resident memory (RSS). Each mode
+runs in its own subprocess so the numbers do not influence each other.
+
+Usage:
+    python scripts/bench_memory.py [--messages 100000] [--chats 2000] [--people 500]
+"""
+import gc
+import sys
+import json
+import random
+import argparse
+import resource
+import subprocess
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+from src.interning import Interner
+from src.profiling import add_profile_arguments, start_profile
+from src.unipile_client import UniPileClient
+from scripts.reports import print_profile_summary
+
+console = Console()
+
+ACCOUNT_ID = "acc_benchmark_0001"
+OWNER = {"id": "ACoAAowner000000", "name": "Account Owner"}
+PAGE_SIZE = 100
+
+WORDS = (
+    "hi hello thanks meeting tomorrow product manager role prague offer call "
+    "great sounds good let me know interview schedule team salary remote"
+).split()
+
+
+def synthetic_inbox(messages: int, chats: int, people: int, seed: int = 42):
+    """
+    Raw API pages for an inbox: (chat pages, {chat_id: message pages}).
+
+    Every page is a JSON round trip, so like real responses each page
+    carries its own copies of ids and names.
+    """
+    rng = random.Random(seed)
+    start = datetime.now(timezone.utc) - timedelta(days=365)
+    persons = [
+        {
+            "attendee_id": f"att_{i:06d}",
+            "attendee_provider_id": f"ACoAA{i:08d}",
+            "name": f"Person {i}",
+            "profile_url": f"https://www.linkedin.com/in/person-{i}",
+        }
+        for i in range(people)
+    ]
+
+    chat_items = []
+    for c in range(chats):
+        attendees = rng.sample(persons, 3) if rng.random() < 0.1 else [rng.choice(persons)]
+        chat_items.append({
+            "id": f"chat_{c:06d}",
+            "account_id": ACCOUNT_ID,
+            "account_type": "LINKEDIN",
+            "name": attendees[0]["name"] if len(attendees) == 1 else None,
+            "attendees": attendees,
+            "timestamp": (start + timedelta(seconds=rng.randrange(365 * 86400))).isoformat(),
+            "unread_count": rng.randrange(3),
+            "type": 1 if len(attendees) > 1 else 0,
+        })
+
+    per_chat = {item["id"]: [] for item in chat_items}
+    for i in range(messages):
+        chat = chat_items[rng.randrange(chats)]
+        is_sender = rng.random() < 0.4
+        sender = OWNER if is_sender else rng.choice(chat["attendees"])
+        per_chat[chat["id"]].append({
+            "id": f"msg_{i:09d}",
+            "sender_id": sender.get("attendee_provider_id", sender.get("id")),
+            "sender": {"name": sender["name"]},
+            "text": " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 40))),
+            "timestamp": (start + timedelta(seconds=rng.randrange(365 * 86400))).isoformat(),
+            "is_sender": is_sender,
+        })
+
+    def pages(items):
+        return [
+            json.dumps({"items": items[i:i + PAGE_SIZE]})
+            for i in range(0, max(len(items), 1), PAGE_SIZE)
+        ]
+
+    return pages(chat_items), {chat_id: pages(items) for chat_id, items in per_chat.items()}
+
+
+class OfflineClient(UniPileClient):
+    """UniPileClient serving the synthetic pages instead of HTTP responses."""
+
+    def __init__(self, chat_pages, message_pages, interner: Interner):
+        self.cache = None
+        self.health = None
+        self.interner = interner
+        self.chat_pages = chat_pages
+        self.message_pages = message_pages
+
+    def _request(self, method, endpoint, params=None, **kwargs):
+        page = int((params or {}).get("cursor") or 0)
+        if endpoint == "/chats":
+            pages = self.chat_pages
+        else:
+            pages = self.message_pages[endpoint.split("/")[2]]
+        data = json.loads(pages[page])
+        if page + 1 < len(pages):
+            data["cursor"] = str(page + 1)
+        return data
+
+
+def rss_bytes() -> int:
+    """Current resident set size (falls back to peak RSS without /proc)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def run_mode(args) -> dict:
+    """Parse the whole inbox in this process and measure the retained memory."""
+    chat_pages, message_pages = synthetic_inbox(args.messages, args.chats, args.people)
+    client = OfflineClient(chat_pages, message_pages, Interner(enabled=args.mode == "on"))
+    gc.collect()
+    before = rss_bytes()
+
+    chats, messages = [], []
+    cursor = None
+    while True:
+        page, cursor = client.list_chats(ACCOUNT_ID, limit=PAGE_SIZE, cursor=cursor)
+        chats.extend(page)
+        if not cursor:
+            break
+    for chat in chats:
+        cursor = None
+        while True:
+            page, cursor = client.list_messages(chat.id, limit=PAGE_SIZE, cursor=cursor)
+            messages.extend(page)
+            if not cursor:
+                break
+
+    gc.collect()
+    after = rss_bytes()
+    participants = {id(a) for chat in chats for a in chat.attendees}
+    names = {id(m.sender_name) for m in messages if m.sender_name}
+    return {
+        "mode": args.mode,
+        "chats": len(chats),
+        "messages": len(messages),
+        "retained_bytes": after - before,
+        "participant_objects": len(participants),
+        "sender_name_objects": len(names),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memory with and without interning")
+    parser.add_argument("--messages", "-n", type=int, default=100_000, help="Messages to generate")
+    parser.add_argument("--chats", "-c", type=int, default=2_000, help="Number of chats")
+    parser.add_argument("--people", "-p", type=int, default=500, help="Distinct people across chats")
+    parser.add_argument("--mode", choices=["on", "off"], help=argparse.SUPPRESS)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    if args.mode:
+        # Child process: one measurement, result as JSON on stdout
+        print(json.dumps(run_mode(args)))
+        return
+
+    start_profile(args, "bench_memory", report=print_profile_summary)
+    console.print(
+        f"[dim]Parsing {args.messages} messages in {args.chats} chats "
+        f"({args.people} people), interning off vs on...[/dim]"
+    )
+    results = {}
+    for mode in ("off", "on"):
+        proc = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "-n", str(args.messages),
+             "-c", str(args.chats), "-p", str(args.people)],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            console.print(f"[bold red]Error:[/bold red] {mode} run failed\n{proc.stderr}")
+            sys.exit(1)
+        results[mode] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    off, on = results["off"], results["on"]
+    table = Table(
+        title=f"Interning ({off['messages']} messages, {off['chats']} chats)",
+        box=box.ROUNDED,
+        show_header=True,
+    )
+    table.add_column("Metric")
+    table.add_column("Off", justify="right")
+    table.add_column("On", justify="right")
+    table.add_column("Ratio", justify="right", style="cyan")
+
+    table.add_row(
+        "Retained RSS",
+        f"{off['retained_bytes'] / 1024 / 1024:.1f} MB",
+        f"{on['retained_bytes'] / 1024 / 1024:.1f} MB",
+        f"{1 - on['retained_bytes'] / max(off['retained_bytes'], 1):.0%} less",
+    )
+    table.add_row(
+        "ChatParticipant objects",
+        str(off["participant_objects"]),
+        str(on["participant_objects"]),
+        f"{off['participant_objects'] / max(on['participant_objects'], 1):.1f}x fewer",
+    )
+    table.add_row(
+        "sender_name strings",
+        str(off["sender_name_objects"]),
+        str(on["sender_name_objects"]),
+        f"{off['sender_name_objects'] / max(on['sender_name_objects'], 1):.0f}x fewer",
+    )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
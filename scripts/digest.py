@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Incremental conversation digests for LLM summarization.
+
+`delta` prints the previous summary plus only the messages added since
+it was saved, as compact JSONL. After summarizing, `save` stores the new
+summary and advances the chat's high-water mark.
+
+Usage:
+    python scripts/digest.py delta --chat-id CHAT_ID > delta.jsonl
+    python scripts/digest.py save --chat-id CHAT_ID --summary-file summary.txt
+    python scripts/digest.py show --chat-id CHAT_ID
+"""
+import sys
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rich.console import Console
+from rich.panel import Panel
+
+from src.unipile_client import UniPileClient, UniPileError
+from src.digests import DigestStore
+from src.profiling import add_profile_arguments, start_profile
+from scripts.formatters import (
+    MESSAGE_FIELDS, DEFAULT_MESSAGE_FIELDS, TextCompactor, make_projection,
+    parse_fields, write_jsonl,
+)
+from scripts.reports import print_profile_summary
+
+# Status goes to stderr so stdout stays clean JSONL
+console = Console(stderr=True)
+
+
+def cmd_delta(store: DigestStore, args) -> None:
+    project = make_projection(parse_fields(args.fields, DEFAULT_MESSAGE_FIELDS), MESSAGE_FIELDS)
+    compactor = TextCompactor(max_chars=args.max_text, dedup_quotes=True)
+
+    client = UniPileClient()
+    first = (store.get(args.chat_id) or {}).get("hwm_id") is None
+    summary, items = store.delta(client, args.chat_id, max_messages=args.max_messages)
+    truncated = first and len(items) >= args.max_messages
+
+    header = {"type": "digest", "chat_id": args.chat_id, "summary": summary, "new_messages": len(items)}
+    if truncated:
+        header["truncated"] = True
+    write_jsonl([header], sys.stdout)
+    write_jsonl(({"type": "message", **compactor(project(item))} for item in items), sys.stdout)
+
+    console.print(f"[dim]{len(items)} new message(s) since last digest[/dim]")
+    if truncated:
+        console.print(
+            f"[yellow]First digest capped at the newest {args.max_messages} message(s); "
+            "older history is not included (raise --max-messages to cover it)[/yellow]"
+        )
+
+
+def cmd_save(store: DigestStore, args) -> None:
+    if args.summary_file == "-":
+        summary = sys.stdin.read()
+    else:
+        summary = Path(args.summary_file).read_text(encoding="utf-8")
+
+    if store.save(args.chat_id, summary.strip()):
+        console.print("[green]✓ Digest saved, high-water mark advanced[/green]")
+    else:
+        console.print("[yellow]Digest saved (no pending delta, mark unchanged)[/yellow]")
+
+
+def cmd_show(store: DigestStore, args) -> None:
+    digest = store.get(args.chat_id)
+    if not digest or not digest["summary"]:
+        console.print("[yellow]No digest for this chat yet.[/yellow]")
+        return
+
+    as_of = "-"
+    if digest["hwm_ts"]:
+        as_of = datetime.fromtimestamp(digest["hwm_ts"], tz=timezone.utc).strftime("%Y-%m-%d %H:%M")
+    Console().print(Panel(
+        digest["summary"],
+        title=f"[cyan]Digest as of {as_of}[/cyan]",
+        subtitle=f"[dim]{digest['messages_covered']} message(s) covered[/dim]",
+        border_style="cyan",
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Incremental conversation digests",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python scripts/digest.py delta -c CHAT_ID > delta.jsonl
+  python scripts/digest.py save -c CHAT_ID --summary-file summary.txt
+  python scripts/digest.py show -c CHAT_ID
+        """
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    delta_parser = subparsers.add_parser("delta", help="Previous digest + new messages as JSONL")
+    delta_parser.add_argument("--chat-id", "-c", required=True, help="Chat ID")
+    delta_parser.add_argument(
+        "--fields",
+        help=f"Message fields (default: {','.join(DEFAULT_MESSAGE_FIELDS)})",
+    )
+    delta_parser.add_argument("--max-text", type=int, help="Truncate message text to N characters")
+    delta_parser.add_argument(
+        "--max-messages",
+        type=int,
+        default=500,
+        help="Max messages for the first digest of a thread (default: 500)",
+    )
+
+    save_parser = subparsers.add_parser("save", help="Store a new summary and advance the mark")
+    save_parser.add_argument("--chat-id", "-c", required=True, help="Chat ID")
+    save_parser.add_argument(
+        "--summary-file", "-f",
+        required=True,
+        help="File with the new summary ('-' for stdin)",
+    )
+
+    show_parser = subparsers.add_parser("show", help="Show the stored digest")
+    show_parser.add_argument("--chat-id", "-c", required=True, help="Chat ID")
+
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profile(args, "digest", report=print_profile_summary)
+    store = DigestStore()
+
+    try:
+        if args.command == "delta":
+            cmd_delta(store, args)
+        elif args.command == "save":
+            cmd_save(store, args)
+        else:
+            cmd_show(store, args)
+
+    except (UniPileError, ValueError, OSError) as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(1)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Download attachments of a conversation into the local attachment cache.
+
+Files are stored once by content hash under data/attachments/, no matter
+how many chats they were forwarded to. Runs as a pipeline: fetch (pages)
+-> model -> attachments -> download (--workers) -> table, so downloads
+start while later message pages are still loading.
+
+Usage:
+    python scripts/download_attachments.py --chat-id CHAT_ID [--limit 100] [--workers 4]
+"""
+import sys
+import argparse
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rich.console import Console
+from rich.table import Table
+from rich.markup import escape
+from rich import box
+
+from src.unipile_client import UniPileClient, UniPileError
+from src.attachments import AttachmentStore, download_jobs
+from src.pipeline import Pipeline, add_pipeline_arguments
+from src.profiling import add_profile_arguments, start_profile
+from scripts.reports import print_pipeline_stats, print_profile_summary
+
+console = Console()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download chat attachments")
+    parser.add_argument(
+        "--chat-id", "-c",
+        required=True,
+        help="Chat ID",
+    )
+    parser.add_argument(
+        "--limit", "-l",
+        type=int,
+        default=100,
+        help="Number of latest messages to scan (default: 100)",
+    )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=4,
+        help="Concurrent downloads (default: 4)",
+    )
+    add_pipeline_arguments(parser)
+
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profile(args, "download_attachments", report=print_profile_summary)
+    store = AttachmentStore()
+
+    try:
+        client = UniPileClient()
+
+        table = Table(
+            title="Attachments",
+            box=box.ROUNDED,
+            show_header=True,
+        )
+        table.add_column("#", style="dim", width=3)
+        table.add_column("File", style="cyan", max_width=35)
+        table.add_column("Status")
+        table.add_column("Path", style="dim")
+
+        counts = {"fetched": 0, "cached": 0, "failed": 0}
+
+        def add_row(result) -> None:
+            if result["error"]:
+                status = f"[red]{escape(result['error'][:40])}[/red]"
+                counts["failed"] += 1
+            elif result["fetched"]:
+                status = "[green]downloaded[/green]"
+                counts["fetched"] += 1
+            else:
+                status = "[dim]cached[/dim]"
+                counts["cached"] += 1
+            table.add_row(
+                str(table.row_count + 1),
+                escape(result["file_name"] or result["attachment_id"]),
+                status,
+                escape(str(result["path"] or "-")),
+            )
+
+        def to_messages(page):
+            return [client.parse_message(item, args.chat_id) for item in page]
+
+        pages = client.iter_pages(f"/chats/{args.chat_id}/messages", max_items=args.limit)
+        pipeline = (
+            Pipeline("download_attachments", pages)
+            .flat_map("model", to_messages, phase="model")
+            .flat_map("attachments", lambda msg: download_jobs([msg]))
+            .map("download", lambda job: store.download_result(client, *job), workers=args.workers)
+            .sink("table", add_row)
+        )
+        with console.status("[dim]Downloading attachments...[/dim]"):
+            pipeline.run()
+
+        if not table.row_count:
+            console.print("[yellow]No attachments in this chat.[/yellow]")
+            return
+
+        console.print(table)
+        stats = store.stats()
+        console.print(
+            f"\n[dim]{counts['fetched']} fetched, {counts['cached']} from cache, {counts['failed']} failed | "
+            f"store: {stats['files']} file(s), {stats['bytes'] / 1024 / 1024:.1f} MB[/dim]"
+        )
+        if args.pipeline_stats:
+            print_pipeline_stats(pipeline)
+
+    except UniPileError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(1)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,18 @@
 """
 Data formatters for UniPile API responses.
 Reduces token usage by filtering unnecessary fields.
+
+Two styles are available:
+- filter_* functions: fixed set of essential fields
+- projections: callers declare the fields they need; only those are
+  extracted from raw API items (no Pydantic models are built), and
+  records are written as compact JSONL
 """
-from typing import Dict, Any, List
+import hashlib
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional, TextIO
+
+from src.profiling import phase
 
 
 def filter_account(raw: Dict[str, Any]) -> Dict[str, Any]:
@@ -52,3 +62,177 @@ def filter_message(raw: Dict[str, Any]) -> Dict[str, Any]:
 def filter_list(items: List[Dict[str, Any]], filter_fn) -> List[Dict[str, Any]]:
     """Apply filter function to list of items."""
     return [filter_fn(item) for item in items]
+
+
+# ==================== PROJECTIONS ====================
+
+def _dict(value: Any) -> Dict[str, Any]:
+    return value if isinstance(value, dict) else {}
+
+
+ACCOUNT_FIELDS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "id": lambda r: r.get("id"),
+    "provider": lambda r: r.get("type", r.get("provider")),
+    "name": lambda r: r.get("name"),
+    "identifier": lambda r: r.get("identifier"),
+    "status": lambda r: _dict(r.get("connection_params")).get("status", "OK"),
+}
+
+CHAT_FIELDS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "id": lambda r: r.get("id"),
+    "account_id": lambda r: r.get("account_id"),
+    "name": lambda r: r.get("name") or r.get("subject"),
+    "attendees": lambda r: [a.get("name") for a in r.get("attendees") or []],
+    "attendee_provider_id": lambda r: r.get("attendee_provider_id"),
+    "last_message_text": lambda r: _dict(r.get("last_message")).get("text"),
+    "timestamp": lambda r: r.get("timestamp"),
+    "unread_count": lambda r: r.get("unread_count", 0),
+    "is_group": lambda r: (r.get("type") or 0) > 0,
+}
+
+MESSAGE_FIELDS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "id": lambda r: r.get("id"),
+    "chat_id": lambda r: r.get("chat_id"),
+    "sender_id": lambda r: r.get("sender_id"),
+    "sender_name": lambda r: _dict(r.get("sender")).get("name"),
+    "text": lambda r: r.get("text"),
+    "timestamp": lambda r: r.get("timestamp"),
+    "is_sender": lambda r: bool(r.get("is_sender", False)),
+    "attachments": lambda r: [
+        _dict(a).get("file_name") or _dict(a).get("type") for a in r.get("attachments") or []
+    ],
+    "quoted": lambda r: _dict(r.get("quoted")).get("text"),
+}
+
+DEFAULT_CHAT_FIELDS = ["id", "name", "attendees", "last_message_text", "unread_count"]
+DEFAULT_MESSAGE_FIELDS = ["id", "sender_name", "text", "timestamp", "is_sender"]
+
+
+def parse_fields(value: Optional[str], default: List[str]) -> List[str]:
+    """Parse a comma-separated --fields value."""
+    if not value:
+        return list(default)
+    return [f.strip() for f in value.split(",") if f.strip()]
+
+
+def make_projection(
+    fields: List[str],
+    registry: Dict[str, Callable[[Dict[str, Any]], Any]],
+) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Build a function extracting only the requested fields from raw API items.
+
+    Args:
+        fields: Field names to keep, in output order
+        registry: One of ACCOUNT_FIELDS, CHAT_FIELDS, MESSAGE_FIELDS
+
+    Returns:
+        Function raw item -> projected dict
+
+    Raises:
+        ValueError: On unknown field names
+    """
+    unknown = [f for f in fields if f not in registry]
+    if unknown:
+        raise ValueError(
+            f"Unknown field(s): {', '.join(unknown)} (available: {', '.join(registry)})"
+        )
+    extractors = [(name, registry[name]) for name in fields]
+
+    def project(raw: Dict[str, Any]) -> Dict[str, Any]:
+        return {name: fn(raw) for name, fn in extractors}
+
+    return project
+
+
+class TextCompactor:
+    """
+    Shrinks message text for LLM consumption.
+
+    - truncates long texts to max_chars
+    - replaces quoted reply text already seen in the stream with a
+      reference to the quoted message id
+    """
+
+    def __init__(self, max_chars: Optional[int] = None, dedup_quotes: bool = False):
+        self.max_chars = max_chars
+        self.dedup_quotes = dedup_quotes
+        self._seen: Dict[str, str] = {}  # text hash -> message id
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.blake2b(" ".join(text.split()).casefold().encode("utf-8"), digest_size=12).hexdigest()
+
+    def __call__(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        text = record.get("text")
+
+        if self.dedup_quotes:
+            quoted = record.get("quoted")
+            if quoted and self._key(quoted) in self._seen:
+                record.pop("quoted")
+                record["quoted_id"] = self._seen[self._key(quoted)]
+
+            if text:
+                text = self._strip_quoted_lines(text)
+                self._seen.setdefault(self._key(text), record.get("id"))
+
+        if text and self.max_chars and len(text) > self.max_chars:
+            text = text[:self.max_chars].rstrip() + "…"
+
+        if "text" in record:
+            record["text"] = text
+        return record
+
+    def _strip_quoted_lines(self, text: str) -> str:
+        """Drop a trailing "> ..." quote block if it repeats an earlier message."""
+        lines = text.splitlines()
+        i = len(lines)
+        while i > 0 and (lines[i - 1].startswith(">") or not lines[i - 1].strip()):
+            i -= 1
+        quote = [line.lstrip("> ").rstrip() for line in lines[i:] if line.strip()]
+        if quote and self._key(" ".join(quote)) in self._seen:
+            # Also drop an "On ... wrote:" attribution line right above the quote
+            if i > 0 and lines[i - 1].rstrip().endswith("wrote:"):
+                i -= 1
+            return "\n".join(lines[:i]).rstrip()
+        return text
+
+
+def compact(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop None and empty values (keeps False and 0)."""
+    return {k: v for k, v in record.items() if v is not None and v != "" and v != []}
+
+
+def write_jsonl(records: Iterable[Dict[str, Any]], out: TextIO) -> int:
+    """Stream records as compact JSONL (one line per record, flushed). Returns count."""
+    count = 0
+    for record in records:
+        with phase("render"):
+            out.write(json.dumps(compact(record), ensure_ascii=False, separators=(",", ":")) + "\n")
+            out.flush()
+        count += 1
+    return count
+
+
+def add_output_arguments(parser, default_fields: List[str], registry: Dict[str, Any]) -> None:
+    """Add --jsonl/--fields/--max-text/--dedup-quotes options to a script's parser."""
+    parser.add_argument(
+        "--jsonl",
+        action="store_true",
+        help="Stream compact JSONL to stdout instead of a table",
+    )
+    parser.add_argument(
+        "--fields",
+        help=f"Comma-separated fields for --jsonl (default: {','.join(default_fields)}; "
+             f"available: {','.join(registry)})",
+    )
+    parser.add_argument(
+        "--max-text",
+        type=int,
+        help="Truncate message text to N characters (--jsonl)",
+    )
+    parser.add_argument(
+        "--dedup-quotes",
+        action="store_true",
+        help="Replace quoted reply text already in the output with its message id (--jsonl)",
+    )
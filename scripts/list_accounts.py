@@ -6,6 +6,7 @@ Usage:
     python scripts/list_accounts.py
 """
 import sys
+import argparse
 from pathlib import Path
 
 # Add project root to path
@@ -16,11 +17,18 @@ from rich.table import Table
 from rich import box
 
 from src.unipile_client import UniPileClient, UniPileError
+from src.profiling import add_profile_arguments, start_profile
+from scripts.reports import print_profile_summary
 
 console = Console()
 
 
 def main():
+    parser = argparse.ArgumentParser(description="List connected UniPile accounts")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profile(args, "list_accounts", report=print_profile_summary)
+
     try:
         client = UniPileClient()
         accounts = client.list_accounts()
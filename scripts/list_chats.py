@@ -4,6 +4,9 @@ List chats/conversations for an account.
 
 Usage:
     python scripts/list_chats.py --account-id ACCOUNT_ID [--limit 20]
+    python scripts/list_chats.py -a ACCOUNT_ID --jsonl --fields id,name,unread_count
+
+Runs as a pipeline: fetch (pages) -> model/project -> sink (table/JSONL).
 """
 import sys
 import argparse
@@ -17,6 +20,13 @@ from rich.table import Table
 from rich import box
 
 from src.unipile_client import UniPileClient, UniPileError
+from src.pipeline import Pipeline, add_pipeline_arguments
+from src.profiling import add_profile_arguments, start_profile
+from scripts.formatters import (
+    CHAT_FIELDS, DEFAULT_CHAT_FIELDS, add_output_arguments, make_projection,
+    parse_fields, write_jsonl,
+)
+from scripts.reports import print_pipeline_stats, print_profile_summary
 
 console = Console()
 
@@ -34,15 +44,29 @@ def main():
         default=20,
         help="Max chats to show (default: 20)",
     )
+    add_output_arguments(parser, DEFAULT_CHAT_FIELDS, CHAT_FIELDS)
+    add_pipeline_arguments(parser)
 
+    add_profile_arguments(parser)
     args = parser.parse_args()
+    start_profile(args, "list_chats", report=print_profile_summary)
 
     try:
         client = UniPileClient()
-        chats, cursor = client.list_chats(args.account_id, limit=args.limit)
 
-        if not chats:
-            console.print("[yellow]No conversations found.[/yellow]")
+        pages = client.iter_pages("/chats", {"account_id": args.account_id}, max_items=args.limit)
+
+        if args.jsonl:
+            # Project raw items straight to JSONL, no models or table
+            project = make_projection(parse_fields(args.fields, DEFAULT_CHAT_FIELDS), CHAT_FIELDS)
+            pipeline = (
+                Pipeline("list_chats", pages)
+                .flat_map("project", lambda page: [project(item) for item in page], phase="model")
+                .sink("write", lambda record: write_jsonl([record], sys.stdout))
+            )
+            pipeline.run()
+            if args.pipeline_stats:
+                print_pipeline_stats(pipeline)
             return
 
         table = Table(
@@ -56,7 +80,7 @@ def main():
         table.add_column("Provider", style="green")
         table.add_column("Unread", justify="center")
 
-        for i, chat in enumerate(chats, 1):
+        def add_row(chat) -> None:
             # Use chat name or show attendee count
             name = chat.name or f"{len(chat.attendees)} participant(s)"
             if len(name) > 32:
@@ -65,20 +89,34 @@ def main():
             unread = f"[red]{chat.unread_count}[/red]" if chat.unread_count else "-"
 
             table.add_row(
-                str(i),
+                str(table.row_count + 1),
                 chat.id,
                 name,
                 chat.provider,
                 unread,
             )
 
-        console.print(table)
-        console.print(f"\n[dim]Showing {len(chats)} conversation(s)[/dim]")
+        def to_chats(page):
+            return [client.parse_chat(item, args.account_id) for item in page]
 
-        if cursor:
-            console.print(f"[dim]More results available (cursor: {cursor[:20]}...)[/dim]")
+        pipeline = (
+            Pipeline("list_chats", pages)
+            .flat_map("model", to_chats, phase="model")
+            .sink("render", add_row, phase="render")
+        )
+        pipeline.run()
 
-    except UniPileError as e:
+        if not table.row_count:
+            console.print("[yellow]No conversations found.[/yellow]")
+        else:
+            console.print(table)
+            console.print(f"\n[dim]Showing {table.row_count} conversation(s)[/dim]")
+            if table.row_count >= args.limit:
+                console.print("[dim]More results may be available (raise --limit)[/dim]")
+        if args.pipeline_stats:
+            print_pipeline_stats(pipeline)
+
+    except (UniPileError, ValueError) as e:
         console.print(f"[bold red]Error:[/bold red] {e}")
         sys.exit(1)
 
@@ -1,62 +1,224 @@
 """
 Logging utilities for UniPile Messenger.
-Provides timestamped logging to both console and file.
+
+Structured JSON logs with a non-blocking pipeline:
+- callers only put records on a bounded in-memory queue (QueueHandler);
+  when the queue is full, records are dropped and counted instead of
+  blocking the caller
+- a background QueueListener thread formats and writes them to the
+  console and to logs/unipile.jsonl
+- the log file rotates by size and by age instead of one file per run;
+  worker processes that log concurrently (per_process=True) each write
+  and rotate their own logs/unipile.<pid>.jsonl, since rotating a shared
+  file from several processes loses records
+- records below WARNING are sampled per correlation id, so whole
+  operations are kept or dropped together and large sweeps are not
+  I/O-bound on logging
 """
+import atexit
+import json
 import logging
+import os
+import queue
+import random
 import sys
-from datetime import datetime
+import time
+import zlib
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Optional
 
 # Add src to path for config import
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.config import Config
+from src.log_context import CorrelationFilter
+
+ROOT_LOGGER = "unipile"
+LOG_FILE_NAME = "unipile.jsonl"
+
+# Standard LogRecord attributes (everything else passed via `extra` is a field)
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional["DroppingQueueHandler"] = None
+_pid: Optional[int] = None  # Process that started _listener (a forked child must start its own)
+
 
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, correlation_id + extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "correlation_id", None):
+            entry["correlation_id"] = record.correlation_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key != "correlation_id":
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep WARNING and above; keep a `rate` fraction of lower records.
 
-def setup_logging(name: str = "unipile") -> logging.Logger:
+    The decision is a hash of the correlation id, so all records of one
+    operation share it. Records without a correlation id are sampled at random.
     """
-    Set up logging with both console and file handlers.
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.threshold = int(max(0.0, min(1.0, rate)) * 10_000)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.threshold >= 10_000:
+            return True
+        correlation_id = getattr(record, "correlation_id", None)
+        if correlation_id:
+            return zlib.crc32(correlation_id.encode()) % 10_000 < self.threshold
+        return random.random() * 10_000 < self.threshold
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks: drops (and counts) records when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Keep the record's extra fields (the default prepare() would
+        # flatten everything into msg via a plain formatter)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class SizeAndTimeRotatingFileHandler(RotatingFileHandler):
+    """Rotates when the file exceeds max_bytes or is older than max_age seconds."""
+
+    def __init__(self, filename: Path, max_bytes: int, backup_count: int, max_age: float):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.max_age = max_age
+        self.started_at = self._first_record_time(Path(filename))
+
+    @staticmethod
+    def _first_record_time(path: Path) -> float:
+        """Timestamp of the oldest record in an existing log file (now if none)."""
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                first = f.readline()
+            return datetime.fromisoformat(json.loads(first)["ts"]).timestamp()
+        except (OSError, ValueError, KeyError, TypeError):
+            return time.time()
+
+    def shouldRollover(self, record: logging.LogRecord) -> int:
+        if self.max_age and time.time() - self.started_at >= self.max_age:
+            if Path(self.baseFilename).exists() and Path(self.baseFilename).stat().st_size > 0:
+                return 1
+            self.started_at = time.time()
+        return super().shouldRollover(record)
+
+    def doRollover(self) -> None:
+        super().doRollover()
+        self.started_at = time.time()
+
+
+def setup_logging(name: str = ROOT_LOGGER, per_process: bool = False) -> logging.Logger:
+    """
+    Set up the logging pipeline (once per process) and return a logger.
 
     Args:
-        name: Logger name (default: "unipile")
+        name: Logger name (default: "unipile"); other names become
+            children of "unipile", so client logs and script logs share
+            one pipeline and one file
+        per_process: Write logs/unipile.<pid>.jsonl instead of the shared
+            file (for worker processes running side by side)
 
     Returns:
         Configured logger instance
     """
-    logger = logging.getLogger(name)
+    global _listener, _queue_handler, _pid
 
-    # Avoid adding handlers multiple times
-    if logger.handlers:
+    root = logging.getLogger(ROOT_LOGGER)
+    logger = root if name == ROOT_LOGGER else logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+    # Avoid setting up the pipeline multiple times
+    if _listener is not None and _pid == os.getpid():
         return logger
+    if _queue_handler is not None:
+        # Inherited through fork: the listener thread did not survive it
+        root.removeHandler(_queue_handler)
 
-    logger.setLevel(getattr(logging, Config.LOG_LEVEL, logging.INFO))
+    root.setLevel(getattr(logging, Config.LOG_LEVEL, logging.INFO))
+    root.propagate = False
 
-    # Console handler
+    # Console handler (warnings only: scripts render their own Rich output)
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
+    console_handler.setLevel(logging.WARNING)
     console_format = logging.Formatter(
         "%(asctime)s | %(levelname)-8s | %(message)s",
         datefmt="%H:%M:%S"
     )
     console_handler.setFormatter(console_format)
-    logger.addHandler(console_handler)
 
-    # File handler (if logs directory exists)
+    # JSON file handler with size/age rotation
     Config.LOGS_DIR.mkdir(exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = Config.LOGS_DIR / f"{timestamp}_{name}.log"
-
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setLevel(logging.DEBUG)
-    file_format = logging.Formatter(
-        "%(asctime)s | %(levelname)-8s | %(name)s | %(message)s"
+    file_name = f"{Path(LOG_FILE_NAME).stem}.{os.getpid()}.jsonl" if per_process else LOG_FILE_NAME
+    file_handler = SizeAndTimeRotatingFileHandler(
+        Config.LOGS_DIR / file_name,
+        max_bytes=Config.LOG_MAX_BYTES,
+        backup_count=Config.LOG_BACKUP_COUNT,
+        max_age=Config.LOG_ROTATE_HOURS * 3600,
     )
-    file_handler.setFormatter(file_format)
-    logger.addHandler(file_handler)
+    file_handler.setLevel(logging.DEBUG)
+    file_handler.setFormatter(JsonFormatter())
+
+    # Callers only enqueue; filters run before enqueueing so sampled-out
+    # records cost nothing downstream
+    _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=Config.LOG_QUEUE_SIZE))
+    _queue_handler.addFilter(CorrelationFilter())
+    _queue_handler.addFilter(SamplingFilter(Config.LOG_SAMPLE_RATE))
+    root.addHandler(_queue_handler)
+
+    _listener = QueueListener(_queue_handler.queue, console_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+    _pid = os.getpid()
+    atexit.register(shutdown_logging)
 
     return logger
 
 
-def get_logger(name: str = "unipile") -> logging.Logger:
+def shutdown_logging() -> None:
+    """Flush queued records and stop the background writer."""
+    global _listener
+    if _listener is None or _pid != os.getpid():
+        return
+    _listener.stop()
+    _listener = None
+    if _queue_handler and _queue_handler.dropped:
+        sys.stderr.write(f"logging: dropped {_queue_handler.dropped} record(s), queue full\n")
+
+
+def get_logger(name: str = ROOT_LOGGER) -> logging.Logger:
     """Get existing logger or create new one."""
-    return logging.getLogger(name)
+    return logging.getLogger(name if name == ROOT_LOGGER else f"{ROOT_LOGGER}.{name}")
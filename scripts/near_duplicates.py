@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate check of outbound texts.
+
+Every message sent through the send ledger is indexed (MinHash + LSH in
+data/near_duplicates.db); send_to_user.py and the scheduler consult the
+index before sending. `backfill` indexes earlier sent messages from the
+API, `check` tries a draft.
+
+Usage:
+    python scripts/near_duplicates.py backfill --days 90
+    python scripts/near_duplicates.py check "Hi, are you open to a call?" -u USER_ID
+    python scripts/near_duplicates.py stats
+"""
+import sys
+import time
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+from src.config import Config
+from src.unipile_client import UniPileClient, UniPileError
+from src.near_duplicates import NearDuplicateIndex
+from src.profiling import add_profile_arguments, start_profile
+from scripts.reports import print_profile_summary
+
+console = Console()
+
+
+def cmd_check(index: NearDuplicateIndex, args) -> None:
+    started = time.perf_counter()
+    matches = index.check(
+        args.text,
+        recipient=f"user:{args.user_id}" if args.user_id else None,
+        account_id=args.account_id,
+    )
+    elapsed = (time.perf_counter() - started) * 1000
+    if not matches:
+        console.print(f"[green]Nothing ≥{index.threshold:.0%} similar was sent[/green] [dim]({elapsed:.2f} ms)[/dim]")
+        return
+
+    table = Table(title=f"Similar Sent Messages (≥{index.threshold:.0%})", box=box.ROUNDED, show_header=True)
+    table.add_column("Similarity", justify="right", style="yellow")
+    table.add_column("Scope")
+    table.add_column("Sent", no_wrap=True)
+    table.add_column("Recipient", style="cyan", no_wrap=True)
+    table.add_column("Text", style="dim", max_width=50)
+    for match in matches[:args.limit]:
+        table.add_row(
+            f"{match.similarity:.0%}",
+            "this recipient" if match.scope == "recipient" else "recent",
+            datetime.fromtimestamp(match.sent_at).strftime("%Y-%m-%d %H:%M"),
+            match.recipient,
+            match.excerpt or "",
+        )
+    console.print(table)
+    console.print(f"[dim]{len(matches)} match(es) in {elapsed:.2f} ms[/dim]")
+
+
+def cmd_backfill(index: NearDuplicateIndex, args) -> None:
+    client = UniPileClient()
+    account_ids = [args.account_id] if args.account_id else [a.id for a in client.list_accounts(usable_only=True)]
+    since = time.time() - args.days * 86400
+    for account_id in account_ids:
+        with console.status(f"[dim]Indexing sent messages of {account_id}...[/dim]"):
+            added = index.backfill(client, account_id, since)
+        console.print(f"[dim]{account_id}: {added} sent message(s) indexed[/dim]")
+
+
+def cmd_stats(index: NearDuplicateIndex, args) -> None:
+    total, recent = index.count()
+    console.print(
+        f"[dim]{total} sent text(s) indexed, {recent} in the last {index.window / 86400:g} day(s) "
+        f"(threshold {index.threshold:.0%})[/dim]"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Near-duplicate check of outbound texts",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python scripts/near_duplicates.py backfill --days 90
+  python scripts/near_duplicates.py check "Hi, are you open to a call?" -u ACoAABRD1jk...
+  python scripts/near_duplicates.py stats
+        """
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=Config.NEAR_DUPLICATE_THRESHOLD,
+        help=f"Similarity threshold 0..1 (default: {Config.NEAR_DUPLICATE_THRESHOLD:g})",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    check_parser = subparsers.add_parser("check", help="Find sent messages similar to a draft")
+    check_parser.add_argument("text", help="Draft text")
+    check_parser.add_argument("--user-id", "-u", help="Recipient's provider user ID (checks all they got)")
+    check_parser.add_argument("--account-id", "-a", help="Only recent sends of this account")
+    check_parser.add_argument("--limit", "-l", type=int, default=10, help="Matches to show (default: 10)")
+
+    backfill_parser = subparsers.add_parser("backfill", help="Index messages sent before the index existed")
+    backfill_parser.add_argument("--days", "-d", type=int, default=90, help="Sent in the last N days (default: 90)")
+    backfill_parser.add_argument("--account-id", "-a", help="Only this account (default: all accounts)")
+
+    subparsers.add_parser("stats", help="Show index size")
+
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profile(args, "near_duplicates", report=print_profile_summary)
+    index = NearDuplicateIndex(threshold=args.threshold)
+
+    try:
+        if args.command == "check":
+            cmd_check(index, args)
+        elif args.command == "backfill":
+            cmd_backfill(index, args)
+        else:
+            cmd_stats(index, args)
+
+    except UniPileError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(1)
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,12 @@
 View recent messages from all conversations.
 
 Usage:
-    python scripts/recent_messages.py --days 3 [--account-id ACCOUNT_ID]
+    python scripts/recent_messages.py --days 3 [--account-id ACCOUNT_ID] [--limit 50]
+
+Runs as a pipeline: timeline merge (fetch + model) -> format -> render,
+so a slow terminal doesn't hold up fetching and vice versa. The merge
+fetches the first pages of the chats it opens in concurrent batches
+(list_messages_many, --workers at a time).
 """
 import sys
 import argparse
@@ -15,25 +20,26 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from rich.console import Console
 from rich.table import Table
-from rich import box
 
+from src.config import Config
 from src.unipile_client import UniPileClient, UniPileError
+from src.timeline import merge_timeline
+from src.pipeline import Pipeline, add_pipeline_arguments
+from src.profiling import add_profile_arguments, start_profile
+from scripts.reports import print_pipeline_stats, print_profile_summary
 
 console = Console()
 
 
-def parse_timestamp(ts) -> datetime | None:
-    """Parse ISO timestamp to datetime."""
-    if not ts:
-        return None
-    try:
-        # Handle ISO format with Z suffix
-        if isinstance(ts, str):
-            ts = ts.replace('Z', '+00:00')
-            return datetime.fromisoformat(ts)
-        return ts
-    except Exception:
-        return None
+def render_row(time_str: str, chat: str, sender: str, text: str, header: bool = False) -> Table:
+    """One timeline row with fixed column widths, so streamed rows line up."""
+    row = Table.grid(padding=(0, 1))
+    row.add_column(min_width=16, no_wrap=True, style="bold" if header else "dim")
+    row.add_column(width=30, no_wrap=True, overflow="ellipsis", style="bold" if header else "")
+    row.add_column(width=20, no_wrap=True, overflow="ellipsis", style="bold" if header else "cyan")
+    row.add_column(width=50, no_wrap=True, overflow="ellipsis", style="bold" if header else "")
+    row.add_row(time_str, chat, sender, text)
+    return row
 
 
 def main():
@@ -48,8 +54,22 @@ def main():
         "--account-id", "-a",
         help="UniPile account ID (if not provided, uses first account)",
     )
+    parser.add_argument(
+        "--limit", "-l",
+        type=int,
+        help="Show only the N newest messages (stops fetching once found)",
+    )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=Config.BATCH_WORKERS,
+        help=f"Chats fetched concurrently (default: {Config.BATCH_WORKERS}, 1 = one by one)",
+    )
+    add_pipeline_arguments(parser)
 
+    add_profile_arguments(parser)
     args = parser.parse_args()
+    start_profile(args, "recent_messages", report=print_profile_summary)
 
     try:
         client = UniPileClient()
@@ -65,70 +85,56 @@ def main():
 
         # Calculate cutoff time
         cutoff = datetime.now(timezone.utc) - timedelta(days=args.days)
-        console.print(f"[dim]Loading messages from last {args.days} day(s)...[/dim]\n")
-
-        # Get all chats
-        all_messages = []
-        chats, cursor = client.list_chats(args.account_id, limit=50)
-
-        while chats:
-            for chat in chats:
-                try:
-                    # Get messages from this chat
-                    messages, _ = client.list_messages(chat.id, limit=100)
-
-                    for msg in messages:
-                        msg_time = parse_timestamp(msg.timestamp)
-                        if msg_time and msg_time > cutoff:
-                            all_messages.append({
-                                "time": msg_time,
-                                "chat": chat.name or f"{len(chat.attendees)} participant(s)",
-                                "sender": "You" if msg.is_sender else msg.sender_name or "Unknown",
-                                "text": (msg.text or "")[:60],
-                                "chat_id": chat.id,
-                            })
-                except Exception:
-                    continue
-
-            # Get next batch of chats
-            if cursor:
-                chats, cursor = client.list_chats(args.account_id, limit=50, cursor=cursor)
-            else:
-                break
-
-        if not all_messages:
-            console.print(f"[yellow]No messages from last {args.days} day(s)[/yellow]")
-            return
-
-        # Sort by time (newest first)
-        all_messages.sort(key=lambda x: x["time"], reverse=True)
-
-        # Display
-        table = Table(
-            title=f"Recent Messages (last {args.days} day(s))",
-            box=box.ROUNDED,
-            show_header=True,
+        limit_note = f", newest {args.limit}" if args.limit else ""
+        console.print(f"[dim]Messages from last {args.days} day(s){limit_note}, newest first:[/dim]\n")
+
+        # Rows are printed as the merge produces them (no collect-then-sort)
+        skipped = []
+        total = 0
+        timeline = merge_timeline(
+            client,
+            args.account_id,
+            since=cutoff.timestamp(),
+            limit=args.limit,
+            on_error=lambda chat, e: skipped.append(chat.id),
+            prefetch=args.workers,
         )
-        table.add_column("Time", style="dim", no_wrap=True)
-        table.add_column("Chat", max_width=30)
-        table.add_column("From", style="cyan")
-        table.add_column("Message", max_width=50)
-
-        for msg in all_messages:
-            time_str = msg["time"].strftime("%Y-%m-%d %H:%M")
-            text = msg["text"]
-            if len(msg["text"]) > 47:
-                text = msg["text"][:47] + "..."
-
-            table.add_row(
-                time_str,
-                msg["chat"],
-                msg["sender"],
+
+        def format_entry(entry) -> Table:
+            msg, chat = entry.message, entry.chat
+            text = (msg.text or "").replace("\n", " ")
+            if len(text) > 47:
+                text = text[:47] + "..."
+            return render_row(
+                datetime.fromtimestamp(entry.ts, tz=timezone.utc).astimezone().strftime("%Y-%m-%d %H:%M"),
+                chat.name or f"{len(chat.attendees)} participant(s)",
+                "You" if msg.is_sender else msg.sender_name or "Unknown",
                 text,
             )
 
-        console.print(table)
-        console.print(f"\n[dim]Total: {len(all_messages)} message(s)[/dim]")
+        def render(row: Table) -> None:
+            nonlocal total
+            if total == 0:
+                console.print(render_row("Time", "Chat", "From", "Message", header=True))
+            total += 1
+            console.print(row)
+
+        pipeline = (
+            Pipeline("recent_messages", timeline)
+            .map("format", format_entry)
+            .sink("render", render)
+        )
+        pipeline.run()
+
+        if not total:
+            console.print(f"[yellow]No messages from last {args.days} day(s)[/yellow]")
+            return
+
+        console.print(f"\n[dim]Total: {total} message(s)[/dim]")
+        if skipped:
+            console.print(f"[dim]{len(skipped)} chat(s) could not be read and were skipped[/dim]")
+        if args.pipeline_stats:
+            print_pipeline_stats(pipeline)
 
     except UniPileError as e:
         console.print(f"[bold red]Error:[/bold red] {e}")
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Mirror LinkedIn relations locally and look up contacts offline.
+
+Usage:
+    python scripts/relations.py sync [--account-id ACCOUNT_ID]
+    python scripts/relations.py find-contact "Jakub Krakovsky"
+    python scripts/relations.py find-contact "product manager" --no-live
+"""
+import sys
+import argparse
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+from src.unipile_client import UniPileClient, UniPileError
+from src.relations_store import RelationsStore
+from src.profiling import add_profile_arguments, start_profile
+from scripts.reports import print_profile_summary
+
+console = Console()
+
+
+def cmd_sync(client: UniPileClient, store: RelationsStore, args) -> None:
+    """Page all relations of the selected account(s) into the store."""
+    if args.account_id:
+        account_ids = [args.account_id]
+    else:
+        account_ids = [acc.id for acc in client.list_accounts(usable_only=True)]
+        if not account_ids:
+            console.print("[red]Error: No accounts connected[/red]")
+            return
+
+    for account_id in account_ids:
+        with console.status(f"[dim]Syncing relations for {account_id}...[/dim]") as status:
+            total = store.sync(
+                client,
+                account_id,
+                on_page=lambda n: status.update(f"[dim]Syncing {account_id}: {n} relation(s)...[/dim]"),
+            )
+        console.print(f"[green]✓[/green] {account_id}: {total} relation(s)")
+
+    console.print(f"\n[dim]Store total: {store.count()} relation(s)[/dim]")
+
+
+def cmd_find(client: UniPileClient | None, store: RelationsStore, args) -> None:
+    """Look up a contact in the local store, falling back to live search on a miss."""
+    matches = store.find(args.query, account_id=args.account_id, limit=args.limit)
+
+    if matches:
+        table = Table(
+            title=f"Contacts: {args.query}",
+            box=box.ROUNDED,
+            show_header=True,
+        )
+        table.add_column("#", style="dim", width=3)
+        table.add_column("Name", style="cyan", max_width=30)
+        table.add_column("Headline", max_width=40)
+        table.add_column("Account", style="dim", max_width=15)
+        table.add_column("User ID", style="green", no_wrap=True)
+
+        for i, (conn, account_id, _score) in enumerate(matches, 1):
+            headline = conn.headline or "-"
+            if len(headline) > 37:
+                headline = headline[:37] + "..."
+            table.add_row(str(i), conn.name or "-", headline, account_id[:15], conn.provider_id)
+
+        console.print(table)
+        console.print(f"\n[dim]{len(matches)} match(es) from local relations[/dim]")
+        return
+
+    if args.no_live:
+        console.print(f"[yellow]No local match for '{args.query}'[/yellow]")
+        return
+
+    # Miss: fall back to live LinkedIn search
+    console.print(f"[dim]No local match, searching LinkedIn for: {args.query}...[/dim]\n")
+    account_id = args.account_id
+    if not account_id:
+        accounts = client.list_accounts()
+        if not accounts:
+            console.print("[red]Error: No accounts connected[/red]")
+            return
+        account_id = accounts[0].id
+
+    results, _ = client.search_linkedin(account_id=account_id, keywords=args.query, limit=args.limit)
+    if not results:
+        console.print(f"[yellow]No results found for '{args.query}'[/yellow]")
+        return
+
+    table = Table(
+        title=f"LinkedIn Search: {args.query}",
+        box=box.ROUNDED,
+        show_header=True,
+    )
+    table.add_column("#", style="dim", width=3)
+    table.add_column("Name", style="cyan", max_width=30)
+    table.add_column("Headline", max_width=40)
+    table.add_column("User ID", style="green", no_wrap=True)
+
+    for i, person in enumerate(results, 1):
+        name = f"{person.get('first_name', '')} {person.get('last_name', '')}".strip()
+        headline = person.get("headline") or "-"
+        if len(headline) > 37:
+            headline = headline[:37] + "..."
+        table.add_row(
+            str(i),
+            name or person.get("name", "Unknown"),
+            headline,
+            person.get("id", person.get("member_urn", "-")),
+        )
+
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local LinkedIn relations mirror",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Mirror relations of all accounts
+  python scripts/relations.py sync
+
+  # Find a contact offline (falls back to live search on a miss)
+  python scripts/relations.py find-contact "Jakub Krakovsky"
+        """
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sync_parser = subparsers.add_parser("sync", help="Page all relations into the local store")
+    sync_parser.add_argument(
+        "--account-id", "-a",
+        help="UniPile account ID (if not provided, syncs all accounts)",
+    )
+
+    find_parser = subparsers.add_parser("find-contact", help="Find a contact by name or headline")
+    find_parser.add_argument("query", help="Name, part of a name or headline keywords")
+    find_parser.add_argument(
+        "--account-id", "-a",
+        help="Restrict to one account (also used for live search fallback)",
+    )
+    find_parser.add_argument(
+        "--limit", "-l",
+        type=int,
+        default=10,
+        help="Max results to show (default: 10)",
+    )
+    find_parser.add_argument(
+        "--no-live",
+        action="store_true",
+        help="Never fall back to live LinkedIn search",
+    )
+
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profile(args, "relations", report=print_profile_summary)
+    store = RelationsStore()
+
+    try:
+        if args.command == "sync":
+            cmd_sync(UniPileClient(), store, args)
+        else:
+            # Only construct the client when a live fallback may be needed
+            client = None if args.no_live else UniPileClient()
+            cmd_find(client, store, args)
+
+    except UniPileError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(1)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
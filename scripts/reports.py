@@ -0,0 +1,68 @@
+"""
+Run reports shown on stderr for script options.
+
+- print_profile_summary: --profile phase table, passed to start_profile()
+  as its report
+- print_pipeline_stats: --pipeline-stats per-stage table of a finished
+  pipeline
+
+src/ only returns the data (Profiler.stop(), Pipeline.stats()); the
+scripts decide whether and how it is shown.
+"""
+from typing import Dict
+
+from rich import box
+from rich.console import Console
+from rich.table import Table
+
+from src.pipeline import Pipeline
+
+console = Console(stderr=True)
+
+
+def print_profile_summary(summary: Dict[str, object]) -> None:
+    """Phase table, memory peak, component counters and profile files."""
+    wall = summary["wall_seconds"] or 1e-9
+    table = Table(title=f"Profile: {summary['name']} ({wall:.2f}s wall)", box=box.SIMPLE)
+    table.add_column("Phase")
+    table.add_column("Seconds", justify="right")
+    table.add_column("% of wall", justify="right")
+    table.add_column("Calls", justify="right")
+    accounted = 0.0
+    for name, stats in summary["phases"].items():
+        accounted += stats["seconds"]
+        table.add_row(name, f"{stats['seconds']:.3f}", f"{stats['seconds'] / wall:.0%}", str(stats["calls"]))
+    if accounted < wall:
+        table.add_row("[dim]other[/dim]", f"[dim]{wall - accounted:.3f}[/dim]",
+                      f"[dim]{(wall - accounted) / wall:.0%}[/dim]", "")
+    console.print(table)
+    if "memory" in summary:
+        console.print(f"[dim]Peak traced memory: {summary['memory']['peak_bytes'] / 1e6:.1f} MB[/dim]")
+    for name, stats in summary.get("stats", {}).items():
+        values = ", ".join(f"{key} {value}" for key, value in stats.items())
+        console.print(f"[dim]{name}: {values}[/dim]")
+    for path in summary["files"]:
+        console.print(f"[dim]Profile written: {path}[/dim]")
+
+
+def print_pipeline_stats(pipeline: Pipeline) -> None:
+    """Per-stage throughput, backpressure and queue depth of a pipeline run."""
+    table = Table(title=f"Pipeline: {pipeline.name} ({pipeline.elapsed:.2f}s, times in s)", box=box.SIMPLE)
+    for column in ("Stage", "Workers", "In", "Out", "Items/s", "Busy", "Blocked", "Starved", "Queue"):
+        table.add_column(column, justify="left" if column == "Stage" else "right")
+    for row in pipeline.stats():
+        source = row["stage"] == "source"
+        table.add_row(
+            row["stage"] + (f" [red]({row['errors']} err)[/red]" if row["errors"] else ""),
+            str(row["workers"]),
+            "-" if source else str(row["items_in"]),
+            str(row["items_out"]),
+            f"{row['per_second']:g}",
+            f"{row['busy_seconds']:.2f}",
+            f"{row['blocked_seconds']:.2f}",
+            "-" if source else f"{row['starved_seconds']:.2f}",
+            "-" if source else f"{row['avg_depth']:g}/{row['max_depth']}/{row['queue_size']}",
+        )
+    console.print(table)
+    console.print("[dim]Blocked: waiting on a full downstream queue (backpressure). "
+                  "Starved: waiting for input. Queue: average/max depth/capacity.[/dim]")
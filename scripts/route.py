@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Pick the best seat (account) to message a person.
+
+Relations of all seats (scripts/relations.py sync) and their known 1:1
+chats are merged into data/routing.db with the best seat per person
+precomputed. send_to_user.py uses it when no --account-id is given.
+
+Usage:
+    python scripts/route.py refresh --sync-chats
+    python scripts/route.py pick USER_ID
+    python scripts/route.py pick USER_ID --all
+    python scripts/route.py stats
+"""
+import sys
+import time
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+from src.unipile_client import UniPileClient, UniPileError
+from src.chat_index import ChatIndex
+from src.relations_store import RelationsStore
+from src.routing import RoutingIndex
+from src.profiling import add_profile_arguments, start_profile
+from scripts.reports import print_profile_summary
+
+console = Console()
+
+
+def cmd_refresh(index: RoutingIndex, args) -> None:
+    relations, chat_index = RelationsStore(), ChatIndex()
+    try:
+        if args.sync_chats:
+            client = UniPileClient()
+            for account in client.list_accounts(usable_only=True):
+                with console.status(f"[dim]Indexing chats of {account.name or account.id}...[/dim]"):
+                    seen, changed = chat_index.sync(client, account.id)
+                console.print(f"[dim]{account.name or account.id}: {changed} chat mapping(s) new or changed[/dim]")
+        started = time.perf_counter()
+        rerouted = index.refresh(relations, chat_index, full=args.full)
+        elapsed = time.perf_counter() - started
+    finally:
+        relations.close()
+        chat_index.close()
+    people, links = index.count()
+    console.print(
+        f"[green]✓[/green] {rerouted} person(s) re-routed in {elapsed:.2f}s "
+        f"[dim]({people} people, {links} seat link(s))[/dim]"
+    )
+
+
+def cmd_pick(index: RoutingIndex, args) -> None:
+    started = time.perf_counter()
+    route = index.route(args.user_id)
+    elapsed = (time.perf_counter() - started) * 1000
+    if route is None:
+        console.print(f"[yellow]No seat is connected to or has talked with {args.user_id}[/yellow]")
+        return
+    console.print(
+        f"[green]{route.account_id}[/green] ({route.reason(index.recent / 86400)}, "
+        f"{route.seats} seat(s) linked) [dim]{elapsed:.2f} ms[/dim]"
+    )
+    if not args.all:
+        return
+
+    table = Table(title=f"Seats for {args.user_id}", box=box.ROUNDED, show_header=True)
+    table.add_column("#", style="dim", width=3)
+    table.add_column("Account", style="cyan", no_wrap=True)
+    table.add_column("Connected")
+    table.add_column("Last Message", no_wrap=True)
+    table.add_column("Chat ID", style="dim", no_wrap=True)
+    for i, seat in enumerate(index.seats(args.user_id), 1):
+        table.add_row(
+            str(i),
+            seat.account_id,
+            "✓" if seat.connected else "-",
+            datetime.fromtimestamp(seat.last_message_at).strftime("%Y-%m-%d") if seat.last_message_at else "-",
+            seat.chat_id or "-",
+        )
+    console.print(table)
+
+
+def cmd_stats(index: RoutingIndex, args) -> None:
+    people, links = index.count()
+    table = Table(title="Best Route per Seat", box=box.ROUNDED, show_header=True)
+    table.add_column("Account", style="cyan", no_wrap=True)
+    table.add_column("People", justify="right")
+    for account_id, count in index.seat_counts().items():
+        table.add_row(account_id, str(count))
+    console.print(table)
+    console.print(f"[dim]{people} people, {links} seat link(s)[/dim]")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pick the best seat (account) to message a person",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python scripts/relations.py sync              # connections of all seats
+  python scripts/route.py refresh --sync-chats  # merge them with known chats
+  python scripts/route.py pick ACoAABRD1jk... --all
+        """
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    refresh_parser = subparsers.add_parser("refresh", help="Merge changed relations and chats")
+    refresh_parser.add_argument(
+        "--sync-chats", action="store_true", help="First index new chats of all accounts from the API"
+    )
+    refresh_parser.add_argument("--full", action="store_true", help="Re-read everything, not only changes")
+
+    pick_parser = subparsers.add_parser("pick", help="Best seat for a person")
+    pick_parser.add_argument("user_id", help="Person's provider user ID")
+    pick_parser.add_argument("--all", action="store_true", help="List all linked seats, best first")
+
+    subparsers.add_parser("stats", help="People routed to each seat")
+
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profile(args, "route", report=print_profile_summary)
+    index = RoutingIndex()
+
+    try:
+        if args.command == "refresh":
+            cmd_refresh(index, args)
+        elif args.command == "pick":
+            cmd_pick(index, args)
+        else:
+            cmd_stats(index, args)
+
+    except UniPileError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(1)
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
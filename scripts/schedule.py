@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Schedule messages for later delivery and run the dispatcher.
+
+Sends are stored locally and delivered by `run`, which respects each
+recipient's send window and the send rate limit. Delivery goes through
+the send ledger, so a message is never posted twice.
+
+Usage:
+    python scripts/schedule.py add -u USER_ID -m "Hello!" --at "2026-05-04 09:30" --tz Europe/Prague
+    python scripts/schedule.py add -u USER_ID -m "Hello!" --in 2h --window 09:00-17:00 --window-tz Europe/Prague
+    python scripts/schedule.py list
+    python scripts/schedule.py cancel 42
+    python scripts/schedule.py window -u USER_ID --window 09:00-17:00 --tz America/New_York
+    python scripts/schedule.py run [--workers 2] [--rate 6] [--once]
+"""
+import re
+import sys
+import time
+import argparse
+import threading
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rich.console import Console
+from rich.panel import Panel
+from rich.table import Table
+from rich import box
+
+from src.config import Config
+from src.unipile_client import UniPileClient, UniPileError
+from src.send_ledger import SendLedger
+from src.chat_index import ChatIndex
+from src.near_duplicates import NearDuplicateIndex
+from src.scheduler import ScheduleStore, Scheduler
+from src.profiling import add_profile_arguments, start_profile
+from scripts.logger import setup_logging
+from scripts.reports import print_profile_summary
+
+console = Console()
+
+STATUS_COLORS = {
+    "scheduled": "cyan", "sending": "yellow", "sent": "green", "failed": "red", "cancelled": "dim", "similar": "magenta",
+}
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(value: str) -> float:
+    """Parse '90m', '2h', '1d' or '1h30m' into seconds."""
+    parts = re.findall(r"(\d+)\s*([smhd])", value.lower())
+    if not parts or "".join(n + u for n, u in parts) != re.sub(r"\s+", "", value.lower()):
+        raise ValueError(f"Invalid duration: {value!r} (use e.g. 30m, 2h, 1d, 1h30m)")
+    return float(sum(int(n) * DURATION_UNITS[u] for n, u in parts))
+
+
+def parse_window(value: str) -> tuple[str, str]:
+    """Parse 'HH:MM-HH:MM'."""
+    match = re.fullmatch(r"(\d{1,2}:\d{2})-(\d{1,2}:\d{2})", value.strip())
+    if not match:
+        raise ValueError(f"Invalid window: {value!r} (use e.g. 09:00-17:00)")
+    return match.group(1), match.group(2)
+
+
+def get_zone(name: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone: {name!r}")
+
+
+def format_ts(ts: float) -> str:
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M")
+
+
+def cmd_add(store: ScheduleStore, args) -> None:
+    if args.at:
+        zone = get_zone(args.tz) if args.tz else None
+        local = datetime.strptime(args.at, "%Y-%m-%d %H:%M")
+        due_at = (local.replace(tzinfo=zone) if zone else local).timestamp()
+    else:
+        due_at = time.time() + parse_duration(args.delay)
+
+    window = None
+    if args.window:
+        if not args.window_tz:
+            raise ValueError("--window needs --window-tz (the recipient's timezone)")
+        get_zone(args.window_tz)
+        window = (args.window_tz, *parse_window(args.window))
+
+    client = UniPileClient()
+    if not args.account_id:
+        accounts = client.list_accounts()
+        if not accounts:
+            console.print("[red]Error: No accounts connected[/red]")
+            return
+        args.account_id = accounts[0].id
+        console.print(f"Using account: {accounts[0].name}\n")
+
+    console.print(Panel(
+        args.message,
+        title="[cyan]Message Draft[/cyan]",
+        border_style="cyan"
+    ))
+
+    if not args.yes:
+        console.print(f"\n[yellow]⚠️  Schedule this message for {format_ts(due_at)}?[/yellow]")
+        response = input("Type 'yes' or 'send' to confirm: ").strip().lower()
+        if response not in ["yes", "send", "ok", "ano", "pošli"]:
+            console.print("[red]❌ Message not scheduled[/red]")
+            return
+
+    send_id, effective = store.add(
+        args.account_id, args.user_id, args.message, due_at,
+        campaign_id=args.campaign_id, window=window,
+    )
+    console.print(f"[green]✓ Scheduled #{send_id} for {format_ts(effective)}[/green]")
+    if effective > due_at + 1:
+        console.print("[dim]Moved to the next opening of the recipient's send window[/dim]")
+
+
+def cmd_list(store: ScheduleStore, args) -> None:
+    status = None if args.status == "all" else args.status
+    rows = store.list(status=status, limit=args.limit)
+    counts = store.counts()
+    if not rows:
+        console.print("[yellow]No scheduled messages.[/yellow]")
+        return
+
+    table = Table(title="Scheduled Messages", box=box.ROUNDED, show_header=True)
+    table.add_column("#", style="dim", justify="right")
+    table.add_column("Due", no_wrap=True)
+    table.add_column("Recipient", style="cyan", max_width=25)
+    table.add_column("Window", style="dim", no_wrap=True)
+    table.add_column("Status")
+    table.add_column("Message", max_width=40)
+
+    for row in rows:
+        color = STATUS_COLORS.get(row["status"], "white")
+        window = f"{row['window_start']}-{row['window_end']} {row['window_tz']}" if row["window_tz"] else "-"
+        text = row["text"].replace("\n", " ")
+        table.add_row(
+            str(row["id"]),
+            format_ts(row["due_at"]),
+            row["user_id"],
+            window,
+            f"[{color}]{row['status']}[/{color}]",
+            text[:60] + "..." if len(text) > 60 else text,
+        )
+    console.print(table)
+    console.print(f"\n[dim]{', '.join(f'{n} {s}' for s, n in sorted(counts.items()))}[/dim]")
+
+
+def cmd_cancel(store: ScheduleStore, args) -> None:
+    if store.cancel(args.id):
+        console.print(f"[green]✓ Cancelled #{args.id}[/green]")
+    else:
+        row = store.get(args.id)
+        state = f"already {row['status']}" if row else "not found"
+        console.print(f"[yellow]Cannot cancel #{args.id}: {state}[/yellow]")
+
+
+def cmd_window(store: ScheduleStore, args) -> None:
+    get_zone(args.tz)
+    start, end = parse_window(args.window)
+    store.set_window(args.user_id, args.tz, start, end)
+    console.print(f"[green]✓ Send window for {args.user_id}: {start}-{end} {args.tz}[/green]")
+
+
+def cmd_run(store: ScheduleStore, args) -> None:
+    setup_logging("schedule")
+    near_duplicates = NearDuplicateIndex()
+    ledger = SendLedger(chat_index=ChatIndex(), near_duplicates=near_duplicates)
+    scheduler = Scheduler(
+        UniPileClient(), store, ledger, workers=args.workers, rate_per_minute=args.rate,
+        near_duplicates=None if args.allow_similar else near_duplicates,
+    )
+
+    def on_event(event, row, detail):
+        if event == "sent":
+            console.print(f"[green]✓ #{row['id']} sent to {row['user_id']}[/green]")
+        elif event == "skipped":
+            console.print(f"[yellow]#{row['id']} already sent (ledger), skipped[/yellow]")
+        elif event == "deferred":
+            console.print(f"[dim]#{row['id']} outside send window, moved to {format_ts(detail)}[/dim]")
+        elif event == "retried":
+            console.print(f"[yellow]#{row['id']} will retry: {detail}[/yellow]")
+        elif event == "similar":
+            console.print(f"[magenta]#{row['id']} held back: {detail}[/magenta]")
+        else:
+            console.print(f"[red]✗ #{row['id']} failed: {detail}[/red]")
+
+    stop = threading.Event()
+    if not args.once:
+        console.print(
+            f"[dim]Dispatching scheduled messages ({args.workers} worker(s), "
+            f"{args.rate:g}/min). Ctrl+C to stop.[/dim]"
+        )
+    try:
+        scheduler.run(stop=stop, once=args.once, on_event=on_event)
+    except KeyboardInterrupt:
+        stop.set()
+        console.print("\n[dim]Stopping...[/dim]")
+    finally:
+        ledger.close()
+        near_duplicates.close()
+
+    stats = scheduler.stats
+    console.print(
+        f"\n[dim]{stats['sent']} sent, {stats['skipped']} skipped, {stats['similar']} held back as similar, "
+        f"{stats['retried']} to retry, {stats['failed']} failed[/dim]"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Schedule messages for later delivery",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python scripts/schedule.py add -u USER_ID -m "Hi" --at "2026-05-04 09:30" --tz Europe/Prague
+  python scripts/schedule.py add -u USER_ID -m "Hi" --in 2h --window 09:00-17:00 --window-tz Europe/Prague
+  python scripts/schedule.py list --status all
+  python scripts/schedule.py run --workers 2 --rate 6
+        """
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = subparsers.add_parser("add", help="Schedule a message")
+    add_parser.add_argument("--user-id", "-u", required=True, help="Recipient's provider user ID")
+    add_parser.add_argument("--message", "-m", required=True, help="Message text to send")
+    when = add_parser.add_mutually_exclusive_group(required=True)
+    when.add_argument("--at", help='Send time "YYYY-MM-DD HH:MM" (local time, or --tz)')
+    when.add_argument("--in", dest="delay", help="Send after a delay, e.g. 30m, 2h, 1d")
+    add_parser.add_argument("--tz", help="Timezone of --at (e.g. Europe/Prague)")
+    add_parser.add_argument("--window", help="Recipient send window, e.g. 09:00-17:00")
+    add_parser.add_argument("--window-tz", help="Recipient's timezone for --window")
+    add_parser.add_argument("--campaign-id", help="Campaign ID (part of the dedup key)")
+    add_parser.add_argument("--account-id", "-a", help="Account ID (uses first account if not provided)")
+    add_parser.add_argument("--yes", "-y", action="store_true", help="Skip confirmation")
+
+    list_parser = subparsers.add_parser("list", help="Show scheduled messages")
+    list_parser.add_argument(
+        "--status",
+        choices=["scheduled", "sending", "sent", "failed", "cancelled", "similar", "all"],
+        default="scheduled",
+        help="Filter by status (default: scheduled)",
+    )
+    list_parser.add_argument("--limit", "-l", type=int, default=50, help="Max entries (default: 50)")
+
+    cancel_parser = subparsers.add_parser("cancel", help="Cancel a scheduled message")
+    cancel_parser.add_argument("id", type=int, help="Schedule ID (from list)")
+
+    window_parser = subparsers.add_parser("window", help="Set a recipient's default send window")
+    window_parser.add_argument("--user-id", "-u", required=True, help="Recipient's provider user ID")
+    window_parser.add_argument("--window", required=True, help="Send window, e.g. 09:00-17:00")
+    window_parser.add_argument("--tz", required=True, help="Recipient's timezone")
+
+    run_parser = subparsers.add_parser("run", help="Dispatch due messages")
+    run_parser.add_argument("--workers", "-w", type=int, default=2, help="Parallel senders (default: 2)")
+    run_parser.add_argument(
+        "--rate",
+        type=float,
+        default=Config.SEND_RATE_PER_MINUTE,
+        help=f"Max sends per minute (default: {Config.SEND_RATE_PER_MINUTE:g})",
+    )
+    run_parser.add_argument("--once", action="store_true", help="Send what is due now and exit")
+    run_parser.add_argument(
+        "--allow-similar",
+        action="store_true",
+        help="Also send texts nearly identical to one the recipient already got",
+    )
+
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profile(args, "schedule", report=print_profile_summary)
+    store = ScheduleStore()
+
+    try:
+        if args.command == "add":
+            cmd_add(store, args)
+        elif args.command == "list":
+            cmd_list(store, args)
+        elif args.command == "cancel":
+            cmd_cancel(store, args)
+        elif args.command == "window":
+            cmd_window(store, args)
+        else:
+            cmd_run(store, args)
+
+    except (UniPileError, ValueError) as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(1)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
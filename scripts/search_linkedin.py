@@ -18,6 +18,9 @@ from rich.table import Table
 from rich import box
 
 from src.unipile_client import UniPileClient, UniPileError
+from src.search_cache import SearchCache
+from src.profiling import add_profile_arguments, start_profile
+from scripts.reports import print_profile_summary
 
 console = Console()
 
@@ -36,6 +39,9 @@ Examples:
 
   # Get more results
   python scripts/search_linkedin.py "John Doe" --limit 20
+
+  # Ignore cached results
+  python scripts/search_linkedin.py "John Doe" --refresh
         """
     )
     parser.add_argument(
@@ -58,8 +64,20 @@ Examples:
         default="classic",
         help="LinkedIn interface to use (default: classic)",
     )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached results and search again",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the search cache entirely (single live page)",
+    )
 
+    add_profile_arguments(parser)
     args = parser.parse_args()
+    start_profile(args, "search_linkedin", report=print_profile_summary)
 
     try:
         client = UniPileClient()
@@ -75,12 +93,29 @@ Examples:
 
         # Perform search
         console.print(f"[dim]Searching for: {args.keywords}...[/dim]\n")
-        results, cursor = client.search_linkedin(
-            account_id=args.account_id,
-            keywords=args.keywords,
-            api=args.api,
-            limit=args.limit,
-        )
+        if args.no_cache:
+            results, cursor = client.search_linkedin(
+                account_id=args.account_id,
+                keywords=args.keywords,
+                api=args.api,
+                limit=args.limit,
+            )
+            has_more = bool(cursor)
+        else:
+            cache = SearchCache()
+            try:
+                results, has_more, pages = cache.search(
+                    client,
+                    account_id=args.account_id,
+                    keywords=args.keywords,
+                    api=args.api,
+                    limit=args.limit,
+                    refresh=args.refresh,
+                )
+            finally:
+                cache.close()
+            if not pages:
+                console.print("[dim]Served from cache (use --refresh to search again)[/dim]\n")
 
         if not results:
             console.print(f"[yellow]No results found for '{args.keywords}'[/yellow]")
@@ -126,8 +161,8 @@ Examples:
         console.print(table)
         console.print(f"\n[dim]Total: {len(results)} result(s)[/dim]")
 
-        if cursor:
-            console.print(f"[dim]More results available (use cursor for pagination)[/dim]")
+        if has_more:
+            console.print(f"[dim]More results available (increase --limit to page further)[/dim]")
 
         # Show usage hint
         console.print("\n[cyan]💡 Tip:[/cyan] Use the User ID to send messages:")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Inspect and reconcile the local send ledger.
+
+Usage:
+    python scripts/send_ledger.py list [--status pending]
+    python scripts/send_ledger.py reconcile
+"""
+import sys
+import argparse
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+from src.unipile_client import UniPileClient, UniPileError
+from src.send_ledger import SendLedger
+from src.chat_index import ChatIndex
+from src.profiling import add_profile_arguments, start_profile
+from scripts.reports import print_profile_summary
+
+console = Console()
+
+STATUS_COLORS = {"sent": "green", "pending": "yellow", "failed": "red"}
+
+
+def print_records(records, title: str) -> None:
+    table = Table(title=title, box=box.ROUNDED, show_header=True)
+    table.add_column("Updated", style="dim", no_wrap=True)
+    table.add_column("Recipient", style="cyan", max_width=30)
+    table.add_column("Campaign", max_width=15)
+    table.add_column("Status")
+    table.add_column("Tries", justify="center")
+    table.add_column("Message ID", style="dim", max_width=20)
+
+    for rec in records:
+        color = STATUS_COLORS.get(rec.status, "white")
+        table.add_row(
+            rec.updated_at.strftime("%Y-%m-%d %H:%M") if rec.updated_at else "-",
+            rec.recipient,
+            rec.campaign_id or "-",
+            f"[{color}]{rec.status}[/{color}]",
+            str(rec.attempts),
+            rec.message_id or "-",
+        )
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and reconcile the send ledger")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="Show recent ledger entries")
+    list_parser.add_argument("--status", choices=["pending", "sent", "failed"], help="Filter by status")
+    list_parser.add_argument("--limit", "-l", type=int, default=50, help="Max entries (default: 50)")
+
+    subparsers.add_parser("reconcile", help="Check stale pending sends against list_messages")
+
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profile(args, "send_ledger", report=print_profile_summary)
+    ledger = SendLedger(chat_index=ChatIndex())
+
+    try:
+        if args.command == "list":
+            records = ledger.list(status=args.status, limit=args.limit)
+            if not records:
+                console.print("[yellow]Ledger is empty.[/yellow]")
+                return
+            print_records(records, "Send Ledger")
+        else:
+            records = ledger.reconcile_pending(UniPileClient())
+            if not records:
+                console.print("[green]No stale pending sends.[/green]")
+                return
+            print_records(records, "Reconciled")
+            sent = sum(1 for r in records if r.status == "sent")
+            console.print(
+                f"\n[dim]{sent} confirmed sent, {len(records) - sent} still pending "
+                f"(safe to retry)[/dim]"
+            )
+
+    except UniPileError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(1)
+    finally:
+        ledger.close()
+
+
+if __name__ == "__main__":
+    main()
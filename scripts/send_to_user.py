@@ -10,6 +10,7 @@ Usage:
 """
 import sys
 import argparse
+from datetime import datetime
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -18,6 +19,13 @@ from rich.console import Console
 from rich.panel import Panel
 
 from src.unipile_client import UniPileClient, UniPileError
+from src.send_ledger import SendLedger
+from src.chat_index import ChatIndex
+from src.near_duplicates import NearDuplicateIndex
+from src.relations_store import RelationsStore
+from src.routing import RoutingIndex
+from src.profiling import add_profile_arguments, start_profile
+from scripts.reports import print_profile_summary
 
 console = Console()
 
@@ -30,26 +38,82 @@ def main():
 Examples:
   python scripts/send_to_user.py --user-id ACoAABRD1jk... --message "Hello!"
   python scripts/send_to_user.py -u ACoAABRD1jk... -m "Hi" --yes
+  python scripts/send_to_user.py -u ACoAABRD1jk... -m "Hi" --campaign-id spring-2026
+  python scripts/send_to_user.py -u ACoAABRD1jk... -m "Hi" --yes --allow-similar
         """
     )
     parser.add_argument("--user-id", "-u", required=True, help="Recipient's provider user ID")
     parser.add_argument("--message", "-m", required=True, help="Message text to send")
-    parser.add_argument("--account-id", "-a", help="Account ID (uses first account if not provided)")
+    parser.add_argument("--account-id", "-a", help="Account ID (default: best routed seat, see scripts/route.py)")
     parser.add_argument("--yes", "-y", action="store_true", help="Skip confirmation")
+    parser.add_argument("--campaign-id", help="Campaign ID (part of the dedup key)")
+    parser.add_argument(
+        "--no-ledger",
+        action="store_true",
+        help="Send without the dedup ledger (allows sending the same text again)",
+    )
+    parser.add_argument(
+        "--allow-similar",
+        action="store_true",
+        help="With --yes, send even if the user already got a nearly identical message",
+    )
 
+    add_profile_arguments(parser)
     args = parser.parse_args()
+    start_profile(args, "send_to_user", report=print_profile_summary)
 
+    chat_index = near_duplicates = ledger = None
     try:
         client = UniPileClient()
 
-        # Get account ID
+        chat_index = ChatIndex()
+
+        # Get account ID: the seat routed to this user, else the first account
         if not args.account_id:
-            accounts = client.list_accounts()
+            accounts = client.list_accounts(usable_only=True)
             if not accounts:
                 console.print("[red]Error: No accounts connected[/red]")
                 return
-            args.account_id = accounts[0].id
-            console.print(f"Using account: {accounts[0].name}\n")
+            routing, relations = RoutingIndex(), RelationsStore()
+            try:
+                routing.refresh(relations, chat_index)
+                route = routing.route(args.user_id, accounts=[a.id for a in accounts])
+            finally:
+                relations.close()
+                routing.close()
+            account = next((a for a in accounts if route and a.id == route.account_id), accounts[0])
+            args.account_id = account.id
+            how = f" ({route.reason()})" if route else ""
+            console.print(f"Using account: {account.name}{how}\n")
+
+        near_duplicates = NearDuplicateIndex()
+        ledger = None if args.no_ledger else SendLedger(chat_index=chat_index, near_duplicates=near_duplicates)
+        if ledger:
+            previous = ledger.lookup(args.account_id, f"user:{args.user_id}", args.message, args.campaign_id)
+            if previous and previous.status == "sent":
+                console.print("[yellow]This message was already sent to this user — skipping.[/yellow]")
+                console.print(f"[dim]Chat ID: {previous.chat_id} | Message ID: {previous.message_id}[/dim]")
+                return
+
+        # Near-duplicates: of what this user got (any time), and of what was sent recently (anyone)
+        similar = near_duplicates.check(args.message, recipient=f"user:{args.user_id}", account_id=args.account_id)
+        to_user = [m for m in similar if m.scope == "recipient"]
+        recent = {m.recipient for m in similar if m.scope == "recent"}
+        if to_user:
+            best = to_user[0]
+            sent = datetime.fromtimestamp(best.sent_at).strftime("%Y-%m-%d %H:%M")
+            console.print(f"[yellow]⚠️  {best.similarity:.0%} similar to a message this user got on {sent}:[/yellow]")
+            console.print(f"[dim]   {best.excerpt}[/dim]")
+            if args.yes and not args.allow_similar:
+                console.print("[red]❌ Message not sent (use --allow-similar to send anyway)[/red]")
+                return
+        if recent:
+            console.print(
+                f"[dim]Nearly the same text went to {len(recent)} other recipient(s) "
+                f"in the last {near_duplicates.window / 86400:g} day(s)[/dim]"
+            )
+        if similar:
+            console.print()
 
         # Show message draft
         console.print(Panel(
@@ -68,11 +132,27 @@ Examples:
 
         # Send message
         console.print("\n[dim]Sending...[/dim]")
-        chat_id, message_id = client.send_to_user(
-            account_id=args.account_id,
-            user_id=args.user_id,
-            text=args.message
-        )
+        if ledger:
+            record = ledger.send_to_user(
+                client,
+                account_id=args.account_id,
+                user_id=args.user_id,
+                text=args.message,
+                campaign_id=args.campaign_id,
+            )
+            if record.duplicate:
+                state = "already sent" if record.status == "sent" else "being sent by another process"
+                console.print(f"[yellow]Not sent again: message {state}.[/yellow]")
+                return
+            chat_id, message_id = record.chat_id, record.message_id
+        else:
+            chat_id, message_id = chat_index.send_to_user(
+                client,
+                account_id=args.account_id,
+                user_id=args.user_id,
+                text=args.message
+            )
+            near_duplicates.add(args.message, args.account_id, f"user:{args.user_id}", message_id)
 
         console.print(f"[green]✓ Message sent![/green]")
         console.print(f"[dim]Chat ID: {chat_id}[/dim]")
@@ -81,6 +161,10 @@ Examples:
     except UniPileError as e:
         console.print(f"[bold red]Error:[/bold red] {e}")
         sys.exit(1)
+    finally:
+        for store in (ledger, near_duplicates, chat_index):
+            if store is not None:
+                store.close()
 
 
 if __name__ == "__main__":
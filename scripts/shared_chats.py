@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Find conversations shared by several of our seats.
+
+`detect` compares the chats of all seats (member sets, then the newest
+message's provider id) and picks one primary seat per shared
+conversation. Sweeps (scripts/sync_cluster.py plan) then read each shared
+conversation once, through its primary seat. `list` shows what is known.
+
+Usage:
+    python scripts/shared_chats.py detect [--days 30] [--prefer ACCOUNT_ID]
+    python scripts/shared_chats.py list
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+from src.unipile_client import UniPileClient, UniPileError
+from src.shared_chats import SharedChats
+from src.profiling import add_profile_arguments, start_profile
+from scripts.reports import print_profile_summary
+
+console = Console()
+
+
+def cmd_detect(shared: SharedChats, args) -> None:
+    client = UniPileClient()
+    accounts = client.list_accounts(usable_only=True)
+    if len(accounts) < 2:
+        console.print("[yellow]Shared chats need at least two connected accounts.[/yellow]")
+        return
+    missing = [a.name or a.id for a in accounts if not a.provider_user_id]
+    if missing:
+        console.print(f"[yellow]No provider user id for {', '.join(missing)}: their chats may not match[/yellow]")
+
+    since = time.time() - args.days * 86400 if args.days else None
+    with console.status(f"[cyan]Comparing chats of {len(accounts)} seat(s)...[/cyan]"):
+        stats = shared.detect(client, accounts, since=since, prefer=args.prefer or ())
+
+    console.print(
+        f"[green]✓ {stats['groups']} shared conversation(s), {stats['mirrors']} mirror chat(s)[/green] "
+        f"[dim]({stats['chats']} chats scanned, {stats['candidates']} candidate(s) checked)[/dim]"
+    )
+    if stats["mirrors"]:
+        console.print(f"[dim]Sweeps now skip {stats['mirrors']} chat(s) read through another seat[/dim]")
+
+
+def cmd_list(shared: SharedChats, args) -> None:
+    groups = shared.groups()
+    if not groups:
+        console.print("[yellow]No shared chats known. Run: python scripts/shared_chats.py detect[/yellow]")
+        return
+
+    table = Table(title="Shared Conversations", box=box.ROUNDED, show_header=True)
+    table.add_column("#", style="dim", width=3)
+    table.add_column("Chat", max_width=30)
+    table.add_column("Primary seat", style="green", no_wrap=True)
+    table.add_column("Primary chat ID", style="cyan", no_wrap=True)
+    table.add_column("Mirrors", justify="right")
+    table.add_column("Mirror seats", style="dim")
+    for i, group in enumerate(groups, 1):
+        primary, *mirrors = group["members"]
+        table.add_row(
+            str(i),
+            primary["name"] or "-",
+            primary["account_id"],
+            primary["chat_id"],
+            str(len(mirrors)),
+            ", ".join(m["account_id"] for m in mirrors),
+        )
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Find conversations shared by several seats",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python scripts/shared_chats.py detect --days 30
+  python scripts/shared_chats.py detect --prefer ACCOUNT_ID   # read shared chats through this seat
+  python scripts/shared_chats.py list
+        """
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    detect_parser = subparsers.add_parser("detect", help="Compare the chats of all seats")
+    detect_parser.add_argument(
+        "--days", "-d", type=int, default=30, help="Only chats active in the last N days (default: 30, 0 = all)"
+    )
+    detect_parser.add_argument(
+        "--prefer", "-p", action="append", help="Preferred primary seat for new groups (repeatable, in order)"
+    )
+
+    subparsers.add_parser("list", help="Show known shared conversations")
+
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profile(args, "shared_chats", report=print_profile_summary)
+    shared = SharedChats()
+
+    try:
+        if args.command == "detect":
+            cmd_detect(shared, args)
+        else:
+            cmd_list(shared, args)
+
+    except UniPileError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(1)
+    finally:
+        shared.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Reply-latency percentiles and SLA breaches per account.
+
+Reads the streaming metrics state (data/sla_metrics.db). Use --sync to
+feed new messages from the API first (each chat is read only back to
+what was already counted), or --apply-event to feed a UniPile webhook
+payload.
+
+Usage:
+    python scripts/sla_report.py
+    python scripts/sla_report.py --sync --days 30
+    python scripts/sla_report.py --apply-event event.json
+"""
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+from src.config import Config
+from src.unipile_client import UniPileClient, UniPileError
+from src.sla_metrics import SLAMetrics
+from src.profiling import add_profile_arguments, start_profile
+from scripts.reports import print_profile_summary
+
+console = Console()
+
+
+def format_duration(seconds: float | None) -> str:
+    """Human readable duration."""
+    if seconds is None:
+        return "-"
+    minutes = int(seconds / 60)
+    if minutes < 60:
+        return f"{minutes}m"
+    if minutes < 60 * 24:
+        return f"{minutes / 60:.1f}h"
+    return f"{minutes / (60 * 24):.1f}d"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reply-latency percentiles and SLA breaches")
+    parser.add_argument(
+        "--account-id", "-a",
+        help="Only show (and sync) this account",
+    )
+    parser.add_argument(
+        "--sync", "-s",
+        action="store_true",
+        help="Feed new messages from the API before reporting",
+    )
+    parser.add_argument(
+        "--days", "-d",
+        type=int,
+        default=30,
+        help="History to read for chats not seen before when syncing (default: 30)",
+    )
+    parser.add_argument(
+        "--apply-event",
+        metavar="FILE",
+        help="Apply a UniPile webhook payload (JSON file, '-' for stdin) and exit",
+    )
+    parser.add_argument(
+        "--sla-hours",
+        type=float,
+        default=Config.REPLY_SLA_HOURS,
+        help=f"Reply SLA in hours (default: {Config.REPLY_SLA_HOURS:g})",
+    )
+    parser.add_argument(
+        "--top", "-n",
+        type=int,
+        default=10,
+        help="Breaching chats to list (default: 10)",
+    )
+
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profile(args, "sla_report", report=print_profile_summary)
+    metrics = SLAMetrics(sla_seconds=args.sla_hours * 3600)
+
+    try:
+        if args.apply_event:
+            raw = sys.stdin.read() if args.apply_event == "-" else Path(args.apply_event).read_text()
+            if metrics.apply_webhook_event(json.loads(raw)):
+                console.print("[green]✓ Event applied[/green]")
+            else:
+                console.print("[yellow]Event ignored[/yellow]")
+            return
+
+        if args.sync:
+            client = UniPileClient()
+            account_ids = [args.account_id] if args.account_id else [acc.id for acc in client.list_accounts(usable_only=True)]
+            since = time.time() - args.days * 86400
+            for account_id in account_ids:
+                with console.status(f"[dim]Syncing {account_id}...[/dim]"):
+                    chats, applied = metrics.sync_account(client, account_id, since=since)
+                console.print(f"[dim]{account_id}: {applied} message(s) from {chats} chat(s)[/dim]")
+            console.print()
+
+        account_ids = [args.account_id] if args.account_id else metrics.accounts()
+        if not account_ids:
+            console.print("[yellow]No metrics yet. Run with --sync first.[/yellow]")
+            return
+
+        table = Table(
+            title=f"Time to Reply (SLA {args.sla_hours:g}h)",
+            box=box.ROUNDED,
+            show_header=True,
+        )
+        table.add_column("Account", style="cyan", no_wrap=True)
+        table.add_column("Replies", justify="right")
+        table.add_column("p50", justify="right")
+        table.add_column("p90", justify="right")
+        table.add_column("p99", justify="right")
+        table.add_column("Max", justify="right")
+        table.add_column("Late", justify="right", style="yellow")
+        table.add_column("Open", justify="right")
+        table.add_column("Unanswered", justify="right")
+        table.add_column("Breaching", justify="right", style="red")
+
+        rows = [(account_id, metrics.summary(account_id)) for account_id in account_ids]
+        if not args.account_id and len(rows) > 1:
+            rows.append(("All accounts", metrics.summary()))
+        for label, s in rows:
+            table.add_row(
+                label,
+                str(s["replies"]),
+                format_duration(s["p50"]),
+                format_duration(s["p90"]),
+                format_duration(s["p99"]),
+                format_duration(s["max"]),
+                str(s["late_replies"]),
+                str(s["open_chats"]),
+                str(s["open_inbound"]),
+                str(s["breaching"]),
+            )
+        console.print(table)
+        console.print(
+            "[dim]Late = replies slower than the SLA; Open = chats awaiting a reply; "
+            "Unanswered = inbound messages in them; Breaching = open longer than the SLA[/dim]"
+        )
+
+        breaching = metrics.breaching(args.top, account_id=args.account_id)
+        if not breaching:
+            console.print("\n[green]No chat is over the SLA.[/green]")
+            return
+
+        table = Table(title="Over SLA", box=box.ROUNDED, show_header=True)
+        table.add_column("#", style="dim", width=3)
+        table.add_column("Chat", max_width=30)
+        table.add_column("Account", style="dim", max_width=15)
+        table.add_column("Unanswered", justify="center")
+        table.add_column("Waiting", justify="right", style="red")
+        table.add_column("Chat ID", style="cyan", no_wrap=True)
+        now = time.time()
+        for i, row in enumerate(breaching, 1):
+            table.add_row(
+                str(i),
+                row["name"] or "-",
+                row["account_id"][:15],
+                str(row["open_inbound"]),
+                format_duration(now - row["pending_since"]),
+                row["chat_id"],
+            )
+        console.print()
+        console.print(table)
+
+    except UniPileError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(1)
+    finally:
+        metrics.close()
+
+
+if __name__ == "__main__":
+    main()
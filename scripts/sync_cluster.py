@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Sync recent messages of all seats with any number of workers.
+
+`plan` splits the sync into leased work units (account x page of chats);
+`worker` claims and processes units until the run is finished. Start as
+many workers as you like, as processes on one machine (--processes) or on
+several hosts sharing a Redis lease store (LEASE_BACKEND=redis). Units of
+a worker that dies are re-leased to the others once their lease expires.
+Conversations shared by several seats (scripts/shared_chats.py detect) are
+read once, through their primary seat (another planned seat when the
+primary is not planned), and written for every planned seat in them.
+
+Usage:
+    python scripts/sync_cluster.py plan --days 7
+    python scripts/sync_cluster.py worker --processes 4
+    python scripts/sync_cluster.py status
+    python scripts/sync_cluster.py runs
+"""
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+from src.config import Config
+from src.unipile_client import UniPileClient, UniPileError
+from src.work_leases import lease_store_from_config
+from src.sync_jobs import DEFAULT_OUTPUT_DIR, SyncWorker, plan_sync
+from src.shared_chats import SharedChats
+from src.alerts import AlertEngine
+from src.profiling import add_profile_arguments, start_profile
+from scripts.logger import setup_logging
+from scripts.reports import print_profile_summary
+
+console = Console()
+
+
+def latest_run(store) -> str:
+    runs = store.runs()
+    if not runs:
+        raise ValueError("No sync runs yet (start one with: python scripts/sync_cluster.py plan)")
+    return runs[0]["run_id"]
+
+
+def cmd_plan(store, args) -> None:
+    client = UniPileClient()
+    account_ids = args.account_id or [a.id for a in client.list_accounts(usable_only=True)]
+    if not account_ids:
+        console.print("[red]Error: No accounts connected[/red]")
+        return
+
+    run_id = args.run_id or f"sync-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    since = time.time() - args.days * 86400
+    skip, mirrors = set(), {}
+    if not args.all_seats:
+        shared = SharedChats()
+        try:
+            skip, mirrors = shared.reading_plan(account_ids)
+        finally:
+            shared.close()
+    with console.status(f"[cyan]Planning {len(account_ids)} account(s)...[/cyan]"):
+        added = plan_sync(
+            client, store, run_id, account_ids, since,
+            chats_per_unit=args.chats_per_unit, skip_chats=skip, mirrors=mirrors,
+        )
+
+    console.print(f"[green]✓ Run {run_id}: {added} unit(s) from {len(account_ids)} account(s)[/green]")
+    if skip:
+        console.print(
+            f"[dim]{len(skip)} shared chat(s) are read once, through one seat, and written for the others[/dim]"
+        )
+    console.print(f"[dim]Start workers with: python scripts/sync_cluster.py worker --run {run_id}[/dim]")
+
+
+def on_event(event, unit, detail) -> None:
+    if event == "done":
+        console.print(
+            f"[green]✓[/green] {unit.unit_id}: {detail['messages']} message(s) "
+            f"[dim]({detail['seconds']:.1f}s, {detail['worker']})[/dim]"
+        )
+    elif event == "lost":
+        console.print(f"[yellow]{unit.unit_id}: lease lost, left to the new holder[/yellow]")
+    else:
+        console.print(f"[red]✗ {unit.unit_id} (attempt {unit.attempt}): {detail}[/red]")
+
+
+def run_worker(run_id: str, args) -> dict:
+    """One worker (its own client, lease store connection and heartbeat thread)."""
+    setup_logging("sync_cluster", per_process=args.processes > 1)  # One log file per worker process
+    store = lease_store_from_config(args.backend)
+    worker = SyncWorker(
+        UniPileClient(), store, run_id,
+        output_dir=args.output_dir, lease_seconds=args.lease, page_size=args.page_size,
+        alerts=AlertEngine() if args.alerts else None,
+    )
+    try:
+        return worker.run(stop=threading.Event(), wait=args.wait, on_event=on_event)
+    except KeyboardInterrupt:
+        return worker.stats  # Unfinished unit is re-leased when its lease expires
+    finally:
+        store.close()
+
+
+def cmd_worker(store, args) -> None:
+    run_id = args.run or latest_run(store)
+    if args.alerts:
+        AlertEngine()  # Fail early on a missing/invalid rules file
+    console.print(f"[dim]Working on {run_id} with {args.processes} process(es). Ctrl+C to stop.[/dim]")
+    started = time.perf_counter()
+
+    if args.processes == 1:
+        results = [run_worker(run_id, args)]
+    else:
+        with ProcessPoolExecutor(max_workers=args.processes) as pool:
+            futures = [pool.submit(run_worker, run_id, args) for _ in range(args.processes)]
+            results = [f.result() for f in futures]
+
+    elapsed = time.perf_counter() - started
+    units = sum(r["units"] for r in results)
+    messages = sum(r["messages"] for r in results)
+    console.print(
+        f"\n[dim]{units} unit(s), {messages} message(s) in {elapsed:.1f}s "
+        f"({messages / max(elapsed, 1e-9):.0f} msg/s); "
+        f"{sum(r['lost'] for r in results)} lost, {sum(r['failed'] for r in results)} failed[/dim]"
+    )
+    if args.alerts:
+        console.print(f"[dim]{sum(r['alerts'] for r in results)} alert(s) logged to outputs/alerts.jsonl[/dim]")
+    console.print(f"[dim]Output: {Path(args.output_dir) / run_id}[/dim]")
+
+
+def cmd_status(store, args) -> None:
+    run_id = args.run or latest_run(store)
+    status = store.status(run_id)
+
+    table = Table(title=f"Sync run {run_id}", box=box.ROUNDED, show_header=True)
+    table.add_column("Units", justify="right")
+    table.add_column("Pending", justify="right")
+    table.add_column("Leased", justify="right", style="cyan")
+    table.add_column("Expired", justify="right", style="yellow")
+    table.add_column("Done", justify="right", style="green")
+    table.add_column("Failed", justify="right", style="red")
+    table.add_row(*(str(status[k]) for k in ("units", "pending", "leased", "expired", "done", "failed")))
+    console.print(table)
+
+    totals = status["totals"]
+    if totals:
+        console.print(
+            f"[dim]{int(totals.get('messages', 0))} message(s) from {int(totals.get('chats', 0))} chat(s), "
+            f"{totals.get('seconds', 0):.1f} worker-seconds[/dim]"
+        )
+    for worker, leased in sorted(status["workers"].items()):
+        console.print(f"[dim]  {worker}: {leased} unit(s) leased[/dim]")
+    for unit_id, error in status["errors"].items():
+        console.print(f"[red]  {unit_id}: {error}[/red]")
+
+
+def cmd_runs(store, args) -> None:
+    runs = store.runs()
+    if not runs:
+        console.print("[yellow]No sync runs yet.[/yellow]")
+        return
+    table = Table(title="Sync Runs", box=box.ROUNDED, show_header=True)
+    table.add_column("Run", style="cyan")
+    table.add_column("Created", no_wrap=True)
+    table.add_column("Units", justify="right")
+    table.add_column("Done", justify="right", style="green")
+    for run in runs:
+        table.add_row(
+            run["run_id"],
+            datetime.fromtimestamp(run["created_at"]).strftime("%Y-%m-%d %H:%M"),
+            str(run["units"]),
+            str(run["done"] or 0),
+        )
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Sync recent messages with leased work units",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python scripts/sync_cluster.py plan --days 7
+  python scripts/sync_cluster.py worker --processes 4
+  LEASE_BACKEND=redis python scripts/sync_cluster.py worker --run RUN_ID --wait   # on each host
+  python scripts/sync_cluster.py status
+        """
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["sqlite", "redis"],
+        default=Config.LEASE_BACKEND,
+        help=f"Lease store (default: {Config.LEASE_BACKEND})",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    plan_parser = subparsers.add_parser("plan", help="Split a sync into work units")
+    plan_parser.add_argument("--days", "-d", type=int, default=7, help="Sync messages from last N days (default: 7)")
+    plan_parser.add_argument(
+        "--account-id", "-a", action="append", help="Account to sync (repeatable; default: all accounts)"
+    )
+    plan_parser.add_argument("--chats-per-unit", type=int, default=50, help="Chats per work unit (default: 50)")
+    plan_parser.add_argument("--run-id", help="Run ID (default: sync-<timestamp>)")
+    plan_parser.add_argument(
+        "--all-seats", action="store_true", help="Also sync shared chats through every seat, not just the primary"
+    )
+
+    worker_parser = subparsers.add_parser("worker", help="Claim and process units")
+    worker_parser.add_argument("--run", help="Run ID (default: latest run)")
+    worker_parser.add_argument("--processes", "-p", type=int, default=1, help="Worker processes (default: 1)")
+    worker_parser.add_argument(
+        "--lease",
+        type=float,
+        default=Config.LEASE_SECONDS,
+        help=f"Lease length in seconds (default: {Config.LEASE_SECONDS:g})",
+    )
+    worker_parser.add_argument("--page-size", type=int, default=50, help="Messages per API page (default: 50)")
+    worker_parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=DEFAULT_OUTPUT_DIR,
+        help="Directory for <run>/<unit>.jsonl files (default: outputs/sync)",
+    )
+    worker_parser.add_argument(
+        "--wait", action="store_true", help="Keep polling for re-leased or new units instead of exiting"
+    )
+    worker_parser.add_argument(
+        "--alerts", action="store_true", help="Match synced messages against the alert rules (ALERT_RULES_PATH)"
+    )
+
+    status_parser = subparsers.add_parser("status", help="Show progress of a run")
+    status_parser.add_argument("--run", help="Run ID (default: latest run)")
+
+    subparsers.add_parser("runs", help="List sync runs")
+
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profile(args, "sync_cluster", report=print_profile_summary)
+
+    try:
+        store = lease_store_from_config(args.backend)
+    except (RuntimeError, ValueError) as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(1)
+
+    try:
+        if args.command == "plan":
+            cmd_plan(store, args)
+        elif args.command == "worker":
+            cmd_worker(store, args)
+        elif args.command == "status":
+            cmd_status(store, args)
+        else:
+            cmd_runs(store, args)
+
+    except (UniPileError, ValueError) as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        console.print("\n[dim]Stopped. Unfinished units are re-leased when their leases expire.[/dim]")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Show chats needing attention across all accounts.
+
+Reads the local triage index (data/triage.db). Use --sync to refresh it
+from the API first, or --apply-event to feed a UniPile webhook payload.
+
+Usage:
+    python scripts/triage.py [--top 20]
+    python scripts/triage.py --sync
+    python scripts/triage.py --apply-event event.json
+"""
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+from src.unipile_client import UniPileClient, UniPileError
+from src.triage import TriageIndex
+from src.profiling import add_profile_arguments, start_profile
+from scripts.reports import print_profile_summary
+
+console = Console()
+
+
+def format_waiting(since: float | None) -> str:
+    """Human readable time since the last inbound message."""
+    if not since:
+        return "-"
+    minutes = int((time.time() - since) / 60)
+    if minutes < 60:
+        return f"{minutes}m"
+    if minutes < 60 * 24:
+        return f"{minutes // 60}h"
+    return f"{minutes // (60 * 24)}d"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chats needing attention across all accounts")
+    parser.add_argument(
+        "--top", "-n",
+        type=int,
+        default=20,
+        help="Number of chats to show (default: 20)",
+    )
+    parser.add_argument(
+        "--account-id", "-a",
+        help="Only show (and sync) this account",
+    )
+    parser.add_argument(
+        "--sync", "-s",
+        action="store_true",
+        help="Refresh the index from the API before showing it",
+    )
+    parser.add_argument(
+        "--apply-event",
+        metavar="FILE",
+        help="Apply a UniPile webhook payload (JSON file, '-' for stdin) and exit",
+    )
+
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profile(args, "triage", report=print_profile_summary)
+    index = TriageIndex()
+
+    try:
+        if args.apply_event:
+            raw = sys.stdin.read() if args.apply_event == "-" else Path(args.apply_event).read_text()
+            if index.apply_webhook_event(json.loads(raw)):
+                console.print("[green]✓ Event applied[/green]")
+            else:
+                console.print("[yellow]Event ignored[/yellow]")
+            return
+
+        if args.sync:
+            client = UniPileClient()
+            account_ids = [args.account_id] if args.account_id else [acc.id for acc in client.list_accounts(usable_only=True)]
+            for account_id in account_ids:
+                with console.status(f"[dim]Syncing {account_id}...[/dim]"):
+                    seen, updated = index.sync_account(client, account_id)
+                console.print(f"[dim]{account_id}: {updated} updated / {seen} checked[/dim]")
+            console.print()
+
+        rows = index.top(args.top, account_id=args.account_id)
+        if not rows:
+            total, _ = index.count()
+            if not total:
+                console.print("[yellow]Triage index is empty. Run with --sync first.[/yellow]")
+            else:
+                console.print("[green]Nothing needs attention.[/green]")
+            return
+
+        table = Table(
+            title="Needs Attention",
+            box=box.ROUNDED,
+            show_header=True,
+        )
+        table.add_column("#", style="dim", width=3)
+        table.add_column("Chat", max_width=30)
+        table.add_column("Account", style="dim", max_width=15)
+        table.add_column("Unread", justify="center")
+        table.add_column("Waiting", justify="right")
+        table.add_column("Status")
+        table.add_column("Chat ID", style="cyan", no_wrap=True)
+
+        for i, row in enumerate(rows, 1):
+            status = "[yellow]awaiting reply[/yellow]" if row["awaiting_reply"] else "[dim]unread[/dim]"
+            unread = f"[red]{row['unread_count']}[/red]" if row["unread_count"] else "-"
+            table.add_row(
+                str(i),
+                row["name"] or "-",
+                row["account_id"][:15],
+                unread,
+                format_waiting(row["last_inbound_at"]) if row["awaiting_reply"] else "-",
+                status,
+                row["chat_id"],
+            )
+
+        console.print(table)
+        total, attention = index.count()
+        console.print(f"\n[dim]{attention} of {total} chat(s) need attention[/dim]")
+
+    except UniPileError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(1)
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,34 +4,43 @@ View full conversation thread with contact details.
 
 Usage:
     python scripts/view_thread.py --chat-id CHAT_ID [--account-id ACCOUNT_ID]
+    python scripts/view_thread.py -c CHAT_ID --jsonl --max-text 500 --dedup-quotes
+
+Runs as a pipeline: fetch (pages) -> model -> sender names -> render, so
+profile lookups and rendering overlap with fetching the next pages. The
+new senders of a page are looked up in one concurrent batch
+(get_user_profiles).
 """
 import sys
 import argparse
 from pathlib import Path
+from typing import Optional
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from rich.console import Console
 from rich.panel import Panel
+from rich.markup import escape
 
 from src.unipile_client import UniPileClient, UniPileError
 from src.config import Config
+from src.pipeline import Pipeline, add_pipeline_arguments
+from src.profiling import add_profile_arguments, start_profile
+from scripts.formatters import (
+    MESSAGE_FIELDS, DEFAULT_MESSAGE_FIELDS, TextCompactor, add_output_arguments,
+    make_projection, parse_fields, write_jsonl,
+)
+from scripts.reports import print_pipeline_stats, print_profile_summary
 
 console = Console()
 
 
-def get_sender_name(client: UniPileClient, sender_id: str, account_id: str) -> str:
-    """Try to get sender's full name from profile."""
-    try:
-        profile = client.get_user_profile(sender_id, account_id)
-        first = profile.get("first_name", "")
-        last = profile.get("last_name", "")
-        if first or last:
-            return f"{first} {last}".strip()
-    except Exception:
-        pass
-    return "Unknown"
+def profile_name(profile: Optional[dict]) -> str:
+    """Sender's full name from their profile."""
+    first = (profile or {}).get("first_name") or ""
+    last = (profile or {}).get("last_name") or ""
+    return f"{first} {last}".strip() or "Unknown"
 
 
 def main():
@@ -43,21 +52,60 @@ def main():
     )
     parser.add_argument(
         "--account-id", "-a",
-        help="UniPile account ID (if not provided, uses first account)",
+        help="UniPile account ID (default: the chat's account)",
     )
     parser.add_argument(
         "--show-profile", "-p",
         action="store_true",
         help="Show contact profile details",
     )
+    parser.add_argument(
+        "--limit", "-l",
+        type=int,
+        default=100,
+        help="Max messages to load (default: 100)",
+    )
+    add_output_arguments(parser, DEFAULT_MESSAGE_FIELDS, MESSAGE_FIELDS)
+    add_pipeline_arguments(parser)
 
+    add_profile_arguments(parser)
     args = parser.parse_args()
+    start_profile(args, "view_thread", report=print_profile_summary)
 
     try:
         Config.validate()
         client = UniPileClient()
 
-        # Get account ID if not provided
+        pages = client.iter_pages(f"/chats/{args.chat_id}/messages", max_items=args.limit)
+
+        if args.jsonl:
+            # Project raw items straight to JSONL as pages arrive (API order,
+            # newest first), no models or panels
+            project = make_projection(parse_fields(args.fields, DEFAULT_MESSAGE_FIELDS), MESSAGE_FIELDS)
+            compactor = TextCompactor(max_chars=args.max_text, dedup_quotes=args.dedup_quotes)
+            if not args.dedup_quotes:
+                pipeline = (
+                    Pipeline("view_thread", pages)
+                    .flat_map("project", lambda page: [compactor(project(item)) for item in page], phase="model")
+                    .sink("write", lambda record: write_jsonl([record], sys.stdout))
+                )
+                pipeline.run()
+            else:
+                # Quoted replies can only refer back to messages already
+                # emitted, so the thread is written oldest first once loaded
+                items = []
+                pipeline = Pipeline("view_thread", pages).sink("collect", items.extend)
+                pipeline.run()
+                items.sort(key=lambda item: item.get("timestamp") or "")
+                write_jsonl((compactor(project(item)) for item in items), sys.stdout)
+            if args.pipeline_stats:
+                print_pipeline_stats(pipeline)
+            return
+
+        # Get chat info (and the account it belongs to)
+        chat = client.get_chat(args.chat_id)
+        if not args.account_id:
+            args.account_id = chat.account_id
         if not args.account_id:
             accounts = client.list_accounts()
             if not accounts:
@@ -65,10 +113,6 @@ def main():
                 return
             args.account_id = accounts[0].id
 
-        # Get chat info
-        chat = client.get_chat(args.chat_id)
-        messages, _ = client.list_messages(args.chat_id, limit=100)
-
         # Header
         console.print(Panel.fit(
             f"[bold cyan]{chat.name or 'Conversation'}[/bold cyan]",
@@ -76,25 +120,24 @@ def main():
             padding=(1, 2),
         ))
 
-        console.print(f"[dim]Total messages: {len(messages)}[/dim]\n")
-
-        # Cache of sender names
-        sender_cache = {}
-
-        # Display thread from oldest to newest
-        for msg in messages:
-            # Determine who's speaking
-            if msg.is_sender:
-                speaker = "[bold cyan]You[/bold cyan]"
-            else:
-                # Try to get sender name
-                if msg.sender_id not in sender_cache:
-                    name = get_sender_name(client, msg.sender_id, args.account_id)
-                    sender_cache[msg.sender_id] = name
-                else:
-                    name = sender_cache[msg.sender_id]
-
-                speaker = f"[bold yellow]{name}[/bold yellow]"
+        # Sender profiles (None when the lookup failed)
+        profiles = {}
+        messages = []
+
+        def with_speakers(page):
+            # Look up the page's new senders at once, then label each message
+            new = [m.sender_id for m in page if not m.is_sender and m.sender_id and m.sender_id not in profiles]
+            for result in client.get_user_profiles(new, args.account_id):
+                profiles[result.key] = result.value
+            return [
+                (msg, "[bold cyan]You[/bold cyan]" if msg.is_sender
+                 else f"[bold yellow]{profile_name(profiles.get(msg.sender_id))}[/bold yellow]")
+                for msg in page
+            ]
+
+        def render(entry) -> None:
+            msg, speaker = entry
+            messages.append(msg)
 
             # Format time
             time_str = ""
@@ -108,15 +151,32 @@ def main():
             # Display
             console.print(f"{time_str}{speaker}:")
             console.print(f"  {text}")
+            for att in msg.attachments:
+                console.print(f"  [dim]📎 {escape(att.label)}[/dim]")
             console.print()
 
+        def to_messages(page):
+            return [client.parse_message(item, args.chat_id) for item in page]
+
+        # Display thread in API order while later pages are still loading
+        pipeline = (
+            Pipeline("view_thread", pages)
+            .map("model", to_messages, phase="model")
+            .flat_map("senders", with_speakers)
+            .sink("render", render)
+        )
+        pipeline.run()
+        console.print(f"[dim]Total messages: {len(messages)}[/dim]\n")
+
         # Show profile if requested
         if args.show_profile and messages:
-            # Get first non-self sender
+            # Get first non-self sender (profile already fetched for the thread)
             for msg in messages:
                 if not msg.is_sender:
                     try:
-                        profile = client.get_user_profile(msg.sender_id, args.account_id)
+                        profile = profiles.get(msg.sender_id) or client.get_user_profile(
+                            msg.sender_id, args.account_id
+                        )
                         console.print(Panel(
                             f"[cyan]{profile.get('first_name')} {profile.get('last_name')}[/cyan]\n"
                             f"[yellow]{profile.get('headline', 'N/A')}[/yellow]\n"
@@ -131,7 +191,10 @@ def main():
                         pass
                     break
 
-    except UniPileError as e:
+        if args.pipeline_stats:
+            print_pipeline_stats(pipeline)
+
+    except (UniPileError, ValueError) as e:
         console.print(f"[bold red]Error:[/bold red] {e}")
         sys.exit(1)
 
@@ -0,0 +1,257 @@
+"""
+Account health registry: stop sending work to broken seats.
+
+A seat is marked down when:
+- list_accounts/get_account report an unhealthy connection status
+  (CREDENTIALS_REQUIRED, ERROR, STOPPED, ...), or
+- too many of its recent requests fail (timeouts, connection errors,
+  401/403, 5xx) - at least ACCOUNT_FAILURE_MIN_CALLS of the last
+  WINDOW requests, with a failure share of ACCOUNT_FAILURE_RATE or more
+
+UniPileClient consults the registry before every account-scoped request
+(account_id in the query or body, or a chat the client has seen listed
+for the account) and raises AccountUnavailable without touching the
+network while the seat is down.
+
+Down seats are re-probed in a background thread with one
+GET /accounts/{id}: a status-based verdict once it is older than
+ACCOUNT_STATUS_TTL_SECONDS, an error-based one after
+ACCOUNT_PROBE_SECONDS, backing off (doubling, up to MAX_PROBE_INTERVAL)
+while the seat stays down. A probe reporting a healthy status brings the
+seat back.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from src.config import Config
+
+log = logging.getLogger("unipile.health")
+
+# Connection statuses of a seat that cannot do any work until reconnected
+UNHEALTHY_STATUSES = {
+    "CREDENTIALS", "CREDENTIALS_REQUIRED", "ERROR", "STOPPED", "DISCONNECTED", "DELETED", "PERMISSIONS",
+}
+
+# Response codes that count against a seat (0: timeout/connection error);
+# others, like a 404 for one chat, say nothing about the seat
+FAILURE_CODES = {0, 401, 403}
+
+WINDOW = 20  # Recent requests per seat considered for the failure rate
+MAX_PROBE_INTERVAL = 600.0
+CHAT_MAP_SIZE = 100_000  # Chat -> account attributions kept (LRU)
+
+
+@dataclass
+class SeatHealth:
+    account_id: str
+    status: Optional[str] = None
+    status_at: float = 0.0
+    outcomes: deque = field(default_factory=lambda: deque(maxlen=WINDOW))
+    down_since: Optional[float] = None
+    reason: Optional[str] = None
+    next_probe_at: float = 0.0
+    probe_interval: float = 0.0
+    probes: int = 0
+
+    @property
+    def down(self) -> bool:
+        return self.down_since is not None
+
+
+class AccountHealth:
+    """Per-seat health from connection statuses and request outcomes (thread-safe)."""
+
+    def __init__(
+        self,
+        status_ttl: float = Config.ACCOUNT_STATUS_TTL_SECONDS,
+        failure_rate: float = Config.ACCOUNT_FAILURE_RATE,
+        min_calls: int = Config.ACCOUNT_FAILURE_MIN_CALLS,
+        probe_interval: float = Config.ACCOUNT_PROBE_SECONDS,
+        background: bool = True,
+    ):
+        """
+        Args:
+            status_ttl: Seconds a fetched connection status counts as current
+            failure_rate: Failure share of recent requests that marks a seat down
+            min_calls: Failures needed before the rate applies
+            probe_interval: First re-probe delay of a seat marked down by errors
+            background: Re-probe down seats in a daemon thread (else call probe_due())
+        """
+        self.status_ttl = status_ttl
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.probe_interval = probe_interval
+        self.background = background
+        self.prober: Optional[Callable[[str], Any]] = None
+        self._seats: Dict[str, SeatHealth] = {}
+        self._chats: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls) -> Optional["AccountHealth"]:
+        """Registry unless ACCOUNT_HEALTH is off."""
+        if Config.ACCOUNT_HEALTH.lower() in ("off", "0", "false", "no"):
+            return None
+        return cls()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    # ==================== ATTRIBUTION ====================
+
+    def remember_chat(self, chat_id: str, account_id: str) -> None:
+        """Attribute later /chats/{chat_id}/... requests to a seat."""
+        if not chat_id or not account_id:
+            return
+        with self._lock:
+            self._chats[chat_id] = account_id
+            self._chats.move_to_end(chat_id)
+            if len(self._chats) > CHAT_MAP_SIZE:
+                self._chats.popitem(last=False)
+
+    def account_for(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        json: Optional[Dict[str, Any]] = None,
+    ) -> Optional[str]:
+        """Seat a request works for, None if unknown (e.g. /accounts itself)."""
+        for payload in (params, json):
+            if payload and payload.get("account_id"):
+                return payload["account_id"]
+        if endpoint.startswith("/chats/"):
+            with self._lock:
+                return self._chats.get(endpoint.split("/", 3)[2])
+        return None
+
+    # ==================== VERDICTS ====================
+
+    def blocked(self, account_id: str) -> Optional[SeatHealth]:
+        """The seat's state if it is down, else None."""
+        seat = self._seats.get(account_id)
+        return seat if seat is not None and seat.down else None
+
+    def is_healthy(self, account_id: str) -> bool:
+        return self.blocked(account_id) is None
+
+    def snapshot(self) -> List[SeatHealth]:
+        """Known seats, down ones first."""
+        with self._lock:
+            seats = list(self._seats.values())
+        return sorted(seats, key=lambda s: (not s.down, s.account_id))
+
+    # ==================== OBSERVATIONS ====================
+
+    def observe_status(self, account_id: str, status: Optional[str], now: Optional[float] = None) -> None:
+        """Record a connection status from list_accounts/get_account."""
+        now = time.time() if now is None else now
+        status = (status or "OK").upper()
+        with self._lock:
+            seat = self._seat(account_id)
+            seat.status, seat.status_at = status, now
+            if status in UNHEALTHY_STATUSES:
+                if not seat.down or seat.reason != f"status {status}":
+                    self._mark_down(seat, f"status {status}", now, first_probe=self.status_ttl)
+            elif seat.down:
+                self._mark_up(seat)
+
+    def record(self, account_id: str, status_code: int, now: Optional[float] = None) -> None:
+        """Record the outcome of a request for a seat (status_code 0: no response)."""
+        failed = status_code in FAILURE_CODES or status_code >= 500
+        with self._lock:
+            seat = self._seat(account_id)
+            seat.outcomes.append(failed)
+            if seat.down or not failed:
+                return
+            failures = sum(seat.outcomes)
+            if failures >= self.min_calls and failures / len(seat.outcomes) >= self.failure_rate:
+                now = time.time() if now is None else now
+                reason = f"{failures} of the last {len(seat.outcomes)} requests failed"
+                self._mark_down(seat, reason, now, first_probe=self.probe_interval)
+
+    # ==================== PROBING ====================
+
+    def probe(self, account_id: str, now: Optional[float] = None) -> bool:
+        """
+        Re-check a seat with the prober (a GET /accounts/{id} that reports its status).
+
+        Returns:
+            True if the seat is up afterwards
+        """
+        now = time.time() if now is None else now
+        error = None
+        if self.prober is not None:
+            try:
+                self.prober(account_id)  # Reports the status through observe_status (healthy: seat up)
+            except Exception as e:
+                error = str(e)
+        with self._lock:
+            seat = self._seat(account_id)
+            seat.probes += 1
+            if not seat.down:
+                return True
+            seat.probe_interval = min(max(seat.probe_interval * 2, self.probe_interval), MAX_PROBE_INTERVAL)
+            seat.next_probe_at = now + seat.probe_interval
+            log.info(
+                "Account still down",
+                extra={"account_id": account_id, "reason": seat.reason, "error": error,
+                       "next_probe_in": seat.probe_interval},
+            )
+            return False
+
+    def probe_due(self, now: Optional[float] = None) -> int:
+        """Probe every down seat whose probe is due. Returns the number probed."""
+        now = time.time() if now is None else now
+        with self._lock:
+            due = [s.account_id for s in self._seats.values() if s.down and s.next_probe_at <= now]
+        for account_id in due:
+            self.probe(account_id, now)
+        return len(due)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            self.probe_due()
+            with self._lock:
+                pending = [s.next_probe_at for s in self._seats.values() if s.down]
+            timeout = max(min(pending) - time.time(), 0.05) if pending else None
+            self._wake.wait(timeout)
+
+    # ==================== INTERNAL ====================
+
+    def _seat(self, account_id: str) -> SeatHealth:
+        seat = self._seats.get(account_id)
+        if seat is None:
+            seat = self._seats[account_id] = SeatHealth(account_id)
+        return seat
+
+    def _mark_down(self, seat: SeatHealth, reason: str, now: float, first_probe: float) -> None:
+        """Called with the lock held."""
+        seat.down_since = seat.down_since or now
+        seat.reason = reason
+        seat.probe_interval = first_probe
+        seat.next_probe_at = now + first_probe
+        seat.outcomes.clear()
+        log.warning("Account marked down", extra={"account_id": seat.account_id, "reason": reason})
+        if self.background and self.prober is not None and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._run, name="account-health", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def _mark_up(self, seat: SeatHealth) -> None:
+        """Called with the lock held."""
+        log.info(
+            "Account back up",
+            extra={"account_id": seat.account_id, "down_seconds": round(time.time() - seat.down_since, 1)},
+        )
+        seat.down_since = seat.reason = None
+        seat.probe_interval = 0.0
+        seat.outcomes.clear()
@@ -0,0 +1,348 @@
+"""
+Keyword and regex alerts on incoming messages.
+
+Rules come from a JSON file (ALERT_RULES_PATH, see alert_rules.example.json):
+
+    {"rules": [
+        {"id": "competitors", "keywords": ["acme", "globex"]},
+        {"id": "pricing", "keywords": ["pricing", "quote"], "regex": ["\\$\\s?\\d+"]},
+        {"id": "watchlist", "keywords_file": "watchlist.txt", "whole_words": false}
+    ]}
+
+All keywords of all rules are compiled into one Aho-Corasick automaton,
+so a message text is scanned once, in time linear in its length,
+whatever the number of watched terms (pyahocorasick is used when
+installed, else a pure Python automaton). Regexes of a rule are joined
+into one pattern. Matching is case-insensitive and treats any run of
+whitespace as one space; rules are inbound-only and match whole words
+unless configured otherwise.
+
+AlertEngine re-reads the rules file (and keyword files) when they change,
+checking at most every reload_interval seconds, and swaps in the newly
+compiled rule set; an invalid file keeps the previous rules.
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from src.config import Config
+from src.models import Message
+
+try:
+    import ahocorasick
+except ImportError:  # Optional: pure Python automaton below
+    ahocorasick = None
+
+log = logging.getLogger("unipile.alerts")
+
+DEFAULT_ALERT_LOG = Config.OUTPUTS_DIR / "alerts.jsonl"
+
+
+# ==================== AUTOMATON ====================
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a fixed set of terms.
+
+    iter(text) yields (end_index, value) for every occurrence of every term,
+    like pyahocorasick's Automaton.iter.
+    """
+
+    def __init__(self, terms: Dict[str, Any]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Any]] = [[]]
+
+        for term, value in terms.items():
+            state = 0
+            for char in term:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(value)
+
+        # Breadth first: a state's failure link is the longest proper suffix in the trie
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def iter(self, text: str) -> Iterator[Tuple[int, Any]]:
+        goto, fail, out = self._goto, self._fail, self._out
+        root = goto[0]
+        state = 0
+        for i, char in enumerate(text):
+            while True:
+                nxt = goto[state].get(char)
+                if nxt is not None:
+                    state = nxt
+                    break
+                if not state:
+                    state = root.get(char, 0)
+                    break
+                state = fail[state]
+            if out[state]:
+                for value in out[state]:
+                    yield i, value
+
+
+def build_automaton(terms: Dict[str, Any]):
+    """Automaton over terms (pyahocorasick if installed)."""
+    if ahocorasick is None:
+        return KeywordAutomaton(terms)
+    automaton = ahocorasick.Automaton()
+    for term, value in terms.items():
+        automaton.add_word(term, value)
+    if terms:
+        automaton.make_automaton()
+    return automaton
+
+
+# ==================== RULES ====================
+
+@dataclass
+class Rule:
+    """One alert rule: any keyword or regex match raises it."""
+
+    id: str
+    keywords: List[str] = field(default_factory=list)
+    regex: List[str] = field(default_factory=list)
+    inbound_only: bool = True
+    whole_words: bool = True
+
+
+class Alert(NamedTuple):
+    rule_id: str
+    terms: Tuple[str, ...]  # Matched keywords / regex matches
+    message: Message
+    account_id: Optional[str] = None
+
+
+def load_rules(path: Path) -> List[Rule]:
+    """
+    Read a rules file. keywords_file entries are read relative to it.
+
+    Raises:
+        ValueError: If the file is not a valid rules file
+        OSError: If it (or a keywords file) cannot be read
+    """
+    path = Path(path)
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"{path}: invalid JSON ({e})") from e
+    entries = data.get("rules") if isinstance(data, dict) else None
+    if not isinstance(entries, list):
+        raise ValueError(f"{path}: expected {{\"rules\": [...]}}")
+
+    rules = []
+    seen = set()
+    for entry in entries:
+        rule_id = entry.get("id") if isinstance(entry, dict) else None
+        if not rule_id or rule_id in seen:
+            raise ValueError(f"{path}: every rule needs a unique id ({entry!r})")
+        seen.add(rule_id)
+        keywords = list(entry.get("keywords") or [])
+        if entry.get("keywords_file"):
+            keywords_path = path.parent / entry["keywords_file"]
+            keywords += [
+                line.strip() for line in keywords_path.read_text(encoding="utf-8").splitlines()
+                if line.strip() and not line.lstrip().startswith("#")
+            ]
+        regex = list(entry.get("regex") or [])
+        for pattern in regex:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"{path}: rule {rule_id}: invalid regex {pattern!r} ({e})") from e
+        rules.append(Rule(
+            id=rule_id,
+            keywords=keywords,
+            regex=regex,
+            inbound_only=entry.get("inbound_only", True),
+            whole_words=entry.get("whole_words", True),
+        ))
+    return rules
+
+
+def rule_files(path: Path) -> List[Path]:
+    """The rules file and the keyword files it references (for change detection)."""
+    path = Path(path)
+    files = [path]
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        files += [path.parent / r["keywords_file"] for r in data.get("rules", []) if r.get("keywords_file")]
+    except (OSError, ValueError, AttributeError, TypeError):
+        pass
+    return files
+
+
+class RuleSet:
+    """Compiled rules: one keyword automaton plus one regex per rule."""
+
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules = {rule.id: rule for rule in rules}
+        terms: Dict[str, list] = {}
+        for rule in self.rules.values():
+            for keyword in rule.keywords:
+                term = " ".join(keyword.casefold().split())
+                if term:
+                    terms.setdefault(term, []).append((rule.id, rule.whole_words, rule.inbound_only))
+        self.term_count = len(terms)
+        self.automaton = build_automaton({term: (term, owners) for term, owners in terms.items()})
+        self.regexes = [
+            (rule.id, rule.inbound_only, re.compile("|".join(f"(?:{p})" for p in rule.regex), re.IGNORECASE))
+            for rule in self.rules.values() if rule.regex
+        ]
+        self.outbound = any(not rule.inbound_only for rule in self.rules.values())
+
+    def match(self, text: Optional[str], is_sender: bool = False) -> Dict[str, List[str]]:
+        """Rules matching a text: {rule_id: matched terms, in order of appearance}."""
+        if not text or (is_sender and not self.outbound):
+            return {}
+        hits: Dict[str, List[str]] = {}
+        folded = " ".join(text.casefold().split())  # Runs of whitespace/newlines match one space
+        if self.term_count:
+            last = len(folded) - 1
+            for end, (term, owners) in self.automaton.iter(folded):
+                start = end - len(term) + 1
+                bounded = (start == 0 or not folded[start - 1].isalnum()) and (
+                    end == last or not folded[end + 1].isalnum()
+                )
+                for rule_id, whole_words, inbound_only in owners:
+                    if (bounded or not whole_words) and not (is_sender and inbound_only):
+                        found = hits.setdefault(rule_id, [])
+                        if term not in found:
+                            found.append(term)
+        for rule_id, inbound_only, pattern in self.regexes:
+            if is_sender and inbound_only:
+                continue
+            for m in pattern.finditer(text):
+                found = hits.setdefault(rule_id, [])
+                if m.group(0) not in found:
+                    found.append(m.group(0))
+        return hits
+
+
+# ==================== ENGINE ====================
+
+class AlertEngine:
+    """Matches messages against the rules file, reloading it when it changes (thread-safe)."""
+
+    def __init__(
+        self,
+        path: Path = Config.ALERT_RULES_PATH,
+        reload_interval: float = Config.ALERT_RELOAD_SECONDS,
+    ):
+        self.path = Path(path)
+        self.reload_interval = reload_interval
+        self.stats: Counter = Counter()
+        self._lock = threading.Lock()
+        self._signature = None
+        self._checked_at = 0.0
+        self.last_error: Optional[str] = None
+        self.ruleset = RuleSet([])
+        if not self.path.exists():
+            raise ValueError(f"No alert rules at {self.path} (start from alert_rules.example.json)")
+        if not self.reload(force=True):
+            raise ValueError(f"Cannot load alert rules: {self.last_error}")
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Recompile the rules if their files changed.
+
+        Returns:
+            False if the files changed but could not be loaded (old rules kept)
+        """
+        with self._lock:
+            self._checked_at = time.monotonic()
+            signature = self._file_signature()
+            if not force and signature == self._signature:
+                return True
+            try:
+                ruleset = RuleSet(load_rules(self.path))
+            except (OSError, ValueError) as e:
+                self._signature = signature  # Don't retry until the files change again
+                self.last_error = str(e)
+                self.stats["reload_errors"] += 1
+                log.error("Alert rules not loaded", extra={"path": str(self.path), "error": str(e)})
+                return False
+            self.ruleset = ruleset
+            self._signature = signature
+            self.last_error = None
+            self.stats["reloads"] += 1
+            log.info("Alert rules loaded", extra={"rules": len(ruleset.rules), "terms": ruleset.term_count})
+            return True
+
+    def match(self, message: Message, account_id: Optional[str] = None) -> List[Alert]:
+        """Alerts raised by one message (one per matching rule)."""
+        if time.monotonic() - self._checked_at >= self.reload_interval:
+            self.reload()
+        hits = self.ruleset.match(message.text, message.is_sender)
+        self.stats["messages"] += 1
+        self.stats["chars"] += len(message.text or "")
+        self.stats["alerts"] += len(hits)
+        return [Alert(rule_id, tuple(terms), message, account_id) for rule_id, terms in hits.items()]
+
+    def _file_signature(self) -> tuple:
+        signature = []
+        for path in rule_files(self.path):
+            try:
+                st = path.stat()
+                signature.append((str(path), st.st_mtime_ns, st.st_size))
+            except OSError:
+                signature.append((str(path), None, None))
+        return tuple(signature)
+
+
+class AlertLog:
+    """Append-only JSONL log of alerts (outputs/alerts.jsonl, thread-safe)."""
+
+    def __init__(self, path: Path = DEFAULT_ALERT_LOG):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def append(self, alerts: Iterable[Alert]) -> int:
+        lines = [json.dumps(alert_record(alert), ensure_ascii=False) + "\n" for alert in alerts]
+        if lines:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(lines))
+        return len(lines)
+
+
+def alert_record(alert: Alert) -> Dict[str, Any]:
+    message = alert.message
+    return {
+        "alerted_at": time.time(),
+        "rule": alert.rule_id,
+        "terms": list(alert.terms),
+        "account_id": alert.account_id,
+        "chat_id": message.chat_id,
+        "message_id": message.id,
+        "sender_id": message.sender_id,
+        "sender_name": message.sender_name,
+        "timestamp": message.timestamp.isoformat() if message.timestamp else None,
+        "text": message.text,
+    }
@@ -0,0 +1,437 @@
+"""
+Compressed, memory-mapped message archive.
+
+An archive is a directory of immutable, append-only segment files.
+Each segment holds Message records in a compact columnar layout:
+
+    MAGIC
+    block 0 .. block N-1      compressed (zstd, zlib fallback)
+    footer                    JSON: dictionaries + sparse block index
+    footer length (u64) + MAGIC
+
+- Messages are sorted by (chat, timestamp) and cut into blocks that each
+  belong to one chat, so "chat X between dates" reads only matching blocks
+- Chat ids, sender ids and sender names are dictionary-encoded in the footer
+- The footer keeps min/max timestamp per block (sparse time index)
+- Segments are memory-mapped; only the selected blocks are decompressed
+"""
+import json
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from src.config import Config
+from src.models import Message
+
+try:
+    import zstandard
+except ImportError:  # Optional: falls back to zlib
+    zstandard = None
+
+DEFAULT_ROOT = Config.DATA_DIR / "archive"
+
+MAGIC = b"UMSGSEG1"
+FORMAT_VERSION = 2  # 2: provider message ids column (version 1 segments read without it)
+BLOCK_SIZE = 1024  # Max messages per block
+NO_TS = -(2 ** 63)  # Sentinel for messages without timestamp
+TRAILER = struct.Struct("<Q8s")
+
+
+# ==================== CODECS ====================
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=6).compress(data)
+    return zlib.compress(data, 6)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Segment is zstd-compressed; install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def default_codec() -> str:
+    return "zstd" if zstandard is not None else "zlib"
+
+
+# ==================== COLUMN HELPERS ====================
+
+def _wrap64(value: int) -> int:
+    """Wrap to signed 64-bit (deltas next to the NO_TS sentinel overflow otherwise)."""
+    return ((value + 2 ** 63) % 2 ** 64) - 2 ** 63
+
+
+def _to_ms(ts: Optional[datetime]) -> int:
+    return int(ts.timestamp() * 1000) if ts else NO_TS
+
+
+def _from_ms(ms: int) -> Optional[datetime]:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc) if ms != NO_TS else None
+
+
+def _pack_strings(values: List[str]) -> bytes:
+    """Length-prefixed string column: u32 lengths followed by UTF-8 data."""
+    encoded = [v.encode("utf-8") for v in values]
+    lengths = array("I", (len(e) for e in encoded))
+    return lengths.tobytes() + b"".join(encoded)
+
+
+def _unpack_strings(buf: memoryview, count: int) -> tuple[List[str], int]:
+    """Inverse of _pack_strings. Returns (values, bytes consumed)."""
+    lengths = array("I")
+    lengths.frombytes(buf[:4 * count])
+    pos = 4 * count
+    values = []
+    for n in lengths:
+        values.append(bytes(buf[pos:pos + n]).decode("utf-8"))
+        pos += n
+    return values, pos
+
+
+class _Dictionary:
+    """Value -> index dictionary encoder (index 0 is reserved for None)."""
+
+    def __init__(self):
+        self.values: List[Optional[str]] = [None]
+        self._index: Dict[Optional[str], int] = {None: 0}
+
+    def encode(self, value: Optional[str]) -> int:
+        idx = self._index.get(value)
+        if idx is None:
+            idx = len(self.values)
+            self.values.append(value)
+            self._index[value] = idx
+        return idx
+
+
+# ==================== WRITE ====================
+
+def write_segment(path: Path, messages: Iterable[Message], codec: Optional[str] = None) -> int:
+    """
+    Write messages into a new segment file.
+
+    Args:
+        path: Segment file to create
+        messages: Messages (any order)
+        codec: "zstd" or "zlib" (default: zstd if installed)
+
+    Returns:
+        Number of messages written
+    """
+    codec = codec or default_codec()
+    rows = sorted(
+        messages,
+        key=lambda m: (m.chat_id or "", _to_ms(m.timestamp)),
+    )
+
+    chats = _Dictionary()
+    senders = _Dictionary()
+    names = _Dictionary()
+    blocks = []
+
+    tmp_path = Path(f"{path}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        offset = len(MAGIC)
+
+        start = 0
+        while start < len(rows):
+            chat_id = rows[start].chat_id or ""
+            end = start
+            while end < len(rows) and end - start < BLOCK_SIZE and (rows[end].chat_id or "") == chat_id:
+                end += 1
+            block_rows = rows[start:end]
+
+            data = _encode_block(block_rows, senders, names)
+            compressed = _compress(data, codec)
+            f.write(compressed)
+
+            stamps = [_to_ms(m.timestamp) for m in block_rows]
+            blocks.append({
+                "offset": offset,
+                "length": len(compressed),
+                "count": len(block_rows),
+                "chat": chats.encode(chat_id),
+                "min_ts": min(stamps),
+                "max_ts": max(stamps),
+            })
+            offset += len(compressed)
+            start = end
+
+        footer = json.dumps({
+            "version": FORMAT_VERSION,
+            "codec": codec,
+            "count": len(rows),
+            "chats": chats.values,
+            "senders": senders.values,
+            "sender_names": names.values,
+            "blocks": blocks,
+        }, separators=(",", ":")).encode("utf-8")
+        f.write(footer)
+        f.write(TRAILER.pack(len(footer), MAGIC))
+
+    os.replace(tmp_path, path)
+    return len(rows)
+
+
+def _encode_block(rows: List[Message], senders: _Dictionary, names: _Dictionary) -> bytes:
+    """Columnar block: ts deltas | sender idx | name idx | is_sender | ids | texts | attachments | provider ids."""
+    stamps = [_to_ms(m.timestamp) for m in rows]
+    deltas = array("q", [stamps[0]] + [_wrap64(b - a) for a, b in zip(stamps, stamps[1:])])
+    sender_idx = array("I", (senders.encode(m.sender_id) for m in rows))
+    name_idx = array("I", (names.encode(m.sender_name) for m in rows))
+    flags = bytes(1 if m.is_sender else 0 for m in rows)
+    attachments = [
+        json.dumps([a.model_dump(exclude_none=True) for a in m.attachments], separators=(",", ":"))
+        if m.attachments else ""
+        for m in rows
+    ]
+    return b"".join([
+        struct.pack("<I", len(rows)),
+        deltas.tobytes(),
+        sender_idx.tobytes(),
+        name_idx.tobytes(),
+        flags,
+        _pack_strings([m.id for m in rows]),
+        _pack_strings([m.text or "" for m in rows]),
+        _pack_strings(attachments),
+        _pack_strings([m.provider_id or "" for m in rows]),
+    ])
+
+
+# ==================== READ ====================
+
+class Segment:
+    """Read-only, memory-mapped segment."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        footer_len, magic = TRAILER.unpack_from(self._mm, len(self._mm) - TRAILER.size)
+        if magic != MAGIC or self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a message segment: {self.path}")
+        footer_start = len(self._mm) - TRAILER.size - footer_len
+        self.footer = json.loads(self._mm[footer_start:footer_start + footer_len])
+
+        self.version = self.footer.get("version", 1)
+        self.codec = self.footer["codec"]
+        self.count = self.footer["count"]
+        self.blocks = self.footer["blocks"]
+        self._chats = self.footer["chats"]
+        self._senders = self.footer["senders"]
+        self._names = self.footer["sender_names"]
+        self._chat_index = {c: i for i, c in enumerate(self._chats)}
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+    def time_range(self) -> tuple[int, int]:
+        """(min, max) timestamp in ms over all blocks."""
+        stamps = [b["min_ts"] for b in self.blocks if b["min_ts"] != NO_TS]
+        return (min(stamps), max(b["max_ts"] for b in self.blocks)) if stamps else (NO_TS, NO_TS)
+
+    def select_blocks(
+        self,
+        chat_id: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """Blocks that may contain matching messages (from the footer index only)."""
+        chat = None
+        if chat_id is not None:
+            chat = self._chat_index.get(chat_id)
+            if chat is None:
+                return []
+        start_ms = _to_ms(start) if start else None
+        end_ms = _to_ms(end) if end else None
+
+        selected = []
+        for block in self.blocks:
+            if chat is not None and block["chat"] != chat:
+                continue
+            if start_ms is not None and block["max_ts"] < start_ms:
+                continue
+            if end_ms is not None and block["min_ts"] > end_ms:
+                continue
+            selected.append(block)
+        return selected
+
+    def iter_records(
+        self,
+        chat_id: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield plain dict records, decompressing only the selected blocks."""
+        start_ms = _to_ms(start) if start else None
+        end_ms = _to_ms(end) if end else None
+
+        for block in self.select_blocks(chat_id, start, end):
+            raw = _decompress(self._mm[block["offset"]:block["offset"] + block["length"]], self.codec)
+            for record in self._decode_block(memoryview(raw), self._chats[block["chat"]]):
+                ts = record["ts_ms"]
+                if start_ms is not None and ts < start_ms:
+                    continue
+                if end_ms is not None and ts > end_ms:
+                    continue
+                yield record
+
+    def _decode_block(self, buf: memoryview, chat_id: str) -> Iterator[Dict[str, Any]]:
+        (count,) = struct.unpack_from("<I", buf, 0)
+        pos = 4
+
+        deltas = array("q")
+        deltas.frombytes(buf[pos:pos + 8 * count])
+        pos += 8 * count
+        sender_idx = array("I")
+        sender_idx.frombytes(buf[pos:pos + 4 * count])
+        pos += 4 * count
+        name_idx = array("I")
+        name_idx.frombytes(buf[pos:pos + 4 * count])
+        pos += 4 * count
+        flags = bytes(buf[pos:pos + count])
+        pos += count
+
+        ids, used = _unpack_strings(buf[pos:], count)
+        pos += used
+        texts, used = _unpack_strings(buf[pos:], count)
+        pos += used
+        attachments, used = _unpack_strings(buf[pos:], count)
+        pos += used
+        provider_ids = _unpack_strings(buf[pos:], count)[0] if self.version >= 2 else [""] * count
+
+        ts = 0
+        for i in range(count):
+            ts = deltas[i] if i == 0 else _wrap64(ts + deltas[i])
+            yield {
+                "id": ids[i],
+                "chat_id": chat_id or None,
+                "provider_id": provider_ids[i] or None,
+                "sender_id": self._senders[sender_idx[i]],
+                "sender_name": self._names[name_idx[i]],
+                "text": texts[i],
+                "ts_ms": ts,
+                "is_sender": bool(flags[i]),
+                "attachments": attachments[i],
+            }
+
+
+def record_to_message(record: Dict[str, Any]) -> Message:
+    """Convert an archive record back to the Message model."""
+    return Message(
+        id=record["id"],
+        chat_id=record["chat_id"],
+        provider_id=record.get("provider_id"),
+        sender_id=record["sender_id"],
+        sender_name=record["sender_name"],
+        text=record["text"],
+        timestamp=_from_ms(record["ts_ms"]),
+        is_sender=record["is_sender"],
+        attachments=json.loads(record["attachments"]) if record["attachments"] else [],
+    )
+
+
+class MessageArchive:
+    """Directory of append-only message segments."""
+
+    def __init__(self, root: Path = DEFAULT_ROOT, codec: Optional[str] = None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.codec = codec
+        self._segments: Dict[Path, Segment] = {}
+
+    def close(self) -> None:
+        for segment in self._segments.values():
+            segment.close()
+        self._segments.clear()
+
+    def segment_paths(self) -> List[Path]:
+        return sorted(self.root.glob("seg-*.umsg"))
+
+    def append(self, messages: Iterable[Message]) -> int:
+        """Write messages as a new segment. Returns number written."""
+        messages = list(messages)
+        if not messages:
+            return 0
+        paths = self.segment_paths()
+        next_no = int(paths[-1].stem.split("-")[1]) + 1 if paths else 1
+        return write_segment(self.root / f"seg-{next_no:06d}.umsg", messages, codec=self.codec)
+
+    def query(
+        self,
+        chat_id: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Iterator[Message]:
+        """Messages matching chat and time range, as Message models."""
+        for record in self.query_records(chat_id, start, end):
+            yield record_to_message(record)
+
+    def query_records(
+        self,
+        chat_id: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Like query() but yields plain dicts (no model construction)."""
+        for path in self.segment_paths():
+            segment = self._open(path)
+            yield from segment.iter_records(chat_id, start, end)
+
+    def stats(self) -> Dict[str, int]:
+        """Segment, block, message and byte counts."""
+        segments = [self._open(p) for p in self.segment_paths()]
+        return {
+            "segments": len(segments),
+            "blocks": sum(len(s.blocks) for s in segments),
+            "messages": sum(s.count for s in segments),
+            "bytes": sum(s.path.stat().st_size for s in segments),
+        }
+
+    # ==================== IMPORT / EXPORT ====================
+
+    def import_jsonl(self, path: Path, batch_size: int = 100_000) -> int:
+        """Import a JSONL file of Message dicts (one segment per batch)."""
+        total = 0
+        batch = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    batch.append(Message.model_validate_json(line))
+                if len(batch) >= batch_size:
+                    total += self.append(batch)
+                    batch = []
+        total += self.append(batch)
+        return total
+
+    def export_jsonl(
+        self,
+        path: Path,
+        chat_id: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> int:
+        """Export (a slice of) the archive to JSONL of Message dicts."""
+        count = 0
+        with open(path, "w", encoding="utf-8") as f:
+            for message in self.query(chat_id, start, end):
+                f.write(message.model_dump_json() + "\n")
+                count += 1
+        return count
+
+    def _open(self, path: Path) -> Segment:
+        segment = self._segments.get(path)
+        if segment is None:
+            segment = self._segments[path] = Segment(path)
+        return segment
@@ -0,0 +1,286 @@
+"""
+Attachment download pipeline with a content-addressed cache.
+
+- Downloads stream to disk in chunks while being hashed (SHA-256)
+- Files are stored once under objects/<ab>/<sha256>, however many
+  messages or chats they were forwarded to
+- An attachment id already downloaded for any message is not fetched again
+- Concurrent downloads of the same attachment share one request
+- Metadata (message, chat, file name, hash) is indexed in SQLite
+"""
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.config import Config
+from src.models import Attachment, Message
+
+DEFAULT_ROOT = Config.DATA_DIR / "attachments"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mimetype TEXT,
+    stored_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS attachments (
+    message_id TEXT NOT NULL,
+    attachment_id TEXT NOT NULL,
+    chat_id TEXT,
+    type TEXT,
+    file_name TEXT,
+    file_size INTEGER,
+    mimetype TEXT,
+    message_timestamp REAL,
+    sha256 TEXT,
+    downloaded_at REAL,
+    PRIMARY KEY (message_id, attachment_id)
+);
+CREATE INDEX IF NOT EXISTS idx_attachments_attachment ON attachments (attachment_id);
+CREATE INDEX IF NOT EXISTS idx_attachments_chat ON attachments (chat_id);
+CREATE INDEX IF NOT EXISTS idx_attachments_sha ON attachments (sha256);
+"""
+
+
+def download_jobs(messages: Iterable[Message]) -> List[tuple[Message, Attachment]]:
+    """(message, attachment) pairs that can be downloaded."""
+    return [
+        (msg, att) for msg in messages for att in msg.attachments
+        if att.id and not att.unavailable
+    ]
+
+
+class AttachmentStore:
+    """Content-addressed attachment cache with a SQLite metadata index."""
+
+    def __init__(self, root: Path = DEFAULT_ROOT):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.tmp_dir = self.root / "tmp"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+
+        # Shared across download threads; all access goes through self._lock
+        self.conn = sqlite3.connect(str(self.root / "index.db"), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def blob_path(self, sha256: str) -> Path:
+        """Path of a stored file by content hash."""
+        return self.objects_dir / sha256[:2] / sha256
+
+    # ==================== INDEX ====================
+
+    def index_message(self, message: Message) -> int:
+        """Record attachment metadata for a message (no download). Returns count indexed."""
+        count = 0
+        with self._lock:
+            for att in message.attachments:
+                if not att.id:
+                    continue
+                self.conn.execute(
+                    "INSERT INTO attachments (message_id, attachment_id, chat_id, type, file_name, "
+                    "file_size, mimetype, message_timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(message_id, attachment_id) DO UPDATE SET "
+                    "chat_id = excluded.chat_id, file_name = excluded.file_name, "
+                    "file_size = excluded.file_size, mimetype = excluded.mimetype",
+                    (
+                        message.id, att.id, message.chat_id, att.type, att.file_name,
+                        att.file_size, att.mimetype,
+                        message.timestamp.timestamp() if message.timestamp else None,
+                    ),
+                )
+                count += 1
+            self.conn.commit()
+        return count
+
+    def lookup(self, message_id: str, attachment_id: str) -> Optional[Path]:
+        """Local path of an attachment if already downloaded."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT sha256 FROM attachments WHERE message_id = ? AND attachment_id = ? "
+                "AND sha256 IS NOT NULL",
+                (message_id, attachment_id),
+            ).fetchone()
+        return self.blob_path(row["sha256"]) if row else None
+
+    def for_chat(self, chat_id: str) -> List[Dict[str, Any]]:
+        """Indexed attachments of a chat (downloaded or not)."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM attachments WHERE chat_id = ? ORDER BY message_timestamp",
+                (chat_id,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        """Counts of indexed attachments, stored files and stored bytes."""
+        with self._lock:
+            refs = self.conn.execute(
+                "SELECT COUNT(*) FROM attachments WHERE sha256 IS NOT NULL"
+            ).fetchone()[0]
+            blobs, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()
+        return {"references": refs, "files": blobs, "bytes": size}
+
+    # ==================== DOWNLOAD ====================
+
+    def download(self, client, message: Message, attachment: Attachment) -> tuple[Path, bool]:
+        """
+        Ensure one attachment is stored locally.
+
+        Args:
+            client: UniPileClient instance
+            message: Message the attachment belongs to
+            attachment: Attachment to fetch
+
+        Returns:
+            Tuple of (local path, True if it was fetched from the API)
+        """
+        self.index_message(message)
+
+        path = self.lookup(message.id, attachment.id)
+        if path and path.exists():
+            return path, False
+
+        # Same attachment id seen on another message (forwarded) -> reuse
+        sha256 = self._known_hash(attachment.id)
+        if sha256 and self.blob_path(sha256).exists():
+            self._link(message.id, attachment.id, sha256)
+            return self.blob_path(sha256), False
+
+        # Coalesce concurrent downloads of the same attachment id
+        with self._lock:
+            future = self._in_flight.get(attachment.id)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[attachment.id] = future
+
+        if not owner:
+            sha256 = future.result()
+            self._link(message.id, attachment.id, sha256)
+            return self.blob_path(sha256), False
+
+        # The entry stays in flight until the hash is linked, so a caller arriving
+        # after the pop finds it through _known_hash (re-checked by a new owner)
+        fetched = False
+        try:
+            sha256 = self._known_hash(attachment.id)
+            if not sha256 or not self.blob_path(sha256).exists():
+                sha256 = self._fetch(client, message.id, attachment)
+                fetched = True
+            self._link(message.id, attachment.id, sha256)
+            future.set_result(sha256)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(attachment.id, None)
+
+        return self.blob_path(sha256), fetched
+
+    def download_many(
+        self,
+        client,
+        messages: Iterable[Message],
+        workers: int = 4,
+    ) -> List[Dict[str, Any]]:
+        """
+        Download all attachments of the given messages concurrently.
+
+        Returns:
+            One dict per attachment (see download_result)
+        """
+        jobs = download_jobs(messages)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            return list(executor.map(lambda job: self.download_result(client, *job), jobs))
+
+    def download_result(self, client, message: Message, attachment: Attachment) -> Dict[str, Any]:
+        """
+        Download one attachment, reporting errors instead of raising.
+
+        Returns:
+            Dict with message_id, attachment_id, file_name, path, fetched
+            (bool) and error (str or None)
+        """
+        result = {
+            "message_id": message.id,
+            "attachment_id": attachment.id,
+            "file_name": attachment.file_name,
+            "path": None,
+            "fetched": False,
+            "error": None,
+        }
+        try:
+            path, fetched = self.download(client, message, attachment)
+            result.update(path=path, fetched=fetched)
+        except Exception as e:
+            result["error"] = str(e)
+        return result
+
+    # ==================== INTERNAL ====================
+
+    def _fetch(self, client, message_id: str, attachment: Attachment) -> str:
+        """Stream an attachment to a temp file while hashing, then move it into place."""
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_name = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in client.stream_attachment(message_id, attachment.id):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+
+            sha256 = digest.hexdigest()
+            target = self.blob_path(sha256)
+            if target.exists():
+                os.unlink(tmp_name)  # Identical content already stored
+            else:
+                target.parent.mkdir(exist_ok=True)
+                os.replace(tmp_name, target)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO blobs (sha256, size, mimetype, stored_at) VALUES (?, ?, ?, ?)",
+                (sha256, size, attachment.mimetype, time.time()),
+            )
+            self.conn.commit()
+        return sha256
+
+    def _known_hash(self, attachment_id: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT sha256 FROM attachments WHERE attachment_id = ? AND sha256 IS NOT NULL LIMIT 1",
+                (attachment_id,),
+            ).fetchone()
+        return row["sha256"] if row else None
+
+    def _link(self, message_id: str, attachment_id: str, sha256: str) -> None:
+        with self._lock:
+            self.conn.execute(
+                "UPDATE attachments SET sha256 = ?, downloaded_at = ? "
+                "WHERE message_id = ? AND attachment_id = ?",
+                (sha256, time.time(), message_id, attachment_id),
+            )
+            self.conn.commit()
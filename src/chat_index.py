@@ -0,0 +1,256 @@
+"""
+Chat-id resolution cache: attendee provider id <-> 1:1 chat id, per account.
+
+Built from list_chats attendee data and updated on every send, so a
+follow-up message to a known person goes straight to
+POST /chats/{id}/messages instead of POST /chats, and the UI can find a
+chat by the person's name or provider id without paging chats.
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.config import Config
+from src.models import Chat
+from src.relations_store import normalize
+from src.timeutils import to_epoch
+from src.unipile_client import UniPileError
+
+DEFAULT_DB_PATH = Config.DATA_DIR / "chat_index.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_index (
+    account_id TEXT NOT NULL,
+    attendee_provider_id TEXT NOT NULL,
+    chat_id TEXT NOT NULL,
+    name TEXT,
+    name_norm TEXT,
+    last_message_at REAL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (account_id, attendee_provider_id)
+);
+CREATE INDEX IF NOT EXISTS idx_chat_index_chat ON chat_index (chat_id);
+CREATE INDEX IF NOT EXISTS idx_chat_index_name ON chat_index (account_id, name_norm);
+CREATE INDEX IF NOT EXISTS idx_chat_index_updated ON chat_index (updated_at);
+"""
+
+# Status codes meaning the cached chat id is no longer usable
+STALE_CHAT_CODES = {404, 410}
+
+
+def one_to_one_attendee(chat: Chat) -> Optional[str]:
+    """Provider id of the other person in a 1:1 chat, None for groups/unknown."""
+    if chat.is_group:
+        return None
+    ids = {a.attendee_provider_id for a in chat.attendees if a.attendee_provider_id}
+    return ids.pop() if len(ids) == 1 else None
+
+
+class ChatIndex:
+    """Bidirectional attendee <-> chat map (SQLite, thread-safe)."""
+
+    def __init__(self, db_path: Path = DEFAULT_DB_PATH):
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path), timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ==================== LOOKUP ====================
+
+    def chat_for(self, account_id: str, user_id: str) -> Optional[str]:
+        """Chat ID of the 1:1 chat with a user, if known."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT chat_id FROM chat_index WHERE account_id = ? AND attendee_provider_id = ?",
+                (account_id, user_id),
+            ).fetchone()
+        return row["chat_id"] if row else None
+
+    def user_for(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        """Attendee of a 1:1 chat (account_id, attendee_provider_id, name), if known."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT account_id, attendee_provider_id, name FROM chat_index WHERE chat_id = ?",
+                (chat_id,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def find(self, query: str, account_id: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Chats by person: exact provider id, or name containing the query.
+
+        Name prefix matches rank first, then most recent activity.
+        """
+        query = query.strip()
+        if not query:
+            return []
+        norm = normalize(query)
+        sql = (
+            "SELECT *, (name_norm LIKE ? ESCAPE '\\') AS prefix FROM chat_index "
+            "WHERE (attendee_provider_id = ? OR name_norm LIKE ? ESCAPE '\\')"
+        )
+        escaped = norm.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params: list = [f"{escaped}%", query, f"%{escaped}%"]
+        if account_id:
+            sql += " AND account_id = ?"
+            params.append(account_id)
+        sql += " ORDER BY prefix DESC, last_message_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [{k: row[k] for k in row.keys() if k not in ("prefix", "name_norm")} for row in rows]
+
+    def changed_since(self, updated_at: float) -> List[Dict[str, Any]]:
+        """Mappings added or updated after a time (account_id, attendee_provider_id, chat_id, ...)."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT account_id, attendee_provider_id, chat_id, last_message_at, updated_at "
+                "FROM chat_index WHERE updated_at > ? ORDER BY updated_at",
+                (updated_at,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self, account_id: Optional[str] = None) -> int:
+        with self._lock:
+            if account_id:
+                row = self.conn.execute(
+                    "SELECT COUNT(*) FROM chat_index WHERE account_id = ?", (account_id,)
+                ).fetchone()
+            else:
+                row = self.conn.execute("SELECT COUNT(*) FROM chat_index").fetchone()
+        return row[0]
+
+    # ==================== UPDATES ====================
+
+    def record(
+        self,
+        account_id: str,
+        user_id: str,
+        chat_id: str,
+        name: Optional[str] = None,
+        last_message_at: Optional[float] = None,
+    ) -> bool:
+        """
+        Store a mapping (after a send or from a chat listing).
+
+        Returns:
+            True if the mapping was new or changed, including a newer
+            last_message_at (routing ranks seats on it)
+        """
+        now = time.time()
+        with self._lock:
+            current = self.conn.execute(
+                "SELECT chat_id, name FROM chat_index WHERE account_id = ? AND attendee_provider_id = ?",
+                (account_id, user_id),
+            ).fetchone()
+            if current and current["chat_id"] == chat_id and (not name or current["name"] == name):
+                if not last_message_at:
+                    return False
+                cursor = self.conn.execute(
+                    "UPDATE chat_index SET last_message_at = ?, updated_at = ? "
+                    "WHERE account_id = ? AND attendee_provider_id = ? "
+                    "AND COALESCE(last_message_at, 0) < ?",
+                    (last_message_at, now, account_id, user_id, last_message_at),
+                )
+                self.conn.commit()
+                return cursor.rowcount > 0
+            self.conn.execute(
+                "INSERT INTO chat_index (account_id, attendee_provider_id, chat_id, name, name_norm, "
+                "last_message_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(account_id, attendee_provider_id) DO UPDATE SET "
+                "chat_id = excluded.chat_id, "
+                "name = COALESCE(excluded.name, chat_index.name), "
+                "name_norm = COALESCE(excluded.name_norm, chat_index.name_norm), "
+                "last_message_at = COALESCE(excluded.last_message_at, chat_index.last_message_at), "
+                "updated_at = excluded.updated_at",
+                (account_id, user_id, chat_id, name, normalize(name) if name else None, last_message_at, now),
+            )
+            self.conn.commit()
+        return True
+
+    def apply_chat(self, chat: Chat) -> bool:
+        """Index a chat from list_chats/get_chat. Returns True if anything changed."""
+        user_id = one_to_one_attendee(chat)
+        if not user_id or not chat.account_id:
+            return False
+        attendee_name = next((a.name for a in chat.attendees if a.name), None)
+        return self.record(
+            chat.account_id,
+            user_id,
+            chat.id,
+            name=attendee_name or chat.name,
+            last_message_at=to_epoch(chat.last_message_timestamp),
+        )
+
+    def forget_chat(self, chat_id: str) -> None:
+        """Drop mappings to a chat that no longer accepts messages."""
+        with self._lock:
+            self.conn.execute("DELETE FROM chat_index WHERE chat_id = ?", (chat_id,))
+            self.conn.commit()
+
+    def sync(self, client, account_id: str, page_size: int = 50, full: bool = False) -> tuple[int, int]:
+        """
+        Build/refresh mappings from list_chats.
+
+        Chats come most recently active first, so an incremental sync stops
+        at the first page without new or changed mappings (a chat with a
+        newer last message counts as changed).
+
+        Args:
+            client: UniPileClient instance
+            account_id: Account to index
+            page_size: Chats per API page
+            full: Page through all chats
+
+        Returns:
+            Tuple of (chats seen, mappings added or changed, incl. newer activity)
+        """
+        seen = changed = 0
+        cursor = None
+        while True:
+            chats, cursor = client.list_chats(account_id, limit=page_size, cursor=cursor)
+            changed_in_page = 0
+            for chat in chats:
+                seen += 1
+                if self.apply_chat(chat):
+                    changed_in_page += 1
+            changed += changed_in_page
+            if not cursor or not chats or (changed_in_page == 0 and not full):
+                break
+        return seen, changed
+
+    # ==================== SENDING ====================
+
+    def send_to_user(self, client, account_id: str, user_id: str, text: str) -> tuple[str, str]:
+        """
+        Send to a user through their existing chat when known.
+
+        Uses POST /chats/{id}/messages for a cached chat and falls back to
+        POST /chats (creating or reusing the chat) otherwise or when the
+        cached chat is gone. The resulting mapping is recorded.
+
+        Returns:
+            Tuple of (chat_id, message_id), like UniPileClient.send_to_user()
+        """
+        chat_id = self.chat_for(account_id, user_id)
+        if chat_id:
+            try:
+                message = client.send_message(chat_id, text)
+                self.record(account_id, user_id, chat_id, last_message_at=time.time())
+                return chat_id, message.id
+            except UniPileError as e:
+                if e.status_code not in STALE_CHAT_CODES:
+                    raise
+                self.forget_chat(chat_id)
+
+        chat_id, message_id = client.send_to_user(account_id, user_id, text)
+        if chat_id:
+            self.record(account_id, user_id, chat_id, last_message_at=time.time())
+        return chat_id, message_id
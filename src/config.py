@@ -18,12 +18,61 @@ class Config:
     UNIPILE_DSN = os.getenv("UNIPILE_DSN")
     UNIPILE_ACCESS_TOKEN = os.getenv("UNIPILE_ACCESS_TOKEN")
 
+    # LinkedIn search result cache
+    SEARCH_CACHE_TTL_HOURS = float(os.getenv("SEARCH_CACHE_TTL_HOURS", "24"))
+
+    # LinkedIn search rate budget (live search pages per minute, shared by workers)
+    SEARCH_RATE_PER_MINUTE = float(os.getenv("SEARCH_RATE_PER_MINUTE", "20"))
+    SEARCH_RATE_BURST = int(os.getenv("SEARCH_RATE_BURST", "3"))
+
+    # Scheduled sends rate budget (messages per minute, shared by workers)
+    SEND_RATE_PER_MINUTE = float(os.getenv("SEND_RATE_PER_MINUTE", "6"))
+
+    # Concurrent requests of batch calls (get_chats, get_user_profiles, list_messages_many)
+    BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "8"))
+
+    # HTTP response cache for GET requests: off, memory (per process) or disk (data/http_cache.db)
+    HTTP_CACHE = os.getenv("HTTP_CACHE", "off")
+    HTTP_CACHE_TTL_SECONDS = float(os.getenv("HTTP_CACHE_TTL_SECONDS", "0"))  # 0 = always revalidate
+
+    # Leased sync work units: sqlite (data/work_leases.db, one machine) or redis (multi-node)
+    LEASE_BACKEND = os.getenv("LEASE_BACKEND", "sqlite")
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    LEASE_SECONDS = float(os.getenv("LEASE_SECONDS", "60"))  # Lease length, renewed by heartbeats
+
+    # Reply SLA: inbound messages unanswered for longer count as breaches (scripts/sla_report.py)
+    REPLY_SLA_HOURS = float(os.getenv("REPLY_SLA_HOURS", "24"))
+
+    # Keyword/regex alert rules (see alert_rules.example.json), re-read when changed
+    ALERT_RULES_PATH = PROJECT_ROOT / os.getenv("ALERT_RULES_PATH", "alert_rules.json")  # Relative to project root
+    ALERT_RELOAD_SECONDS = float(os.getenv("ALERT_RELOAD_SECONDS", "5"))  # Max age before checking for changes
+
+    # Near-duplicate check of outbound texts (MinHash similarity, 0..1)
+    NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.9"))
+    NEAR_DUPLICATE_WINDOW_DAYS = float(os.getenv("NEAR_DUPLICATE_WINDOW_DAYS", "7"))  # "Sent recently" window
+
+    # Sender routing: a conversation this recent beats a mere connection (scripts/route.py)
+    ROUTING_RECENT_DAYS = float(os.getenv("ROUTING_RECENT_DAYS", "180"))
+
+    # Account health: skip seats with a broken connection or failing requests (on/off)
+    ACCOUNT_HEALTH = os.getenv("ACCOUNT_HEALTH", "on")
+    ACCOUNT_STATUS_TTL_SECONDS = float(os.getenv("ACCOUNT_STATUS_TTL_SECONDS", "60"))  # Re-check a bad status after
+    ACCOUNT_FAILURE_RATE = float(os.getenv("ACCOUNT_FAILURE_RATE", "0.5"))  # Of a seat's last 20 requests
+    ACCOUNT_FAILURE_MIN_CALLS = int(os.getenv("ACCOUNT_FAILURE_MIN_CALLS", "5"))
+    ACCOUNT_PROBE_SECONDS = float(os.getenv("ACCOUNT_PROBE_SECONDS", "30"))  # First re-probe, then backoff
+
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))  # Rotate at this size
+    LOG_ROTATE_HOURS = float(os.getenv("LOG_ROTATE_HOURS", "24"))  # ...or at this age
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))  # Fraction of DEBUG/INFO operations kept
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # Records buffered before dropping
 
     # Paths
     LOGS_DIR = PROJECT_ROOT / "logs"
     OUTPUTS_DIR = PROJECT_ROOT / "outputs"
+    DATA_DIR = PROJECT_ROOT / "data"  # Local SQLite stores (relations, caches, ...)
 
     @classmethod
     def validate(cls) -> None:
@@ -0,0 +1,152 @@
+"""
+Incremental conversation digests for LLM summarization.
+
+Each chat keeps a rolling summary and a high-water mark (timestamp and
+id of the newest message the summary covers; messages are ordered by
+(timestamp, id)). A delta contains only the
+messages after the mark, so daily summaries of long threads cost work
+proportional to what is new, not to the thread length.
+
+Flow:
+1. delta(): fetch messages newer than the mark, remember them as pending
+2. summarize previous summary + delta with an LLM (outside this module)
+3. save(): store the new summary and advance the mark to the pending one
+"""
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.config import Config
+from src.timeutils import to_epoch
+
+DEFAULT_DB_PATH = Config.DATA_DIR / "digests.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_digests (
+    chat_id TEXT PRIMARY KEY,
+    summary TEXT,
+    hwm_ts REAL,
+    hwm_id TEXT,
+    pending_ts REAL,
+    pending_id TEXT,
+    messages_covered INTEGER NOT NULL DEFAULT 0,
+    pending_count INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL
+);
+"""
+
+
+class DigestStore:
+    """Per-chat rolling summaries with message high-water marks."""
+
+    def __init__(self, db_path: Path = DEFAULT_DB_PATH):
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def get(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            "SELECT * FROM chat_digests WHERE chat_id = ?", (chat_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def delta(
+        self,
+        client,
+        chat_id: str,
+        page_size: int = 50,
+        max_messages: int = 500,
+    ) -> tuple[Optional[str], List[Dict[str, Any]]]:
+        """
+        Messages newer than the chat's high-water mark.
+
+        Pages the chat's messages (newest first) and stops at the first
+        page that reaches the mark. Only the first digest of a chat (no
+        mark yet) is capped at max_messages; later deltas always page back
+        to the mark, so save() never moves past unsummarized messages. The
+        newest returned message is stored as the pending mark until save()
+        is called.
+
+        Args:
+            client: UniPileClient instance
+            chat_id: Chat ID
+            page_size: Messages per API page
+            max_messages: Upper bound for the first digest of a long thread
+                (the newest ones; older history is left out of the summary)
+
+        Returns:
+            Tuple of (previous summary or None, raw message items oldest first)
+        """
+        digest = self.get(chat_id) or {}
+        hwm_ts = digest.get("hwm_ts")
+        hwm_id = digest.get("hwm_id")
+
+        first = hwm_ts is None and hwm_id is None
+        new_items = []
+        for item in client.iter_items(
+            f"/chats/{chat_id}/messages", page_size=page_size, max_items=max_messages if first else None
+        ):
+            ts = to_epoch(item.get("timestamp"))
+            if ts is None:
+                continue  # Cannot be placed against the mark
+            if hwm_ts is not None:
+                if ts < hwm_ts:
+                    break  # Newest first: the rest is covered
+                if (ts, item.get("id") or "") <= (hwm_ts, hwm_id or ""):
+                    continue  # The mark itself, or covered with the same timestamp
+            new_items.append(item)
+
+        # Marks order messages by (timestamp, id), so same-second messages are told apart
+        new_items.sort(key=lambda item: (to_epoch(item.get("timestamp")), item.get("id") or ""))
+
+        if new_items:
+            newest = new_items[-1]
+            self.conn.execute(
+                "INSERT INTO chat_digests (chat_id, pending_ts, pending_id, pending_count, updated_at) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(chat_id) DO UPDATE SET "
+                "pending_ts = excluded.pending_ts, pending_id = excluded.pending_id, "
+                "pending_count = excluded.pending_count, updated_at = excluded.updated_at",
+                (chat_id, to_epoch(newest.get("timestamp")), newest.get("id"), len(new_items), time.time()),
+            )
+            self.conn.commit()
+
+        return digest.get("summary"), new_items
+
+    def save(self, chat_id: str, summary: str) -> bool:
+        """
+        Store a new summary and advance the mark to the pending delta.
+
+        Returns:
+            False if there was no pending delta to commit (summary still stored)
+        """
+        digest = self.get(chat_id)
+        if digest is None:
+            self.conn.execute(
+                "INSERT INTO chat_digests (chat_id, summary, updated_at) VALUES (?, ?, ?)",
+                (chat_id, summary, time.time()),
+            )
+            self.conn.commit()
+            return False
+
+        has_pending = digest["pending_id"] is not None
+        self.conn.execute(
+            "UPDATE chat_digests SET summary = ?, "
+            "hwm_ts = COALESCE(pending_ts, hwm_ts), hwm_id = COALESCE(pending_id, hwm_id), "
+            "messages_covered = messages_covered + pending_count, "
+            "pending_ts = NULL, pending_id = NULL, pending_count = 0, updated_at = ? "
+            "WHERE chat_id = ?",
+            (summary, time.time(), chat_id),
+        )
+        self.conn.commit()
+        return has_pending
+
+    def reset(self, chat_id: str) -> None:
+        """Forget a chat's digest (next delta is the full thread)."""
+        self.conn.execute("DELETE FROM chat_digests WHERE chat_id = ?", (chat_id,))
+        self.conn.commit()
@@ -0,0 +1,307 @@
+"""
+HTTP response cache with revalidation for UniPileClient GET requests.
+
+Responses are stored with their validators:
+- ETag / Last-Modified when the API sends them; a stale entry is then
+  revalidated with If-None-Match / If-Modified-Since and a 304 reuses
+  the stored body
+- a content hash otherwise; a full response identical to the stored
+  one counts as "unchanged"
+
+Cache-Control is honored: no-store responses are never stored, max-age
+makes an entry fresh (served without a request) for that long, no-cache
+forces revalidation. Responses without Cache-Control get the configured
+default TTL (0 = always revalidate).
+
+Backends are pluggable: MemoryBackend (LRU, per process) and DiskBackend
+(SQLite in data/, shared across runs).
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.config import Config
+from src.profiling import register_stats
+
+DEFAULT_DB_PATH = Config.DATA_DIR / "http_cache.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS http_cache (
+    key TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    fresh_until REAL NOT NULL,
+    no_cache INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+@dataclass
+class CacheEntry:
+    """A stored response body with its validators and freshness."""
+
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: str
+    stored_at: float
+    fresh_until: float
+    no_cache: bool = False
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return not self.no_cache and (now or time.time()) < self.fresh_until
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def data(self) -> Any:
+        return json.loads(self.body)
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """'max-age=60, no-cache' -> {'max-age': '60', 'no-cache': None}"""
+    directives: Dict[str, Optional[str]] = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else None
+    return directives
+
+
+# ==================== BACKENDS ====================
+
+class MemoryBackend:
+    """In-process LRU backend."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": sum(len(e.body) for e in self._entries.values())}
+
+
+class DiskBackend:
+    """SQLite backend, shared across runs and processes."""
+
+    def __init__(self, db_path: Path = DEFAULT_DB_PATH):
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path), timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM http_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(
+            body=row["body"],
+            etag=row["etag"],
+            last_modified=row["last_modified"],
+            content_hash=row["content_hash"],
+            stored_at=row["stored_at"],
+            fresh_until=row["fresh_until"],
+            no_cache=bool(row["no_cache"]),
+        )
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO http_cache (key, body, etag, last_modified, content_hash, "
+                "stored_at, fresh_until, no_cache) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, entry.body, entry.etag, entry.last_modified, entry.content_hash,
+                 entry.stored_at, entry.fresh_until, int(entry.no_cache)),
+            )
+            self.conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM http_cache WHERE key = ?", (key,))
+            self.conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM http_cache")
+            self.conn.commit()
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT COUNT(*) AS n, COALESCE(SUM(LENGTH(body)), 0) AS size, "
+                "SUM(etag IS NOT NULL OR last_modified IS NOT NULL) AS validated, "
+                "MIN(stored_at) AS oldest FROM http_cache"
+            ).fetchone()
+        return {
+            "entries": row["n"],
+            "bytes": row["size"],
+            "with_validators": row["validated"] or 0,
+            "oldest": row["oldest"],
+        }
+
+
+# ==================== CACHE ====================
+
+class HTTPCache:
+    """
+    Validator-aware response cache used by UniPileClient._request().
+
+    Metrics (self.metrics):
+        hit          fresh entry served without a request
+        revalidated  304 Not Modified, stored body reused
+        unchanged    full 200 response identical to the stored body
+        changed      full 200 response that replaced a stored body
+        miss         nothing stored yet
+        not_stored   response not cacheable (no-store, non-200)
+    """
+
+    def __init__(self, backend=None, default_ttl: float = 0.0):
+        """
+        Args:
+            backend: MemoryBackend or DiskBackend (default: MemoryBackend)
+            default_ttl: Freshness in seconds for responses without Cache-Control
+        """
+        self.backend = backend or MemoryBackend()
+        self.default_ttl = default_ttl
+        self.metrics: Counter = Counter()
+        self._lock = threading.Lock()
+        register_stats("http_cache", self.stats)
+
+    @classmethod
+    def from_config(cls) -> Optional["HTTPCache"]:
+        """Cache selected by HTTP_CACHE (off, memory, disk)."""
+        mode = Config.HTTP_CACHE.lower()
+        if mode == "memory":
+            return cls(MemoryBackend(), default_ttl=Config.HTTP_CACHE_TTL_SECONDS)
+        if mode == "disk":
+            return cls(DiskBackend(), default_ttl=Config.HTTP_CACHE_TTL_SECONDS)
+        return None
+
+    @staticmethod
+    def key(url: str, params: Optional[Dict[str, Any]], credential: str = "") -> str:
+        """Cache key of a GET: URL, sorted query params and the API key (hashed)."""
+        raw = json.dumps([url, sorted((params or {}).items()), credential], default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        return self.backend.get(key)
+
+    def count(self, metric: str) -> None:
+        with self._lock:
+            self.metrics[metric] += 1
+
+    def store(self, key: str, response, previous: Optional[CacheEntry] = None) -> str:
+        """
+        Store a 200 response. Returns the metric recorded for it.
+        """
+        if response.status_code != 200:
+            self.count("not_stored")
+            return "not_stored"
+        control = parse_cache_control(response.headers.get("Cache-Control"))
+        if "no-store" in control:
+            if previous is not None:
+                self.backend.delete(key)
+            self.count("not_stored")
+            return "not_stored"
+
+        body = response.content
+        digest = hashlib.sha256(body).hexdigest()
+        self.backend.set(key, self._entry(body, digest, response.headers, control))
+
+        if previous is None:
+            metric = "miss"
+        elif previous.content_hash == digest:
+            metric = "unchanged"
+        else:
+            metric = "changed"
+        self.count(metric)
+        return metric
+
+    def revalidated(self, key: str, entry: CacheEntry, response) -> CacheEntry:
+        """Handle a 304: keep the body, take new validators/freshness from the response."""
+        headers = response.headers
+        control = parse_cache_control(headers.get("Cache-Control"))
+        refreshed = self._entry(entry.body, entry.content_hash, headers, control, previous=entry)
+        self.backend.set(key, refreshed)
+        self.count("revalidated")
+        return refreshed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self.metrics)
+        served = sum(metrics.get(m, 0) for m in ("hit", "revalidated", "unchanged"))
+        total = served + metrics.get("changed", 0) + metrics.get("miss", 0)
+        return {
+            **metrics,
+            "requests": total,
+            "reuse_ratio": round(served / total, 3) if total else 0.0,
+            **self.backend.info(),
+        }
+
+    def _entry(
+        self,
+        body: bytes,
+        digest: str,
+        headers,
+        control: Dict[str, Optional[str]],
+        previous: Optional[CacheEntry] = None,
+    ) -> CacheEntry:
+        now = time.time()
+        ttl = self.default_ttl
+        if "max-age" in control:
+            try:
+                ttl = max(0.0, float(control["max-age"] or 0) - float(headers.get("Age") or 0))
+            except ValueError:
+                ttl = 0.0
+        return CacheEntry(
+            body=body,
+            etag=headers.get("ETag") or (previous.etag if previous else None),
+            last_modified=headers.get("Last-Modified") or (previous.last_modified if previous else None),
+            content_hash=digest,
+            stored_at=now,
+            fresh_until=now + ttl,
+            no_cache="no-cache" in control,
+        )
@@ -0,0 +1,92 @@
+"""
+Identity map / interning for values repeated across chats and messages.
+
+Decoded JSON gives every chat and message its own copies of the same
+strings (account ids, providers, sender ids and names) and list_chats
+builds a separate ChatParticipant for the same person in every chat.
+During large sweeps these duplicates dominate memory.
+
+The process-wide INTERNER keeps one instance of each:
+- strings: sys.intern() for short, repeated fields (ids, names,
+  providers); never for message texts or unique message ids
+- participants: a weak identity map keyed on the participant's fields,
+  so every chat with the same person references one ChatParticipant,
+  and entries disappear once no chat uses them
+
+Shared participants must be treated as read-only.
+"""
+import sys
+import threading
+import weakref
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from src.models import ChatParticipant
+
+# Longer strings are unlikely to repeat (and interning them would pin memory)
+MAX_INTERN_LENGTH = 200
+
+
+class Interner:
+    """Identity map for strings and chat participants."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._participants: "weakref.WeakValueDictionary[tuple, ChatParticipant]" = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self.stats: Counter = Counter()
+
+    def str(self, value: Any) -> Any:
+        """Interned copy of a short string (other values unchanged)."""
+        if self.enabled and type(value) is str and len(value) <= MAX_INTERN_LENGTH:
+            return sys.intern(value)
+        return value
+
+    def participant(
+        self,
+        attendee_id: Optional[str] = None,
+        attendee_provider_id: Optional[str] = None,
+        name: Optional[str] = None,
+        profile_url: Optional[str] = None,
+        profile_picture_url: Optional[str] = None,
+    ) -> ChatParticipant:
+        """Shared ChatParticipant for these field values."""
+        fields = (
+            self.str(attendee_id),
+            self.str(attendee_provider_id),
+            self.str(name),
+            self.str(profile_url),
+            profile_picture_url,  # Signed URLs: long and rarely repeated verbatim
+        )
+        if not self.enabled:
+            return ChatParticipant(
+                attendee_id=fields[0],
+                attendee_provider_id=fields[1],
+                name=fields[2],
+                profile_url=fields[3],
+                profile_picture_url=fields[4],
+            )
+
+        with self._lock:
+            participant = self._participants.get(fields)
+            if participant is not None:
+                self.stats["participant_hits"] += 1
+                return participant
+            participant = ChatParticipant(
+                attendee_id=fields[0],
+                attendee_provider_id=fields[1],
+                name=fields[2],
+                profile_url=fields[3],
+                profile_picture_url=fields[4],
+            )
+            self._participants[fields] = participant
+            self.stats["participants"] += 1
+            return participant
+
+    def info(self) -> Dict[str, int]:
+        with self._lock:
+            return {"live_participants": len(self._participants), **self.stats}
+
+
+# One identity map per process
+INTERNER = Interner()
@@ -0,0 +1,58 @@
+"""
+Correlation ids for structured logs.
+
+A correlation id ties together all log records of one logical operation
+(a sweep, a send, a CLI run), including every API request it makes.
+It lives in a context variable, so it follows the code path without
+being passed around; worker threads get it via wrap().
+"""
+import contextvars
+import logging
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+_correlation_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "correlation_id", default=None
+)
+
+
+def new_id() -> str:
+    """Short random id for correlation and request ids."""
+    return uuid.uuid4().hex[:16]
+
+
+def get_correlation_id() -> Optional[str]:
+    return _correlation_id.get()
+
+
+@contextmanager
+def correlation(correlation_id: Optional[str] = None) -> Iterator[str]:
+    """
+    Run a block under a correlation id (a new one unless given).
+
+    Usage:
+        with correlation():
+            index.sync_account(client, account_id)
+    """
+    correlation_id = correlation_id or new_id()
+    token = _correlation_id.set(correlation_id)
+    try:
+        yield correlation_id
+    finally:
+        _correlation_id.reset(token)
+
+
+def wrap(fn: Callable) -> Callable:
+    """Bind fn to the current context (for executor.submit / threads)."""
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
+
+
+class CorrelationFilter(logging.Filter):
+    """Attach the current correlation id to each record (record.correlation_id)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "correlation_id", None) is None:
+            record.correlation_id = _correlation_id.get()
+        return True
@@ -4,6 +4,8 @@ UniPile Messenger - Main interactive application.
 LinkedIn messaging via UniPile API with Rich terminal UI.
 """
 import sys
+import time
+import argparse
 from pathlib import Path
 
 # Add project root to path
@@ -13,12 +15,17 @@ from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
 from rich.text import Text
+from rich.markup import escape
 from rich import box
 import questionary
 from questionary import Style
 
 from src.unipile_client import UniPileClient, UniPileError
 from src.config import Config
+from src.send_ledger import SendLedger
+from src.chat_index import ChatIndex
+from src.near_duplicates import NearDuplicateIndex
+from src.profiling import add_profile_arguments, start_profile
 
 console = Console()
 
@@ -61,6 +68,14 @@ def pause():
     input()
 
 
+def show_profile(summary: dict):
+    """Display the --profile summary on exit: time per phase and the files written."""
+    phases = ", ".join(f"{name} {stats['seconds']:.2f}s" for name, stats in summary["phases"].items())
+    console.print(f"\n[dim]Profile: {summary['wall_seconds']:.2f}s wall ({phases or 'no phases'})[/dim]")
+    for path in summary["files"]:
+        console.print(f"[dim]Profile written: {path}[/dim]")
+
+
 def list_accounts_menu(client: UniPileClient):
     """Display connected accounts."""
     show_header()
@@ -124,6 +139,53 @@ def select_account(client: UniPileClient) -> str | None:
         return None
 
 
+def select_chat(client: UniPileClient) -> str | None:
+    """Let user find a chat by person (chat index) or enter a Chat ID."""
+    mode = questionary.select(
+        "Choose chat:",
+        choices=["Find by person", "Enter Chat ID"],
+        style=custom_style,
+    ).ask()
+
+    if mode != "Find by person":
+        return questionary.text("Enter Chat ID:", style=custom_style).ask() if mode else None
+
+    query = questionary.text("Person name or provider ID:", style=custom_style).ask()
+    if not query:
+        return None
+
+    index = ChatIndex()
+    try:
+        matches = index.find(query)
+        if not matches:
+            # Unknown person or stale index: pick up chats started since the last sync
+            with console.status("[dim]Indexing chats...[/dim]"):
+                for account in client.list_accounts(usable_only=True):
+                    index.sync(client, account.id)
+            matches = index.find(query)
+    except UniPileError as e:
+        show_error(str(e))
+        return None
+    finally:
+        index.close()
+
+    if not matches:
+        show_error(f"No 1:1 chat found for '{query}'.")
+        return None
+
+    return questionary.select(
+        "Select chat:",
+        choices=[
+            questionary.Choice(
+                f"{m['name'] or m['attendee_provider_id']} ({m['chat_id'][:18]})",
+                value=m["chat_id"],
+            )
+            for m in matches
+        ],
+        style=custom_style,
+    ).ask()
+
+
 def view_conversations_menu(client: UniPileClient):
     """Display conversations for selected account."""
     show_header()
@@ -136,6 +198,11 @@ def view_conversations_menu(client: UniPileClient):
     try:
         chats, _ = client.list_chats(account_id, limit=20)
 
+        index = ChatIndex()
+        for chat in chats:
+            index.apply_chat(chat)
+        index.close()
+
         if not chats:
             console.print("[yellow]No conversations found.[/yellow]")
         else:
@@ -180,11 +247,7 @@ def view_messages_menu(client: UniPileClient):
     show_header()
     console.print("[bold]View Messages[/bold]\n")
 
-    # Get chat ID from user
-    chat_id = questionary.text(
-        "Enter Chat ID:",
-        style=custom_style,
-    ).ask()
+    chat_id = select_chat(client)
 
     if not chat_id:
         return
@@ -200,7 +263,11 @@ def view_messages_menu(client: UniPileClient):
             for msg in reversed(messages):  # Show oldest first
                 sender = msg.sender_name or "Unknown"
                 direction = "[bold cyan]You[/bold cyan]" if msg.is_sender else f"[bold]{sender}[/bold]"
-                text = msg.text or "[attachment]"
+                text = msg.text or ""
+                if msg.attachments:
+                    files = ", ".join(escape(att.label) for att in msg.attachments)
+                    text = f"{text} [dim]📎 {files}[/dim]".strip()
+                text = text or "[attachment]"
 
                 timestamp = ""
                 if msg.timestamp:
@@ -220,11 +287,7 @@ def send_message_menu(client: UniPileClient):
     show_header()
     console.print("[bold]Send Message[/bold]\n")
 
-    # Get chat ID
-    chat_id = questionary.text(
-        "Enter Chat ID:",
-        style=custom_style,
-    ).ask()
+    chat_id = select_chat(client)
 
     if not chat_id:
         return
@@ -253,12 +316,32 @@ def send_message_menu(client: UniPileClient):
         pause()
         return
 
+    near_duplicates = NearDuplicateIndex()
+    ledger = SendLedger(near_duplicates=near_duplicates)
     try:
-        result = client.send_message(chat_id, message)
-        show_success(f"Message sent! ID: {result.id}")
+        record = ledger.send_message(client, chat_id, message)
+        if record.duplicate and record.status == "sent":
+            sent_at = record.updated_at.astimezone().strftime("%Y-%m-%d %H:%M") if record.updated_at else "earlier"
+            again = questionary.confirm(
+                f"This exact message was already sent to this chat ({sent_at}). Send it again?",
+                style=custom_style,
+                default=False,
+            ).ask()
+            if again:
+                # A fresh campaign id makes this a new ledger entry (still deduped against retries)
+                record = ledger.send_message(client, chat_id, message, campaign_id=f"repeat-{time.time():.0f}")
+        if record.duplicate and record.status == "sent":
+            console.print("[yellow]Not sent again.[/yellow]")
+        elif record.duplicate:
+            console.print("[yellow]This message is still being sent by another session — not sent again.[/yellow]")
+        else:
+            show_success(f"Message sent! ID: {record.message_id}")
 
     except UniPileError as e:
         show_error(str(e))
+    finally:
+        ledger.close()
+        near_duplicates.close()
 
     pause()
 
@@ -305,6 +388,10 @@ def main_menu():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UniPile Messenger - interactive LinkedIn messaging")
+    add_profile_arguments(parser)
+    start_profile(parser.parse_args(), "main", report=show_profile)
+
     try:
         main_menu()
     except KeyboardInterrupt:
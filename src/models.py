@@ -13,6 +13,7 @@ class Account(BaseModel):
     provider: str = Field(default="LINKEDIN")
     name: Optional[str] = None
     identifier: Optional[str] = None  # email or username
+    provider_user_id: Optional[str] = None  # The seat's own provider id (e.g. LinkedIn member id)
     status: str = "OK"  # OK, CREDENTIALS_REQUIRED, etc.
     created_at: Optional[datetime] = None
 
@@ -40,6 +41,7 @@ class Chat(BaseModel):
     attendees: List[ChatParticipant] = []
     last_message_text: Optional[str] = None
     last_message_timestamp: Optional[datetime] = None
+    last_message_is_sender: Optional[bool] = None  # None when the API doesn't say
     unread_count: int = 0
     is_group: bool = False
 
@@ -47,17 +49,35 @@ class Chat(BaseModel):
         populate_by_name = True
 
 
+class Attachment(BaseModel):
+    """File or media attached to a message."""
+
+    id: Optional[str] = None
+    type: Optional[str] = None  # img, video, audio, file, linkedin_post, ...
+    file_name: Optional[str] = None
+    file_size: Optional[int] = None
+    mimetype: Optional[str] = None
+    url: Optional[str] = None
+    unavailable: bool = False
+
+    @property
+    def label(self) -> str:
+        """Short display label, e.g. "report.pdf" or "[img]"."""
+        return self.file_name or f"[{self.type or 'attachment'}]"
+
+
 class Message(BaseModel):
     """Individual message in a chat."""
 
     id: str
     chat_id: Optional[str] = None
+    provider_id: Optional[str] = None  # Provider's message id (same for every seat in the chat)
     sender_id: Optional[str] = None
     sender_name: Optional[str] = None
     text: Optional[str] = None
     timestamp: Optional[datetime] = None
     is_sender: bool = False  # True if sent by the connected account
-    attachments: List[Any] = []
+    attachments: List[Attachment] = []
 
     class Config:
         populate_by_name = True
@@ -74,6 +94,23 @@ class Connection(BaseModel):
     profile_picture_url: Optional[str] = None
 
 
+class SendRecord(BaseModel):
+    """Entry of the local send ledger (one per idempotency key)."""
+
+    key: str
+    account_id: str
+    recipient: str  # "user:<provider_id>" or "chat:<chat_id>"
+    campaign_id: Optional[str] = None
+    status: str = "pending"  # pending, sent, failed
+    chat_id: Optional[str] = None
+    message_id: Optional[str] = None
+    attempts: int = 0
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    duplicate: bool = False  # True if this call did not send (already sent / in flight)
+
+
 class APIResponse(BaseModel):
     """Generic API response wrapper."""
 
@@ -0,0 +1,294 @@
+"""
+Near-duplicate detection for outbound messages (MinHash + LSH).
+
+Every sent text is reduced to a MinHash signature of 128 values over its
+character 5-gram shingles (case and whitespace normalized). Signatures use
+one-permutation hashing: one hash per shingle, split into 128 bins, with
+empty bins filled by densification, so a signature costs one pass over
+the text instead of 128. Two texts agree on about J of the values, where
+J is the Jaccard similarity of their shingle sets.
+
+Two lookups answer "was something this similar sent already":
+- recipient: everything sent to that recipient (SQLite index on
+  recipient), compared directly; a recipient gets few messages
+- recent: an in-memory LSH index over the messages sent within the
+  window. Signatures are cut into 16 bands of 8 values and texts sharing a
+  band are candidates (> 99.9% of pairs at J = 0.9 share one, ~6% at
+  J = 0.5); only candidates are compared
+
+State lives in data/near_duplicates.db and is updated on every send
+(SendLedger(near_duplicates=...)); backfill() adds sent messages from the
+API for history from before the index existed.
+"""
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from array import array
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from src.config import Config
+from src.timeline import chat_stream, iter_chats
+
+DEFAULT_DB_PATH = Config.DATA_DIR / "near_duplicates.db"
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sent_texts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    account_id TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    message_id TEXT,
+    sent_at REAL NOT NULL,
+    signature BLOB NOT NULL,
+    excerpt TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sent_texts_recipient ON sent_texts (recipient);
+CREATE INDEX IF NOT EXISTS idx_sent_texts_sent_at ON sent_texts (sent_at);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sent_texts_message
+    ON sent_texts (message_id) WHERE message_id IS NOT NULL;
+"""
+
+# Densification: an empty bin copies the first non-empty bin of its own
+# fixed pseudo-random probe sequence (the same for every text)
+_rng = random.Random(0x5EED)
+_PROBES = [[_rng.randrange(NUM_PERM) for _ in range(32)] for _ in range(NUM_PERM)]
+_BIN_SHIFT = 32 - (NUM_PERM - 1).bit_length()
+_VALUE_MASK = (1 << _BIN_SHIFT) - 1
+
+
+def signature(text: Optional[str]) -> Optional[array]:
+    """MinHash signature (NUM_PERM uint32 values) of a text, None if it has no content."""
+    norm = " ".join((text or "").casefold().split())
+    if not norm:
+        return None
+    bins: List[Optional[int]] = [None] * NUM_PERM
+    for i in range(max(len(norm) - SHINGLE + 1, 1)):
+        h = zlib.crc32(norm[i:i + SHINGLE].encode("utf-8"))
+        b, value = h >> _BIN_SHIFT, h & _VALUE_MASK
+        current = bins[b]
+        if current is None or value < current:
+            bins[b] = value
+
+    sig = array("I", bytes(4 * NUM_PERM))
+    for b in range(NUM_PERM):
+        value = bins[b]
+        if value is None:
+            for probe in _PROBES[b]:
+                value = bins[probe]
+                if value is not None:
+                    break
+            else:
+                value = next(v for v in bins[b:] + bins[:b] if v is not None)
+        sig[b] = value
+    return sig
+
+
+def similarity(a: array, b: array) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def band_keys(sig: array) -> List[int]:
+    return [hash((band, sig[band * ROWS:(band + 1) * ROWS].tobytes())) for band in range(BANDS)]
+
+
+class Match(NamedTuple):
+    similarity: float
+    scope: str  # "recipient" (sent to the same recipient) or "recent" (anyone, within the window)
+    account_id: str
+    recipient: str
+    sent_at: float
+    message_id: Optional[str]
+    excerpt: Optional[str]
+
+
+class NearDuplicateIndex:
+    """Similarity index over sent texts, per recipient and recent (SQLite + in-memory LSH, thread-safe)."""
+
+    def __init__(
+        self,
+        db_path: Path = DEFAULT_DB_PATH,
+        threshold: float = Config.NEAR_DUPLICATE_THRESHOLD,
+        window_days: float = Config.NEAR_DUPLICATE_WINDOW_DAYS,
+    ):
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path), timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self.threshold = threshold
+        self.window = window_days * 86400
+        self._lock = threading.Lock()
+
+        # Recent window: id -> row, band key -> ids, ids in insertion order for expiry
+        self._recent: Dict[int, tuple] = {}
+        self._buckets: Dict[int, set] = {}
+        self._order: deque = deque()
+        self._last_id = 0
+        self._loaded = False
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ==================== QUERIES ====================
+
+    def check(
+        self,
+        text: str,
+        recipient: Optional[str] = None,
+        account_id: Optional[str] = None,
+        recent: bool = True,
+        now: Optional[float] = None,
+    ) -> List[Match]:
+        """
+        Sent messages at least `threshold` similar to a draft, most similar first.
+
+        Args:
+            text: Draft text
+            recipient: "user:<provider_id>" or "chat:<chat_id>"; checks everything
+                ever sent to it (from any account)
+            account_id: Limit the recent check to this account
+            recent: Also check messages sent to anyone within the window
+            now: Current epoch time (default: time.time())
+        """
+        sig = signature(text)
+        if sig is None:
+            return []
+        now = time.time() if now is None else now
+        matches: Dict[int, Match] = {}
+
+        with self._lock:
+            if recipient:
+                rows = self.conn.execute(
+                    "SELECT * FROM sent_texts WHERE recipient = ?", (recipient,)
+                ).fetchall()
+                for row in rows:
+                    score = similarity(sig, array("I", row["signature"]))
+                    if score >= self.threshold:
+                        matches[row["id"]] = self._match(row, score, "recipient")
+
+            if recent:
+                self._refresh(now)
+                candidates = set()
+                for key in band_keys(sig):
+                    candidates.update(self._buckets.get(key, ()))
+                for entry_id in candidates:
+                    if entry_id in matches:
+                        continue
+                    row, entry_sig = self._recent[entry_id]
+                    if row["sent_at"] < now - self.window or (account_id and row["account_id"] != account_id):
+                        continue
+                    score = similarity(sig, entry_sig)
+                    if score >= self.threshold:
+                        matches[entry_id] = self._match(row, score, "recent")
+
+        return sorted(matches.values(), key=lambda m: (-m.similarity, -m.sent_at))
+
+    def count(self) -> tuple[int, int]:
+        """Returns (texts indexed, texts in the recent window)."""
+        with self._lock:
+            self._refresh(time.time())
+            total = self.conn.execute("SELECT COUNT(*) FROM sent_texts").fetchone()[0]
+            return total, len(self._recent)
+
+    # ==================== UPDATES ====================
+
+    def add(
+        self,
+        text: str,
+        account_id: str,
+        recipient: str,
+        message_id: Optional[str] = None,
+        sent_at: Optional[float] = None,
+    ) -> bool:
+        """Index a sent text. Returns False if it has no content or the message is indexed already."""
+        sig = signature(text)
+        if sig is None:
+            return False
+        excerpt = " ".join(text.split())[:120]
+        with self._lock:
+            cur = self.conn.execute(
+                "INSERT OR IGNORE INTO sent_texts (account_id, recipient, message_id, sent_at, signature, excerpt) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (account_id, recipient, message_id or None,
+                 time.time() if sent_at is None else sent_at, sig.tobytes(), excerpt),
+            )
+            self.conn.commit()
+        return cur.rowcount > 0
+
+    def backfill(self, client, account_id: str, since: float, page_size: int = 50) -> int:
+        """
+        Index messages sent by an account since a time (1:1 chats as user:<id>, others as chat:<id>).
+
+        Returns:
+            Number of texts added
+        """
+        added = 0
+        for chat in iter_chats(client, account_id, page_size=page_size):
+            last = chat.last_message_timestamp
+            if last is not None and last.timestamp() < since:
+                break  # Chats come most recently active first
+            ids = {a.attendee_provider_id for a in chat.attendees if a.attendee_provider_id}
+            recipient = f"user:{ids.pop()}" if not chat.is_group and len(ids) == 1 else f"chat:{chat.id}"
+            for entry in chat_stream(client, chat, since, page_size):
+                message = entry.message
+                if message.is_sender and message.text:
+                    added += self.add(message.text, account_id, recipient, message.id, entry.ts)
+        return added
+
+    # ==================== INTERNAL ====================
+
+    def _refresh(self, now: float) -> None:
+        """Pull texts added since the last refresh (by any process) and expire old ones."""
+        cutoff = now - self.window
+        if not self._loaded:
+            row = self.conn.execute(
+                "SELECT COALESCE(MIN(id) - 1, (SELECT COALESCE(MAX(id), 0) FROM sent_texts)) "
+                "FROM sent_texts WHERE sent_at >= ?",
+                (cutoff,),
+            ).fetchone()
+            self._last_id = row[0]
+            self._loaded = True
+        rows = self.conn.execute(
+            "SELECT * FROM sent_texts WHERE id > ? ORDER BY id", (self._last_id,)
+        ).fetchall()
+        for row in rows:
+            self._last_id = row["id"]
+            if row["sent_at"] < cutoff:
+                continue
+            sig = array("I", row["signature"])
+            self._recent[row["id"]] = (row, sig)
+            for key in band_keys(sig):
+                self._buckets.setdefault(key, set()).add(row["id"])
+            self._order.append(row["id"])
+
+        # Expire in insertion order; a backfilled (older) text is dropped once it reaches the front
+        while self._order and self._recent[self._order[0]][0]["sent_at"] < cutoff:
+            entry_id = self._order.popleft()
+            _, sig = self._recent.pop(entry_id)
+            for key in band_keys(sig):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(entry_id)
+                    if not bucket:
+                        del self._buckets[key]
+
+    @staticmethod
+    def _match(row: sqlite3.Row, score: float, scope: str) -> Match:
+        return Match(
+            similarity=score,
+            scope=scope,
+            account_id=row["account_id"],
+            recipient=row["recipient"],
+            sent_at=row["sent_at"],
+            message_id=row["message_id"],
+            excerpt=row["excerpt"],
+        )
@@ -0,0 +1,379 @@
+"""
+Staged pipelines connected by bounded queues.
+
+A pipeline is a source iterable followed by stages, each with its own
+worker threads and a bounded input queue:
+
+    source -> [q] fetch -> [q] model -> [q] filter -> [q] sink
+
+When a stage falls behind, its input queue fills up and the stage in
+front of it blocks on put, which in turn fills that stage's input queue:
+backpressure flows upstream to the source, so a slow sink throttles the
+network instead of memory growing, and a slow network leaves the sink
+idle instead of blocking it.
+
+Stages keep item order when they run with one worker (the default);
+with more workers items can be reordered. A stage can charge its time
+to a --profile phase (network, parse, model, render).
+
+Per-stage stats: items in/out, throughput, time busy in the stage
+function, time blocked on a full downstream queue (backpressure), time
+starved on an empty input queue, and input queue depth (average, max).
+"""
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from src.profiling import phase as profile_phase
+
+DEFAULT_QUEUE_SIZE = 64
+POLL_INTERVAL = 0.1  # Seconds between stop checks while blocked on a queue
+
+_END = object()  # End-of-stream marker, one per downstream worker
+
+
+class PipelineStopped(Exception):
+    """Raised inside stage workers when the pipeline is stopped."""
+
+
+class _Stage:
+    def __init__(
+        self,
+        name: str,
+        fn: Callable,
+        kind: str,
+        workers: int,
+        queue_size: int,
+        on_error: Optional[Callable[[Any, Exception], None]],
+    ):
+        self.name = name
+        self.fn = fn
+        self.kind = kind  # map, flat_map, filter, sink
+        self.workers = max(1, workers)
+        self.inbox: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self.on_error = on_error
+        self.lock = threading.Lock()
+        self.finished = 0
+        self.items_in = 0
+        self.items_out = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.starved = 0.0
+        self.depth_sum = 0
+        self.depth_max = 0
+
+
+class Pipeline:
+    """
+    Source -> stages -> sink, each stage on its own threads.
+
+    Example:
+        stats = (
+            Pipeline("list_chats", client.iter_pages("/chats", params))
+            .flat_map("model", lambda page: [client.parse_chat(i, account_id) for i in page])
+            .filter("unread", lambda chat: chat.unread_count > 0)
+            .sink("render", add_row)
+            .run()
+        )
+    """
+
+    def __init__(self, name: str, source: Iterable, queue_size: int = DEFAULT_QUEUE_SIZE):
+        """
+        Args:
+            name: Pipeline name (shown in stats)
+            source: Iterable producing the first items (runs on its own thread)
+            queue_size: Default bound of each stage's input queue
+        """
+        self.name = name
+        self.source = source
+        self.queue_size = queue_size
+        self.stages: List[_Stage] = []
+        self._source_stats = _Stage("source", None, "source", 1, 1, None)
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._started_at = 0.0
+        self._elapsed = 0.0
+
+    # ==================== BUILDING ====================
+
+    def map(self, name: str, fn: Callable[[Any], Any], workers: int = 1,
+            queue_size: Optional[int] = None, on_error=None, phase=None) -> "Pipeline":
+        """One output item per input item."""
+        return self._add(name, fn, "map", workers, queue_size, on_error, phase)
+
+    def flat_map(self, name: str, fn: Callable[[Any], Iterable], workers: int = 1,
+                 queue_size: Optional[int] = None, on_error=None, phase=None) -> "Pipeline":
+        """Any number of output items per input item (emitted as they are produced)."""
+        return self._add(name, fn, "flat_map", workers, queue_size, on_error, phase)
+
+    def filter(self, name: str, predicate: Callable[[Any], bool], workers: int = 1,
+               queue_size: Optional[int] = None, on_error=None, phase=None) -> "Pipeline":
+        """Keep items for which predicate(item) is true."""
+        return self._add(name, predicate, "filter", workers, queue_size, on_error, phase)
+
+    def sink(self, name: str, fn: Callable[[Any], None], workers: int = 1,
+             queue_size: Optional[int] = None, on_error=None, phase=None) -> "Pipeline":
+        """Consume items (last stage)."""
+        return self._add(name, fn, "sink", workers, queue_size, on_error, phase)
+
+    def _add(self, name, fn, kind, workers, queue_size, on_error, phase) -> "Pipeline":
+        if self.stages and self.stages[-1].kind == "sink":
+            raise ValueError(f"Pipeline {self.name!r} already ends in sink {self.stages[-1].name!r}")
+        if phase is not None:
+            fn = _phased(fn, phase, kind == "flat_map")
+        self.stages.append(_Stage(
+            name, fn, kind, workers,
+            queue_size if queue_size is not None else self.queue_size,
+            on_error,
+        ))
+        return self
+
+    # ==================== RUNNING ====================
+
+    def stop(self) -> None:
+        """Stop early (e.g. from a sink once enough items were seen)."""
+        self._stop.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    @property
+    def elapsed(self) -> float:
+        """Wall seconds of the run (so far, while it is still running)."""
+        if self._elapsed or not self._started_at:
+            return self._elapsed
+        return time.perf_counter() - self._started_at
+
+    def run(self) -> List[Dict[str, Any]]:
+        """
+        Run until the source is exhausted and every stage has drained.
+
+        Returns:
+            Per-stage stats (see stats())
+
+        Raises:
+            The first exception raised by a stage without on_error
+        """
+        if not self.stages or self.stages[-1].kind != "sink":
+            raise ValueError(f"Pipeline {self.name!r} needs a sink as its last stage")
+
+        self._started_at = time.perf_counter()
+        threads = [threading.Thread(target=self._run_source, name=f"{self.name}-source", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._run_stage, args=(index,), name=f"{self.name}-{stage.name}-{n}", daemon=True,
+                ))
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(POLL_INTERVAL)
+        except KeyboardInterrupt:
+            self._stop.set()
+            raise
+        finally:
+            self._elapsed = time.perf_counter() - self._started_at
+
+        if self._error is not None:
+            raise self._error
+        return self.stats()
+
+    def _run_source(self) -> None:
+        stats = self._source_stats
+        first = self.stages[0]
+        iterator = None
+        try:
+            iterator = iter(self.source)
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                self._busy(stats, started)
+                stats.items_out += 1
+                if not self._put(first.inbox, item, stats):
+                    break
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()  # Let generators release connections/files when stopped early
+            self._end(first)
+
+    def _run_stage(self, index: int) -> None:
+        stage = self.stages[index]
+        downstream = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        try:
+            while True:
+                item = self._get(stage)
+                if item is _END:
+                    break
+                try:
+                    self._process(stage, downstream, item)
+                except PipelineStopped:
+                    break
+                except Exception as e:
+                    with stage.lock:
+                        stage.errors += 1
+                    if stage.on_error is None:
+                        raise
+                    stage.on_error(item, e)
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            with stage.lock:
+                stage.finished += 1
+                last = stage.finished == stage.workers
+            if last and downstream is not None:
+                self._end(downstream)
+
+    def _process(self, stage: _Stage, downstream: Optional[_Stage], item: Any) -> None:
+        started = time.perf_counter()
+        if stage.kind == "flat_map":
+            for out in stage.fn(item):
+                self._busy(stage, started)
+                self._emit(stage, downstream, out)
+                started = time.perf_counter()
+            self._busy(stage, started)
+            return
+
+        result = stage.fn(item)
+        self._busy(stage, started)
+        if stage.kind == "map":
+            self._emit(stage, downstream, result)
+        elif stage.kind == "filter":
+            if result:
+                self._emit(stage, downstream, item)
+        else:
+            with stage.lock:
+                stage.items_out += 1
+
+    @staticmethod
+    def _busy(stage: _Stage, started: float) -> None:
+        with stage.lock:
+            stage.busy += time.perf_counter() - started
+
+    def _emit(self, stage: _Stage, downstream: _Stage, item: Any) -> None:
+        with stage.lock:
+            stage.items_out += 1
+        if not self._put(downstream.inbox, item, stage):
+            raise PipelineStopped()
+
+    # ==================== QUEUES ====================
+
+    def _put(self, inbox: queue.Queue, item: Any, stats: _Stage) -> bool:
+        """Put with backpressure; False if the pipeline stopped while waiting."""
+        started = time.perf_counter()
+        try:
+            while True:
+                try:
+                    inbox.put(item, timeout=POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    if self._stop.is_set():
+                        return False
+        finally:
+            with stats.lock:
+                stats.blocked += time.perf_counter() - started
+
+    def _get(self, stage: _Stage) -> Any:
+        started = time.perf_counter()
+        while True:
+            if self._stop.is_set():
+                item = _END  # Stopped: drop what is still queued
+                break
+            try:
+                item = stage.inbox.get(timeout=POLL_INTERVAL)
+                break
+            except queue.Empty:
+                pass
+        depth = stage.inbox.qsize()
+        with stage.lock:
+            stage.starved += time.perf_counter() - started
+            if item is not _END:
+                stage.items_in += 1
+                stage.depth_sum += depth
+                stage.depth_max = max(stage.depth_max, depth)
+        return item
+
+    def _end(self, stage: _Stage) -> None:
+        """Signal end of stream to every worker of a stage."""
+        for _ in range(stage.workers):
+            if not self._put(stage.inbox, _END, self._source_stats if stage is self.stages[0] else stage):
+                return
+
+    def _fail(self, error: BaseException) -> None:
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    # ==================== STATS ====================
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        Per-stage stats (source first).
+
+        Keys: stage, workers, queue_size, items_in, items_out, errors,
+        per_second (items out per second of the run), busy_seconds,
+        blocked_seconds, starved_seconds, avg_depth, max_depth.
+        Times are summed over the stage's workers.
+        """
+        elapsed = self.elapsed
+        rows = []
+        for stage in [self._source_stats] + self.stages:
+            with stage.lock:
+                rows.append({
+                    "stage": stage.name,
+                    "workers": stage.workers,
+                    "queue_size": stage.inbox.maxsize if stage.kind != "source" else 0,
+                    "items_in": stage.items_in,
+                    "items_out": stage.items_out,
+                    "errors": stage.errors,
+                    "per_second": round(stage.items_out / elapsed, 1) if elapsed else 0.0,
+                    "busy_seconds": round(stage.busy, 3),
+                    "blocked_seconds": round(stage.blocked, 3),
+                    "starved_seconds": round(stage.starved, 3),
+                    "avg_depth": round(stage.depth_sum / stage.items_in, 1) if stage.items_in else 0.0,
+                    "max_depth": stage.depth_max,
+                })
+        return rows
+
+
+def _phased(fn: Callable, name: str, iterates: bool) -> Callable:
+    """Charge calls of fn (or each step of the iterable it returns) to a profile phase."""
+    if not iterates:
+        def call(item):
+            with profile_phase(name):
+                return fn(item)
+        return call
+
+    def steps(item) -> Iterator[Any]:
+        with profile_phase(name):
+            iterator = iter(fn(item))
+        while True:
+            with profile_phase(name):
+                try:
+                    out = next(iterator)
+                except StopIteration:
+                    return
+            yield out
+    return steps
+
+
+# ==================== SCRIPT INTEGRATION ====================
+
+def add_pipeline_arguments(parser) -> None:
+    """Add --pipeline-stats to an argparse parser."""
+    parser.add_argument(
+        "--pipeline-stats",
+        action="store_true",
+        help="Print per-stage throughput, backpressure and queue depth to stderr",
+    )
+
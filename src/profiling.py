@@ -0,0 +1,362 @@
+"""
+Profiling hooks for script runs.
+
+Enabled per run with --profile (see add_profile_arguments / start_profile).
+When no profile is active every hook is a cheap no-op.
+
+A profile captures:
+- wall-clock time by phase: network (HTTP round trips), parse (JSON
+  decoding), model (Pydantic construction), render (Rich/JSONL output);
+  phases are exclusive, nested time is charged to the innermost phase
+- sampled stacks of all threads (wall-clock sampling, so time blocked on
+  the network shows up too), written as collapsed stacks (flamegraph.pl,
+  speedscope, inferno) and as a speedscope JSON file
+- optionally (--profile-memory) tracemalloc snapshots: top allocation
+  sites at the end of the run and the peak traced memory
+- counters of components that registered a stats source while the
+  profile was active (register_stats), e.g. HTTP cache hits
+"""
+import atexit
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from src.config import Config, PROJECT_ROOT
+
+PHASES = ("network", "parse", "model", "render")
+DEFAULT_PROFILE_DIR = Config.OUTPUTS_DIR / "profiles"
+DEFAULT_INTERVAL = 0.005  # Seconds between stack samples (200 Hz)
+
+_active: Optional["Profiler"] = None
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Charge the wall time of a block to a phase (no-op unless profiling)."""
+    profiler = _active
+    if profiler is None:
+        yield
+        return
+    profiler.enter(name)
+    try:
+        yield
+    finally:
+        profiler.exit()
+
+
+def register_stats(name: str, source: Callable[[], Dict[str, Any]]) -> None:
+    """Report source() under `name` in the profile summary (no-op unless profiling)."""
+    profiler = _active
+    if profiler is not None:
+        profiler.stats_sources.append((name, source))
+
+
+def timed(name: str):
+    """Decorator form of phase()."""
+    def decorator(fn):
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return fn(*args, **kwargs)
+        wrapper.__name__ = fn.__name__
+        wrapper.__doc__ = fn.__doc__
+        return wrapper
+    return decorator
+
+
+class PhaseTimer:
+    """Exclusive per-phase wall time, tracked per thread."""
+
+    def __init__(self):
+        self.totals: Dict[str, float] = defaultdict(float)
+        self.calls: Counter = Counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def enter(self, name: str) -> None:
+        stack = self._stack()
+        now = time.perf_counter()
+        if stack:
+            parent, started = stack[-1]
+            self._add(parent, now - started)
+        stack.append([name, now])
+        with self._lock:
+            self.calls[name] += 1
+
+    def exit(self) -> None:
+        stack = self._stack()
+        now = time.perf_counter()
+        name, started = stack.pop()
+        self._add(name, now - started)
+        if stack:
+            stack[-1][1] = now  # Resume the parent phase
+
+    def _stack(self) -> List[list]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.totals[name] += seconds
+
+
+class StackSampler:
+    """Background thread sampling the stacks of all other threads."""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self.samples: Counter = Counter()  # (thread name, stack tuple) -> seconds
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight, last = now - last, now
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples[(names.get(ident, str(ident)), tuple(stack))] += weight
+            self.sample_count += 1
+
+    def write_collapsed(self, path: Path) -> None:
+        """Brendan Gregg's collapsed format: 'thread;frame;frame <microseconds>'."""
+        with path.open("w", encoding="utf-8") as f:
+            for (thread, stack), seconds in self.samples.most_common():
+                f.write(f"{';'.join((thread,) + stack)} {max(1, round(seconds * 1e6))}\n")
+
+    def write_speedscope(self, path: Path, name: str, duration: float) -> None:
+        """speedscope 'sampled' profiles, one per thread (https://www.speedscope.app)."""
+        frame_index: Dict[str, int] = {}
+        frames = []
+        profiles: Dict[str, dict] = {}
+
+        for (thread, stack), seconds in self.samples.items():
+            indexes = []
+            for label in stack:
+                if label not in frame_index:
+                    frame_index[label] = len(frames)
+                    func, _, location = label.partition(" (")
+                    file, _, line = location.rstrip(")").rpartition(":")
+                    frames.append({"name": func, "file": file, "line": int(line) if line.isdigit() else None})
+                indexes.append(frame_index[label])
+            profile = profiles.setdefault(thread, {
+                "type": "sampled",
+                "name": thread,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(duration, 6),
+                "samples": [],
+                "weights": [],
+            })
+            profile["samples"].append(indexes)
+            profile["weights"].append(round(seconds, 6))
+
+        document = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "unipile-messenger",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": sorted(profiles.values(), key=lambda p: p["name"] != "MainThread"),
+        }
+        path.write_text(json.dumps(document), encoding="utf-8")
+
+
+_labels: Dict[object, str] = {}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    label = _labels.get(code)
+    if label is None:
+        label = _labels[code] = _code_label(code)
+    return label
+
+
+def _code_label(code) -> str:
+    filename = code.co_filename
+    try:
+        filename = str(Path(filename).relative_to(PROJECT_ROOT))
+    except ValueError:
+        # Library/stdlib code: keep the path from the package directory on
+        if "site-packages/" in filename:
+            filename = filename.split("site-packages/", 1)[1]
+        elif "/lib/python" in filename:
+            filename = filename.split("/lib/python", 1)[1].partition("/")[2]
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class Profiler:
+    """One profiled run: phase timer + stack sampler (+ tracemalloc)."""
+
+    def __init__(
+        self,
+        name: str,
+        out_dir: Path = DEFAULT_PROFILE_DIR,
+        interval: float = DEFAULT_INTERVAL,
+        memory: bool = False,
+    ):
+        self.name = name
+        self.out_dir = Path(out_dir)
+        self.timer = PhaseTimer()
+        self.sampler = StackSampler(interval)
+        self.memory = memory
+        self.started_at = 0.0
+        self.files: List[Path] = []
+        self.stats_sources: List[tuple[str, Callable[[], Dict[str, Any]]]] = []
+        self.enter = self.timer.enter
+        self.exit = self.timer.exit
+
+    def start(self) -> None:
+        global _active
+        if self.memory:
+            tracemalloc.start(25)
+        self.started_at = time.perf_counter()
+        self.sampler.start()
+        _active = self
+
+    def stop(self) -> Dict[str, object]:
+        """Stop profiling, write the output files and return a summary."""
+        global _active
+        _active = None
+        duration = time.perf_counter() - self.started_at
+        self.sampler.stop()
+
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        base = self.out_dir / f"{self.name}-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+        summary: Dict[str, object] = {
+            "name": self.name,
+            "wall_seconds": round(duration, 4),
+            "phases": {
+                name: {"seconds": round(seconds, 4), "calls": self.timer.calls[name]}
+                for name, seconds in sorted(self.timer.totals.items(), key=lambda kv: -kv[1])
+            },
+            "samples": self.sampler.sample_count,
+        }
+        stats: Dict[str, Dict[str, Any]] = {}
+        for source_name, source in self.stats_sources:
+            key, n = source_name, 1
+            while key in stats:  # Several instances (e.g. one client per thread)
+                n += 1
+                key = f"{source_name}#{n}"
+            stats[key] = source()
+        if stats:
+            summary["stats"] = stats
+
+        if self.memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            summary["memory"] = {"current_bytes": current, "peak_bytes": peak}
+            snapshot_path = base.with_suffix(".tracemalloc")
+            snapshot.dump(str(snapshot_path))
+            top_path = base.with_suffix(".tracemalloc.txt")
+            with top_path.open("w", encoding="utf-8") as f:
+                f.write(f"peak traced: {peak / 1e6:.1f} MB, current: {current / 1e6:.1f} MB\n\n")
+                for stat in snapshot.statistics("lineno")[:50]:
+                    f.write(f"{stat}\n")
+            self.files += [top_path, snapshot_path]
+
+        collapsed_path = base.with_suffix(".collapsed.txt")
+        speedscope_path = base.with_suffix(".speedscope.json")
+        phases_path = base.with_suffix(".phases.json")
+        self.sampler.write_collapsed(collapsed_path)
+        self.sampler.write_speedscope(speedscope_path, self.name, duration)
+        phases_path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        self.files = [phases_path, collapsed_path, speedscope_path] + self.files
+
+        summary["files"] = [str(p) for p in self.files]
+        return summary
+
+
+# ==================== SCRIPT INTEGRATION ====================
+
+def add_profile_arguments(parser) -> None:
+    """Add --profile / --profile-memory / --profile-dir to an argparse parser."""
+    group = parser.add_argument_group("profiling")
+    group.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write a sampled CPU profile and phase timings (network/parse/model/render)",
+    )
+    group.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="Also record tracemalloc allocation snapshots (slower; implies --profile)",
+    )
+    group.add_argument(
+        "--profile-dir",
+        type=Path,
+        default=DEFAULT_PROFILE_DIR,
+        help=f"Directory for profile files (default: {DEFAULT_PROFILE_DIR.relative_to(PROJECT_ROOT)})",
+    )
+
+
+def start_profile(
+    args,
+    name: str,
+    report: Optional[Callable[[Dict[str, object]], None]] = None,
+) -> Optional[Profiler]:
+    """
+    Start profiling if requested on the command line.
+
+    The profile is written when the process exits (also on sys.exit and
+    Ctrl+C), and its summary (see Profiler.stop) is passed to report,
+    e.g. to show it on stderr. While profiling, Rich console output is
+    charged to the "render" phase.
+    """
+    if not (getattr(args, "profile", False) or getattr(args, "profile_memory", False)):
+        return None
+
+    profiler = Profiler(name, out_dir=args.profile_dir, memory=args.profile_memory)
+    _instrument_rich()
+    profiler.start()
+    atexit.register(_finish, profiler, report)
+    return profiler
+
+
+def _finish(profiler: Profiler, report: Optional[Callable[[Dict[str, object]], None]]) -> None:
+    summary = profiler.stop()
+    if report is not None:
+        report(summary)
+
+
+_rich_instrumented = False
+
+
+def _instrument_rich() -> None:
+    """Charge Console.print / Console.log to the render phase (profiled runs only)."""
+    global _rich_instrumented
+    if _rich_instrumented:
+        return
+    from rich.console import Console
+
+    Console.print = timed("render")(Console.print)
+    Console.log = timed("render")(Console.log)
+    _rich_instrumented = True
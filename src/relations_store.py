@@ -0,0 +1,313 @@
+"""
+Local mirror of LinkedIn relations (connections) with indexed lookup.
+
+Relations are paged from UniPile into a SQLite file so contacts can be
+found offline:
+- hash lookup by provider id (primary key / index)
+- prefix lookup on normalized names (range scan on an index)
+- trigram lookup on names and headlines (inverted index table)
+"""
+import sqlite3
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.config import Config
+from src.models import Connection
+
+DEFAULT_DB_PATH = Config.DATA_DIR / "relations.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS relations (
+    account_id TEXT NOT NULL,
+    provider_id TEXT NOT NULL,
+    id TEXT,
+    name TEXT,
+    headline TEXT,
+    name_norm TEXT,
+    profile_url TEXT,
+    profile_picture_url TEXT,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (account_id, provider_id)
+);
+CREATE INDEX IF NOT EXISTS idx_relations_provider ON relations (provider_id);
+CREATE INDEX IF NOT EXISTS idx_relations_name ON relations (name_norm);
+
+CREATE TABLE IF NOT EXISTS relation_grams (
+    gram TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    provider_id TEXT NOT NULL,
+    PRIMARY KEY (gram, account_id, provider_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS relation_syncs (
+    account_id TEXT PRIMARY KEY,
+    started_at REAL,
+    completed_at REAL,
+    total INTEGER DEFAULT 0
+);
+"""
+
+
+def normalize(text: Optional[str]) -> str:
+    """Lowercase, strip diacritics and collapse whitespace ("Kraković" -> "krakovic")."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+def trigrams(text: str) -> set[str]:
+    """Trigrams of each word in normalized text, padded so short words still index."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+def relation_to_connection(item: Dict[str, Any]) -> Connection:
+    """Convert a raw UniPile relation item to a Connection model."""
+    name = f"{item.get('first_name') or ''} {item.get('last_name') or ''}".strip()
+    provider_id = item.get("member_id") or item.get("provider_id") or item.get("id")
+    return Connection(
+        id=item.get("connection_urn") or item.get("id") or provider_id or "",
+        provider_id=provider_id,
+        name=name or item.get("name"),
+        headline=item.get("headline"),
+        profile_url=item.get("public_profile_url") or item.get("profile_url"),
+        profile_picture_url=item.get("profile_picture_url"),
+    )
+
+
+class RelationsStore:
+    """SQLite-backed relations mirror with provider-id, prefix and trigram indexes."""
+
+    def __init__(self, db_path: Path = DEFAULT_DB_PATH):
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ==================== SYNC ====================
+
+    def sync(self, client, account_id: str, page_size: int = 100, on_page=None) -> int:
+        """
+        Page the full relation list of an account into the store.
+
+        Each page is committed as it arrives, so an interrupted sync keeps
+        its progress. Relations not seen during a completed sync are removed.
+
+        Args:
+            client: UniPileClient instance
+            account_id: UniPile account ID
+            page_size: Relations per API page
+            on_page: Optional callback(count_so_far) after each page
+
+        Returns:
+            Number of relations synced
+        """
+        started_at = time.time()
+        self.conn.execute(
+            "INSERT INTO relation_syncs (account_id, started_at) VALUES (?, ?) "
+            "ON CONFLICT(account_id) DO UPDATE SET started_at = excluded.started_at",
+            (account_id, started_at),
+        )
+        self.conn.commit()
+
+        total = 0
+        cursor = None
+        while True:
+            items, cursor = client.list_relations(account_id, limit=page_size, cursor=cursor)
+            connections = [relation_to_connection(item) for item in items]
+            total += self.upsert(account_id, connections, synced_at=started_at)
+            if on_page:
+                on_page(total)
+            if not cursor or not items:
+                break
+
+        # Drop relations that disappeared since the previous sync
+        stale = [
+            row["provider_id"] for row in self.conn.execute(
+                "SELECT provider_id FROM relations WHERE account_id = ? AND synced_at < ?",
+                (account_id, started_at),
+            )
+        ]
+        for provider_id in stale:
+            self._delete(account_id, provider_id)
+        self.conn.execute(
+            "UPDATE relation_syncs SET completed_at = ?, total = ? WHERE account_id = ?",
+            (time.time(), total, account_id),
+        )
+        self.conn.commit()
+        return total
+
+    def upsert(
+        self,
+        account_id: str,
+        connections: Iterable[Connection],
+        synced_at: Optional[float] = None,
+    ) -> int:
+        """Insert or update connections and their index entries. Returns count."""
+        synced_at = synced_at or time.time()
+        count = 0
+        for conn in connections:
+            if not conn.provider_id:
+                continue
+            name_norm = normalize(conn.name)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO relations (account_id, provider_id, id, name, headline, "
+                "name_norm, profile_url, profile_picture_url, synced_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    account_id, conn.provider_id, conn.id, conn.name, conn.headline,
+                    name_norm, conn.profile_url, conn.profile_picture_url, synced_at,
+                ),
+            )
+            self.conn.execute(
+                "DELETE FROM relation_grams WHERE account_id = ? AND provider_id = ?",
+                (account_id, conn.provider_id),
+            )
+            grams = trigrams(name_norm) | trigrams(normalize(conn.headline))
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO relation_grams (gram, account_id, provider_id) VALUES (?, ?, ?)",
+                [(g, account_id, conn.provider_id) for g in grams],
+            )
+            count += 1
+        self.conn.commit()
+        return count
+
+    def _delete(self, account_id: str, provider_id: str) -> None:
+        self.conn.execute(
+            "DELETE FROM relations WHERE account_id = ? AND provider_id = ?",
+            (account_id, provider_id),
+        )
+        self.conn.execute(
+            "DELETE FROM relation_grams WHERE account_id = ? AND provider_id = ?",
+            (account_id, provider_id),
+        )
+
+    # ==================== LOOKUP ====================
+
+    def get(self, provider_id: str, account_id: Optional[str] = None) -> List[Connection]:
+        """Exact lookup by provider id (one entry per account the person is connected to)."""
+        sql = "SELECT * FROM relations WHERE provider_id = ?"
+        args: list = [provider_id]
+        if account_id:
+            sql += " AND account_id = ?"
+            args.append(account_id)
+        return [self._row_to_connection(row) for row in self.conn.execute(sql, args)]
+
+    def find(
+        self,
+        query: str,
+        account_id: Optional[str] = None,
+        limit: int = 10,
+        min_score: float = 0.5,
+    ) -> List[tuple[Connection, str, float]]:
+        """
+        Find contacts by name or headline.
+
+        Name prefix matches rank first, followed by trigram matches on
+        names and headlines scored by the share of query trigrams matched.
+
+        Args:
+            query: Name, part of a name or headline keywords
+            account_id: Restrict to one account's relations
+            limit: Max results
+            min_score: Minimum trigram overlap (0-1) for fuzzy matches
+
+        Returns:
+            List of (connection, account_id, score) tuples, best first
+        """
+        q = normalize(query)
+        if not q:
+            return []
+
+        scores: Dict[tuple[str, str], float] = {}
+
+        # Prefix match on full normalized name (uses idx_relations_name)
+        sql = "SELECT account_id, provider_id FROM relations WHERE name_norm >= ? AND name_norm < ?"
+        args: list = [q, q + "\U0010ffff"]
+        if account_id:
+            sql += " AND account_id = ?"
+            args.append(account_id)
+        for row in self.conn.execute(sql + " LIMIT ?", args + [limit]):
+            scores[(row["account_id"], row["provider_id"])] = 2.0
+
+        # Trigram match on names and headlines
+        grams = trigrams(q)
+        if grams and len(scores) < limit:
+            placeholders = ",".join("?" * len(grams))
+            sql = (
+                f"SELECT account_id, provider_id, COUNT(*) AS hits FROM relation_grams "
+                f"WHERE gram IN ({placeholders})"
+            )
+            args = list(grams)
+            if account_id:
+                sql += " AND account_id = ?"
+                args.append(account_id)
+            sql += " GROUP BY account_id, provider_id HAVING hits >= ? ORDER BY hits DESC LIMIT ?"
+            args += [max(1, int(len(grams) * min_score + 0.999)), limit * 5]
+            for row in self.conn.execute(sql, args):
+                key = (row["account_id"], row["provider_id"])
+                if key not in scores:
+                    scores[key] = row["hits"] / len(grams)
+
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+        results = []
+        for (acc_id, provider_id), score in ranked:
+            row = self.conn.execute(
+                "SELECT * FROM relations WHERE account_id = ? AND provider_id = ?",
+                (acc_id, provider_id),
+            ).fetchone()
+            if row:
+                results.append((self._row_to_connection(row), acc_id, min(score, 1.0)))
+        return results
+
+    def count(self, account_id: Optional[str] = None) -> int:
+        """Number of stored relations."""
+        if account_id:
+            row = self.conn.execute(
+                "SELECT COUNT(*) FROM relations WHERE account_id = ?", (account_id,)
+            ).fetchone()
+        else:
+            row = self.conn.execute("SELECT COUNT(*) FROM relations").fetchone()
+        return row[0]
+
+    def last_sync(self, account_id: str) -> Optional[float]:
+        """Timestamp of the last completed sync for an account."""
+        row = self.conn.execute(
+            "SELECT completed_at FROM relation_syncs WHERE account_id = ?", (account_id,)
+        ).fetchone()
+        return row["completed_at"] if row else None
+
+    def completed_syncs(self) -> Dict[str, float]:
+        """Completion time of the last finished sync, per account."""
+        rows = self.conn.execute(
+            "SELECT account_id, completed_at FROM relation_syncs WHERE completed_at IS NOT NULL"
+        )
+        return {row["account_id"]: row["completed_at"] for row in rows}
+
+    def provider_ids(self, account_id: str) -> set[str]:
+        """Provider ids of all relations of an account."""
+        rows = self.conn.execute("SELECT provider_id FROM relations WHERE account_id = ?", (account_id,))
+        return {row["provider_id"] for row in rows}
+
+    @staticmethod
+    def _row_to_connection(row: sqlite3.Row) -> Connection:
+        return Connection(
+            id=row["id"] or row["provider_id"],
+            provider_id=row["provider_id"],
+            name=row["name"],
+            headline=row["headline"],
+            profile_url=row["profile_url"],
+            profile_picture_url=row["profile_picture_url"],
+        )
@@ -0,0 +1,270 @@
+"""
+Sender routing: which seat (account) should message a person.
+
+Relations (relations.db) and 1:1 chats (chat_index.db) of all seats are
+merged into one table of seat links, provider id -> seats connected to
+the person and/or with a chat with them, with the time of the last
+message. The best seat per person is precomputed into a routes table, so
+route() is one primary key lookup whatever the number of seats.
+
+Seats rank by:
+1. a conversation within ROUTING_RECENT_DAYS (most recent first)
+2. a connection (1st-degree relation)
+3. an older conversation (most recent first)
+
+refresh() is incremental: it re-reads chat mappings updated since the
+last refresh and the relations of accounts whose relation sync completed
+since, and re-routes only the people whose links changed.
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from src.config import Config
+
+DEFAULT_DB_PATH = Config.DATA_DIR / "routing.db"
+
+# Chat mappings are re-read with this overlap (seconds), so rows committed
+# late by a concurrent writer are not missed
+CHAT_MARK_OVERLAP = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seat_links (
+    provider_id TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    connected INTEGER NOT NULL DEFAULT 0,
+    chat_id TEXT,
+    last_message_at REAL,
+    PRIMARY KEY (provider_id, account_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_seat_links_account ON seat_links (account_id, connected);
+
+CREATE TABLE IF NOT EXISTS routes (
+    provider_id TEXT PRIMARY KEY,
+    account_id TEXT NOT NULL,
+    connected INTEGER NOT NULL,
+    chat_id TEXT,
+    last_message_at REAL,
+    seats INTEGER NOT NULL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_routes_account ON routes (account_id);
+
+CREATE TABLE IF NOT EXISTS routing_marks (
+    source TEXT PRIMARY KEY,
+    mark REAL NOT NULL
+);
+"""
+
+
+class Route(NamedTuple):
+    provider_id: str
+    account_id: str
+    connected: bool
+    chat_id: Optional[str]
+    last_message_at: Optional[float]
+    seats: int  # Seats linked to the person
+
+    def reason(self, recent_days: float = Config.ROUTING_RECENT_DAYS, now: Optional[float] = None) -> str:
+        now = time.time() if now is None else now
+        if self.last_message_at and self.last_message_at >= now - recent_days * 86400:
+            return "recent conversation"
+        if self.connected:
+            return "connection"
+        return "earlier conversation"
+
+
+class RoutingIndex:
+    """Merged seat links across accounts with the precomputed best seat per person (SQLite, thread-safe)."""
+
+    def __init__(self, db_path: Path = DEFAULT_DB_PATH, recent_days: float = Config.ROUTING_RECENT_DAYS):
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path), timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self.recent = recent_days * 86400
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ==================== LOOKUP ====================
+
+    def route(
+        self,
+        provider_id: str,
+        accounts: Optional[Iterable[str]] = None,
+        now: Optional[float] = None,
+    ) -> Optional[Route]:
+        """
+        Best seat to message a person, None if no seat knows them.
+
+        Args:
+            provider_id: Person's provider id
+            accounts: Seats currently available (default: any); the next best
+                available seat is returned when the best one is not
+            now: Current epoch time (default: time.time())
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM routes WHERE provider_id = ?", (provider_id,)).fetchone()
+            if row is not None and row["expires_at"] is not None and row["expires_at"] <= now:
+                # The conversation that made this seat best is no longer recent
+                self._reroute([provider_id], now)
+                self.conn.commit()
+                row = self.conn.execute("SELECT * FROM routes WHERE provider_id = ?", (provider_id,)).fetchone()
+        if row is None:
+            return None
+        available = set(accounts) if accounts is not None else None
+        if available is None or row["account_id"] in available:
+            return self._route(row, row["seats"])
+        return next((r for r in self.seats(provider_id, now) if r.account_id in available), None)
+
+    def seats(self, provider_id: str, now: Optional[float] = None) -> List[Route]:
+        """All seats linked to a person, best first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self.conn.execute("SELECT * FROM seat_links WHERE provider_id = ?", (provider_id,)).fetchall()
+        ranked = sorted(rows, key=lambda row: self._rank(row, now))
+        return [self._route(row, len(rows)) for row in ranked]
+
+    def count(self) -> tuple[int, int]:
+        """Returns (people routed, seat links)."""
+        with self._lock:
+            people = self.conn.execute("SELECT COUNT(*) FROM routes").fetchone()[0]
+            links = self.conn.execute("SELECT COUNT(*) FROM seat_links").fetchone()[0]
+        return people, links
+
+    def seat_counts(self) -> Dict[str, int]:
+        """People each seat is the best route to."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT account_id, COUNT(*) AS people FROM routes GROUP BY account_id ORDER BY people DESC"
+            ).fetchall()
+        return {row["account_id"]: row["people"] for row in rows}
+
+    # ==================== REFRESH ====================
+
+    def refresh(self, relations=None, chat_index=None, full: bool = False, now: Optional[float] = None) -> int:
+        """
+        Merge changed relations and chat mappings and re-route the affected people.
+
+        Args:
+            relations: RelationsStore (connections per seat)
+            chat_index: ChatIndex (1:1 chats per seat, with last message time)
+            full: Re-read everything instead of changes since the last refresh
+            now: Current epoch time (default: time.time())
+
+        Returns:
+            Number of people re-routed
+        """
+        now = time.time() if now is None else now
+        touched: set = set()
+        with self._lock:
+            marks = {} if full else {
+                row["source"]: row["mark"] for row in self.conn.execute("SELECT source, mark FROM routing_marks")
+            }
+            if relations is not None:
+                for account_id, completed_at in relations.completed_syncs().items():
+                    source = f"relations:{account_id}"
+                    if completed_at > marks.get(source, 0):
+                        touched |= self._merge_relations(account_id, relations.provider_ids(account_id))
+                        self._set_mark(source, completed_at)
+            if chat_index is not None:
+                mark = marks.get("chats")
+                rows = chat_index.changed_since(mark - CHAT_MARK_OVERLAP if mark else 0)
+                for row in rows:
+                    link = self.conn.execute(
+                        "SELECT chat_id, last_message_at FROM seat_links WHERE provider_id = ? AND account_id = ?",
+                        (row["attendee_provider_id"], row["account_id"]),
+                    ).fetchone()
+                    if link and link["chat_id"] == row["chat_id"] and (
+                        (link["last_message_at"] or 0) >= (row["last_message_at"] or 0)
+                    ):
+                        continue  # Seen already (overlap)
+                    touched.add(row["attendee_provider_id"])
+                    self.conn.execute(
+                        "INSERT INTO seat_links (provider_id, account_id, chat_id, last_message_at) "
+                        "VALUES (?, ?, ?, ?) ON CONFLICT(provider_id, account_id) DO UPDATE SET "
+                        "chat_id = excluded.chat_id, "
+                        "last_message_at = MAX(COALESCE(excluded.last_message_at, 0), "
+                        "COALESCE(seat_links.last_message_at, 0))",
+                        (row["attendee_provider_id"], row["account_id"], row["chat_id"], row["last_message_at"]),
+                    )
+                if rows:
+                    self._set_mark("chats", max(mark or 0, rows[-1]["updated_at"]))
+            self._reroute(touched, now)
+            self.conn.commit()
+        return len(touched)
+
+    def _merge_relations(self, account_id: str, provider_ids: set) -> set:
+        """Set a seat's connected flags to its current relation list. Returns the people that changed."""
+        current = {
+            row["provider_id"] for row in self.conn.execute(
+                "SELECT provider_id FROM seat_links WHERE account_id = ? AND connected = 1", (account_id,)
+            )
+        }
+        added, removed = provider_ids - current, current - provider_ids
+        self.conn.executemany(
+            "INSERT INTO seat_links (provider_id, account_id, connected) VALUES (?, ?, 1) "
+            "ON CONFLICT(provider_id, account_id) DO UPDATE SET connected = 1",
+            [(provider_id, account_id) for provider_id in added],
+        )
+        self.conn.executemany(
+            "UPDATE seat_links SET connected = 0 WHERE provider_id = ? AND account_id = ?",
+            [(provider_id, account_id) for provider_id in removed],
+        )
+        self.conn.execute(
+            "DELETE FROM seat_links WHERE account_id = ? AND connected = 0 AND chat_id IS NULL", (account_id,)
+        )
+        return added | removed
+
+    def _set_mark(self, source: str, mark: float) -> None:
+        self.conn.execute(
+            "INSERT INTO routing_marks (source, mark) VALUES (?, ?) "
+            "ON CONFLICT(source) DO UPDATE SET mark = excluded.mark",
+            (source, mark),
+        )
+
+    def _reroute(self, provider_ids: Iterable[str], now: float) -> None:
+        for provider_id in provider_ids:
+            rows = self.conn.execute("SELECT * FROM seat_links WHERE provider_id = ?", (provider_id,)).fetchall()
+            if not rows:
+                self.conn.execute("DELETE FROM routes WHERE provider_id = ?", (provider_id,))
+                continue
+            best = min(rows, key=lambda row: self._rank(row, now))
+            last = best["last_message_at"]
+            recent = bool(last) and last >= now - self.recent
+            self.conn.execute(
+                "INSERT OR REPLACE INTO routes (provider_id, account_id, connected, chat_id, "
+                "last_message_at, seats, expires_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    provider_id, best["account_id"], best["connected"], best["chat_id"],
+                    last, len(rows), last + self.recent if recent else None,
+                ),
+            )
+
+    def _rank(self, row: sqlite3.Row, now: float) -> tuple:
+        """Sort key, lower is better."""
+        last = row["last_message_at"] or 0
+        if last and last >= now - self.recent:
+            tier = 0
+        elif row["connected"]:
+            tier = 1
+        else:
+            tier = 2
+        return tier, -last, row["account_id"]
+
+    @staticmethod
+    def _route(row: sqlite3.Row, seats: int) -> Route:
+        return Route(
+            provider_id=row["provider_id"],
+            account_id=row["account_id"],
+            connected=bool(row["connected"]),
+            chat_id=row["chat_id"],
+            last_message_at=row["last_message_at"],
+            seats=seats,
+        )
@@ -0,0 +1,445 @@
+"""
+Scheduled message delivery.
+
+Pending sends live in SQLite (indexed by status and due time), so the
+store can hold hundreds of thousands of future sends. The dispatcher only
+keeps a min-heap of sends due within a short horizon in memory and
+refills it from the index, so memory stays bounded.
+
+Each send can carry a recipient-local send window (e.g. 09:00-17:00
+Europe/Prague); due times outside the window move to the next opening.
+Dispatch goes through SendLedger (idempotent) with a worker pool and a
+shared rate limit. With a NearDuplicateIndex, a send whose text is nearly
+identical to something the recipient already got is held back (status
+"similar") instead of sent.
+"""
+import heapq
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, time as dtime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from src.config import Config
+from src.log_context import correlation
+from src.near_duplicates import NearDuplicateIndex
+from src.rate_limit import RateLimiter
+from src.send_ledger import SendLedger
+from src.unipile_client import AccountUnavailable, UniPileError
+
+DEFAULT_DB_PATH = Config.DATA_DIR / "scheduler.db"
+
+log = logging.getLogger("unipile.scheduler")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scheduled_sends (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    account_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    campaign_id TEXT,
+    due_at REAL NOT NULL,
+    window_tz TEXT,
+    window_start TEXT,
+    window_end TEXT,
+    status TEXT NOT NULL DEFAULT 'scheduled',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    chat_id TEXT,
+    message_id TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scheduled_due ON scheduled_sends (status, due_at);
+
+CREATE TABLE IF NOT EXISTS recipient_windows (
+    user_id TEXT PRIMARY KEY,
+    tz TEXT NOT NULL,
+    window_start TEXT NOT NULL,
+    window_end TEXT NOT NULL
+);
+"""
+
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 300  # Seconds before retrying a failed send (x attempt number)
+ACCOUNT_DOWN_RETRY = 60  # Minimum delay for sends of an account marked down (no attempt counted)
+
+
+def _parse_hhmm(value: str) -> dtime:
+    hours, minutes = value.split(":")
+    return dtime(int(hours), int(minutes))
+
+
+def next_in_window(ts: float, tz: str, start: str, end: str) -> float:
+    """
+    Earliest time >= ts inside the daily window [start, end) in timezone tz.
+
+    Windows may wrap midnight (e.g. 22:00-06:00).
+    """
+    zone = ZoneInfo(tz)
+    local = datetime.fromtimestamp(ts, zone)
+    start_t, end_t = _parse_hhmm(start), _parse_hhmm(end)
+    now_t = local.time()
+
+    if start_t <= end_t:
+        inside = start_t <= now_t < end_t
+    else:
+        inside = now_t >= start_t or now_t < end_t
+    if inside:
+        return ts
+
+    candidate = datetime.combine(local.date(), start_t, tzinfo=zone)
+    if candidate.timestamp() <= ts:
+        candidate = datetime.combine(local.date() + timedelta(days=1), start_t, tzinfo=zone)
+    return candidate.timestamp()
+
+
+class ScheduleStore:
+    """Persistent store of future sends."""
+
+    def __init__(self, db_path: Path = DEFAULT_DB_PATH):
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path), timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def set_window(self, user_id: str, tz: str, start: str, end: str) -> None:
+        """Default send window for a recipient (validated)."""
+        ZoneInfo(tz)
+        _parse_hhmm(start), _parse_hhmm(end)
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO recipient_windows (user_id, tz, window_start, window_end) "
+                "VALUES (?, ?, ?, ?)",
+                (user_id, tz, start, end),
+            )
+            self.conn.commit()
+
+    def get_window(self, user_id: str) -> Optional[tuple[str, str, str]]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT tz, window_start, window_end FROM recipient_windows WHERE user_id = ?",
+                (user_id,),
+            ).fetchone()
+        return (row["tz"], row["window_start"], row["window_end"]) if row else None
+
+    def add(
+        self,
+        account_id: str,
+        user_id: str,
+        text: str,
+        due_at: float,
+        campaign_id: Optional[str] = None,
+        window: Optional[tuple[str, str, str]] = None,
+    ) -> tuple[int, float]:
+        """
+        Schedule a send.
+
+        Args:
+            account_id: Sending account
+            user_id: Recipient provider ID
+            text: Message text (already approved)
+            due_at: Epoch seconds
+            campaign_id: Campaign ID for the send ledger
+            window: (tz, "HH:MM", "HH:MM"); defaults to the recipient's window
+
+        Returns:
+            Tuple of (schedule id, effective due time after applying the window)
+        """
+        window = window or self.get_window(user_id)
+        if window:
+            due_at = next_in_window(due_at, *window)
+        now = time.time()
+        with self._lock:
+            cur = self.conn.execute(
+                "INSERT INTO scheduled_sends (account_id, user_id, text, campaign_id, due_at, window_tz, "
+                "window_start, window_end, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (account_id, user_id, text, campaign_id, due_at,
+                 *(window or (None, None, None)), now, now),
+            )
+            self.conn.commit()
+        return cur.lastrowid, due_at
+
+    def cancel(self, send_id: int) -> bool:
+        with self._lock:
+            cur = self.conn.execute(
+                "UPDATE scheduled_sends SET status = 'cancelled', updated_at = ? "
+                "WHERE id = ? AND status = 'scheduled'",
+                (time.time(), send_id),
+            )
+            self.conn.commit()
+        return cur.rowcount > 0
+
+    def get(self, send_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM scheduled_sends WHERE id = ?", (send_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list(self, status: Optional[str] = "scheduled", limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            if status:
+                rows = self.conn.execute(
+                    "SELECT * FROM scheduled_sends WHERE status = ? ORDER BY due_at LIMIT ?", (status, limit)
+                ).fetchall()
+            else:
+                rows = self.conn.execute(
+                    "SELECT * FROM scheduled_sends ORDER BY due_at DESC LIMIT ?", (limit,)
+                ).fetchall()
+        return [dict(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT status, COUNT(*) AS n FROM scheduled_sends GROUP BY status"
+            ).fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    # ==================== DISPATCH SUPPORT ====================
+
+    def due_before(self, until: float, limit: int) -> List[tuple[float, int]]:
+        """(due_at, id) of scheduled sends due before `until` (index range scan)."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, due_at FROM scheduled_sends WHERE status = 'scheduled' AND due_at <= ? "
+                "ORDER BY due_at LIMIT ?",
+                (until, limit),
+            ).fetchall()
+        return [(row["due_at"], row["id"]) for row in rows]
+
+    def claim(self, send_id: int) -> Optional[Dict[str, Any]]:
+        """Mark a scheduled send as sending. None if cancelled or taken meanwhile."""
+        with self._lock:
+            cur = self.conn.execute(
+                "UPDATE scheduled_sends SET status = 'sending', attempts = attempts + 1, updated_at = ? "
+                "WHERE id = ? AND status = 'scheduled'",
+                (time.time(), send_id),
+            )
+            self.conn.commit()
+        return self.get(send_id) if cur.rowcount else None
+
+    def finish(self, send_id: int, **fields) -> None:
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self.conn.execute(
+                f"UPDATE scheduled_sends SET {assignments} WHERE id = ?", (*fields.values(), send_id)
+            )
+            self.conn.commit()
+
+    def recover(self) -> int:
+        """Return sends left in 'sending' by a crashed dispatcher to 'scheduled'."""
+        with self._lock:
+            cur = self.conn.execute(
+                "UPDATE scheduled_sends SET status = 'scheduled', updated_at = ? WHERE status = 'sending'",
+                (time.time(),),
+            )
+            self.conn.commit()
+        return cur.rowcount
+
+
+class Scheduler:
+    """
+    Dispatcher loop: min-heap of near-term sends, worker pool, rate limit.
+
+    Only sends due within `horizon` seconds are loaded into the heap;
+    the rest stay in the store until the next refill.
+    """
+
+    def __init__(
+        self,
+        client,
+        store: ScheduleStore,
+        ledger: SendLedger,
+        workers: int = 2,
+        rate_per_minute: float = Config.SEND_RATE_PER_MINUTE,
+        horizon: float = 300.0,
+        refill_interval: float = 30.0,
+        batch: int = 10_000,
+        near_duplicates: Optional[NearDuplicateIndex] = None,
+    ):
+        self.client = client
+        self.store = store
+        self.ledger = ledger
+        self.limiter = RateLimiter(rate_per_minute)
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers))
+        # Sends are claimed only while a worker is free, so stopping leaves
+        # the backlog 'scheduled' instead of queued in the executor
+        self._slots = threading.BoundedSemaphore(max(1, workers))
+        self._inflight: Dict[int, tuple[Future, Dict[str, Any]]] = {}
+        self._stop = threading.Event()
+        self.horizon = max(horizon, refill_interval)
+        self.refill_interval = refill_interval
+        self.batch = batch
+        self.near_duplicates = near_duplicates
+        self._heap: List[tuple[float, int]] = []
+        self._queued: set[int] = set()
+        self._next_refill = 0.0
+        self.stats = {"sent": 0, "skipped": 0, "failed": 0, "retried": 0, "similar": 0}
+        self._stats_lock = threading.Lock()
+
+    def run(self, stop: Optional[threading.Event] = None, once: bool = False, on_event=None) -> None:
+        """
+        Dispatch sends until `stop` is set.
+
+        Args:
+            stop: Event to stop the loop
+            once: Dispatch what is due now and return
+            on_event: Optional callback(event, row, detail) for progress output
+        """
+        stop = self._stop = stop or threading.Event()
+        self.store.recover()
+        try:
+            while not stop.is_set():
+                now = time.time()
+                if now >= self._next_refill:
+                    self._refill(now)
+                    self._next_refill = now + self.refill_interval
+
+                while self._heap and self._heap[0][0] <= now and self._take_slot(stop, wait=once):
+                    _, send_id = heapq.heappop(self._heap)
+                    self._queued.discard(send_id)
+                    row = self.store.claim(send_id)
+                    if not row:
+                        self._slots.release()
+                        continue
+                    future = self.executor.submit(self._dispatch, row, on_event)
+                    self._inflight[send_id] = (future, row)
+                    future.add_done_callback(lambda f, send_id=send_id: self._forget(send_id, f))
+
+                if once:
+                    break
+
+                next_wake = min(self._heap[0][0], self._next_refill) if self._heap else self._next_refill
+                stop.wait(max(0.05, next_wake - time.time()))
+        except BaseException:  # Ctrl+C: running workers must not start new posts either
+            stop.set()
+            raise
+        finally:
+            # once: finish what was claimed; stopped/interrupted: drop what hasn't started
+            self.executor.shutdown(wait=True, cancel_futures=not once or stop.is_set())
+            for future, row in list(self._inflight.values()):
+                if future.cancelled():  # Claimed but never started
+                    self.store.finish(row["id"], status="scheduled", attempts=row["attempts"] - 1)
+            self._inflight.clear()
+
+    def _forget(self, send_id: int, future: Future) -> None:
+        if not future.cancelled():  # Cancelled ones are put back by run()
+            self._inflight.pop(send_id, None)
+
+    def _take_slot(self, stop: threading.Event, wait: bool) -> bool:
+        """Reserve a worker for one send (wait: until one is free or `stop` is set)."""
+        while not self._slots.acquire(timeout=0.1 if wait else 0):
+            if not wait or stop.is_set():
+                return False
+        return True
+
+    def _refill(self, now: float) -> None:
+        """Load sends due within the horizon into the heap."""
+        for due_at, send_id in self.store.due_before(now + self.horizon, self.batch):
+            if send_id not in self._queued:
+                heapq.heappush(self._heap, (due_at, send_id))
+                self._queued.add(send_id)
+
+    def _dispatch(self, row: Dict[str, Any], on_event) -> None:
+        # One correlation id per scheduled send, across retries
+        try:
+            with correlation(f"schedule-{row['id']}"):
+                self._send(row, on_event)
+        except Exception as e:
+            # Unexpected (bug, database error): don't leave the row 'sending'
+            log.exception("Scheduled send crashed", extra={"schedule_id": row["id"]})
+            try:
+                self.store.finish(row["id"], status="failed", last_error=f"{type(e).__name__}: {e}")
+            except Exception:
+                pass  # recover() returns it to 'scheduled' on the next start
+            self._event(on_event, "failed", row, str(e))
+        finally:
+            self._slots.release()
+
+    def _send(self, row: Dict[str, Any], on_event) -> None:
+        # Window may have passed while queued (rate limit, backlog)
+        if row["window_tz"]:
+            allowed = next_in_window(time.time(), row["window_tz"], row["window_start"], row["window_end"])
+            if allowed > time.time() + 1:
+                self.store.finish(row["id"], status="scheduled", due_at=allowed)
+                self._event(on_event, "deferred", row, allowed)
+                return
+
+        campaign_id = row["campaign_id"] or f"schedule:{row['id']}"
+        if self.near_duplicates and not self.ledger.lookup(
+            row["account_id"], f"user:{row['user_id']}", row["text"], campaign_id
+        ):
+            # New send (not a retry/recovery of this one): hold it if the recipient got nearly the same text
+            similar = self.near_duplicates.check(row["text"], recipient=f"user:{row['user_id']}", recent=False)
+            if similar:
+                detail = f"{similar[0].similarity:.0%} similar to a message already sent to this recipient"
+                self.store.finish(row["id"], status="similar", last_error=detail)
+                self._event(on_event, "similar", row, detail)
+                return
+
+        try:
+            health = self.client.health
+            seat = health.blocked(row["account_id"]) if health is not None else None
+            if seat is not None:
+                # Don't spend a rate token (or an attempt) on a seat that is down
+                raise AccountUnavailable(row["account_id"], seat.reason, seat.next_probe_at)
+            self.limiter.acquire()
+            if self._stop.is_set():
+                # Stopped while waiting for the rate limit: leave it for the next run
+                self.store.finish(row["id"], status="scheduled", attempts=row["attempts"] - 1)
+                return
+            record = self.ledger.send_to_user(
+                self.client,
+                row["account_id"],
+                row["user_id"],
+                row["text"],
+                campaign_id=campaign_id,
+            )
+        except AccountUnavailable as e:
+            self.store.finish(
+                row["id"], status="scheduled", last_error=str(e), attempts=row["attempts"] - 1,
+                due_at=max(e.retry_at or 0, time.time() + ACCOUNT_DOWN_RETRY),
+            )
+            self._event(on_event, "retried", row, str(e))
+            return
+        except UniPileError as e:
+            if row["attempts"] < MAX_ATTEMPTS:
+                self.store.finish(
+                    row["id"], status="scheduled", last_error=str(e),
+                    due_at=time.time() + RETRY_BACKOFF * row["attempts"],
+                )
+                self._event(on_event, "retried", row, str(e))
+            else:
+                self.store.finish(row["id"], status="failed", last_error=str(e))
+                self._event(on_event, "failed", row, str(e))
+            return
+
+        if record.duplicate and record.status != "sent":
+            # Someone else is sending it right now; check again shortly
+            self.store.finish(row["id"], status="scheduled", due_at=time.time() + 60)
+            self._event(on_event, "retried", row, "in flight elsewhere")
+            return
+
+        self.store.finish(row["id"], status="sent", chat_id=record.chat_id, message_id=record.message_id)
+        self._event(on_event, "skipped" if record.duplicate else "sent", row, record.message_id)
+
+    def _event(self, on_event, event: str, row: Dict[str, Any], detail: Any) -> None:
+        log.log(
+            logging.WARNING if event == "failed" else logging.INFO,
+            "scheduled send #%s %s", row["id"], event,
+            extra={"schedule_id": row["id"], "event": event, "attempt": row["attempts"], "detail": detail},
+        )
+        if event in self.stats:
+            with self._stats_lock:
+                self.stats[event] += 1
+        if on_event:
+            on_event(event, row, detail)
@@ -0,0 +1,254 @@
+"""
+LinkedIn search result cache.
+
+Saves search quota and latency for repeated queries:
+- queries are normalized ("Product  manager prague" == "product manager Prague");
+  term order is kept, since it matters for NOT and quoted phrases
+- results are cached with a TTL (Config.SEARCH_CACHE_TTL_HOURS)
+- pages are stored as they arrive, so a larger --limit resumes from the
+  stored cursor instead of starting over
+- people are deduplicated by provider id, within a query and across queries
+"""
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from src.config import Config
+from src.rate_limit import RateLimiter
+
+DEFAULT_DB_PATH = Config.DATA_DIR / "search_cache.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_queries (
+    key TEXT PRIMARY KEY,
+    api TEXT NOT NULL,
+    keywords TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    next_cursor TEXT,
+    complete INTEGER NOT NULL DEFAULT 0,
+    pages INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS search_hits (
+    key TEXT NOT NULL,
+    provider_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (key, provider_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_search_hits_position ON search_hits (key, position);
+
+CREATE TABLE IF NOT EXISTS search_people (
+    provider_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+# Boolean operators are case-sensitive in LinkedIn search ("not" is a plain word)
+OPERATORS = {"AND", "OR", "NOT"}
+
+
+def normalize_query(keywords: str) -> str:
+    """Case-fold terms (not operators) and collapse whitespace; term order is kept."""
+    return " ".join(t if t in OPERATORS else t.casefold() for t in keywords.split())
+
+
+def person_provider_id(person: Dict[str, Any]) -> Optional[str]:
+    """Provider id of a search result (used as the user ID for messaging)."""
+    return person.get("id") or person.get("member_urn") or person.get("provider_id")
+
+
+class SearchCache:
+    """SQLite-backed cache of LinkedIn people search results."""
+
+    def __init__(
+        self,
+        db_path: Path = DEFAULT_DB_PATH,
+        ttl_hours: float = Config.SEARCH_CACHE_TTL_HOURS,
+    ):
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_hours * 3600
+        # Shared across worker threads; all access goes through self._lock
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    @staticmethod
+    def query_key(keywords: str, api: str = "classic") -> str:
+        """Cache key for a query. Results are shared between accounts."""
+        return f"{api}:{normalize_query(keywords)}"
+
+    def search(
+        self,
+        client,
+        account_id: str,
+        keywords: str,
+        api: str = "classic",
+        limit: int = 10,
+        refresh: bool = False,
+        on_page: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        limiter: Optional[RateLimiter] = None,
+    ) -> tuple[List[Dict[str, Any]], bool, int]:
+        """
+        Search people, serving from cache and paging only what is missing.
+
+        Args:
+            client: UniPileClient instance
+            account_id: UniPile account ID used for live requests
+            keywords: Search terms
+            api: LinkedIn interface ("classic", "sales_navigator", "recruiter")
+            limit: Number of people wanted
+            refresh: Ignore cached results and search again
+            on_page: Optional callback with the new (not previously seen
+                for this query) people of each fetched page
+            limiter: Optional RateLimiter acquired before each live page
+
+        Returns:
+            Tuple of (people, more available, number of API pages fetched)
+        """
+        key = self.query_key(keywords, api)
+        entry = self._get_entry(key)
+
+        if entry is None or refresh or time.time() - entry["fetched_at"] > self.ttl_seconds:
+            self._reset(key, api, keywords)
+            entry = self._get_entry(key)
+
+        cursor = entry["next_cursor"]
+        complete = bool(entry["complete"])
+        have = self._hit_count(key)
+        pages = 0
+
+        while have < limit and not complete:
+            if limiter:
+                limiter.acquire()
+            items, cursor = client.search_linkedin(
+                account_id=account_id,
+                keywords=keywords,
+                api=api,
+                limit=limit - have,
+                cursor=cursor,
+            )
+            pages += 1
+            complete = not cursor or not items
+            new_people = self._store_page(key, items, cursor, complete)
+            have += len(new_people)
+            if on_page and new_people:
+                on_page(new_people)
+
+        return self._load_hits(key, limit), not complete or have > limit, pages
+
+    def cached(self, keywords: str, api: str = "classic") -> Optional[Dict[str, Any]]:
+        """Cache entry metadata for a query (None if never searched)."""
+        entry = self._get_entry(self.query_key(keywords, api))
+        if entry is None:
+            return None
+        return {
+            "fetched_at": entry["fetched_at"],
+            "pages": entry["pages"],
+            "complete": bool(entry["complete"]),
+            "people": self._hit_count(entry["key"]),
+            "expired": time.time() - entry["fetched_at"] > self.ttl_seconds,
+        }
+
+    def get_person(self, provider_id: str) -> Optional[Dict[str, Any]]:
+        """Last seen search record for a person, from any query."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT data FROM search_people WHERE provider_id = ?", (provider_id,)
+            ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def purge_expired(self) -> int:
+        """Delete expired queries and people no longer referenced. Returns queries removed."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            keys = [r["key"] for r in self.conn.execute(
+                "SELECT key FROM search_queries WHERE fetched_at < ?", (cutoff,)
+            )]
+            for key in keys:
+                self.conn.execute("DELETE FROM search_hits WHERE key = ?", (key,))
+                self.conn.execute("DELETE FROM search_queries WHERE key = ?", (key,))
+            self.conn.execute(
+                "DELETE FROM search_people WHERE provider_id NOT IN "
+                "(SELECT DISTINCT provider_id FROM search_hits)"
+            )
+            self.conn.commit()
+        return len(keys)
+
+    # ==================== INTERNAL ====================
+
+    def _get_entry(self, key: str) -> Optional[sqlite3.Row]:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT * FROM search_queries WHERE key = ?", (key,)
+            ).fetchone()
+
+    def _reset(self, key: str, api: str, keywords: str) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM search_hits WHERE key = ?", (key,))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO search_queries (key, api, keywords, fetched_at, next_cursor, complete, pages) "
+                "VALUES (?, ?, ?, ?, NULL, 0, 0)",
+                (key, api, keywords, time.time()),
+            )
+            self.conn.commit()
+
+    def _hit_count(self, key: str) -> int:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM search_hits WHERE key = ?", (key,)
+            ).fetchone()[0]
+
+    def _store_page(
+        self,
+        key: str,
+        items: List[Dict[str, Any]],
+        next_cursor: Optional[str],
+        complete: bool,
+    ) -> List[Dict[str, Any]]:
+        """Store one page; returns people not already in this query's results."""
+        now = time.time()
+        new_people = []
+        with self._lock:
+            position = self.conn.execute(
+                "SELECT COALESCE(MAX(position), -1) + 1 FROM search_hits WHERE key = ?", (key,)
+            ).fetchone()[0]
+            for person in items:
+                provider_id = person_provider_id(person)
+                if not provider_id:
+                    continue
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO search_people (provider_id, data, updated_at) VALUES (?, ?, ?)",
+                    (provider_id, json.dumps(person), now),
+                )
+                inserted = self.conn.execute(
+                    "INSERT OR IGNORE INTO search_hits (key, provider_id, position) VALUES (?, ?, ?)",
+                    (key, provider_id, position),
+                ).rowcount
+                if inserted:
+                    position += 1
+                    new_people.append(person)
+            self.conn.execute(
+                "UPDATE search_queries SET next_cursor = ?, complete = ?, pages = pages + 1 WHERE key = ?",
+                (next_cursor, int(complete), key),
+            )
+            self.conn.commit()
+        return new_people
+
+    def _load_hits(self, key: str, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT p.data FROM search_hits h JOIN search_people p ON p.provider_id = h.provider_id "
+                "WHERE h.key = ? ORDER BY h.position LIMIT ?",
+                (key, limit),
+            ).fetchall()
+        return [json.loads(row["data"]) for row in rows]
@@ -0,0 +1,366 @@
+"""
+Idempotent sends with a client-side dedup ledger.
+
+Every send is keyed on (account, recipient or chat, content hash,
+campaign id). Before each POST the ledger is consulted:
+- already sent          -> skip, return the stored record
+- in flight elsewhere   -> skip (another worker/process owns it)
+- pending for too long  -> the sender crashed or timed out; reconcile
+                           against list_messages before retrying
+- failed                -> retry
+
+This makes it safe to run sends in parallel and to retry or re-run
+batches: a message is never posted twice for the same key. With a
+NearDuplicateIndex, every sent text is also indexed for similarity
+checks of later drafts.
+"""
+import hashlib
+import os
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from src.chat_index import ChatIndex
+from src.config import Config
+from src.models import SendRecord
+from src.near_duplicates import NearDuplicateIndex
+from src.timeutils import to_epoch
+from src.unipile_client import AccountUnavailable, UniPileError
+
+DEFAULT_DB_PATH = Config.DATA_DIR / "send_ledger.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sends (
+    key TEXT PRIMARY KEY,
+    account_id TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    campaign_id TEXT,
+    status TEXT NOT NULL,
+    chat_id TEXT,
+    message_id TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sends_status ON sends (status, updated_at);
+CREATE INDEX IF NOT EXISTS idx_sends_campaign ON sends (campaign_id);
+"""
+
+# Errors that prove the message was not sent (anything else is ambiguous)
+DEFINITE_FAILURE_CODES = {400, 401, 403, 404, 422}
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def send_key(account_id: str, recipient: str, text: str, campaign_id: Optional[str] = None) -> str:
+    """Idempotency key of a send."""
+    raw = "\x1f".join([account_id, recipient, content_hash(text), campaign_id or ""])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SendLedger:
+    """SQLite send ledger, safe across threads and processes."""
+
+    def __init__(
+        self,
+        db_path: Path = DEFAULT_DB_PATH,
+        stale_after: float = 120.0,
+        chat_index: Optional[ChatIndex] = None,
+        near_duplicates: Optional[NearDuplicateIndex] = None,
+    ):
+        """
+        Args:
+            db_path: Ledger database file
+            stale_after: Seconds after which a pending send is considered
+                abandoned (crashed or timed-out sender) and gets reconciled
+            chat_index: Optional chat-id cache; sends to users with a known
+                chat go to that chat directly
+            near_duplicates: Optional similarity index, updated with every sent text
+        """
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.stale_after = stale_after
+        self.chat_index = chat_index
+        self.near_duplicates = near_duplicates
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        # Autocommit mode; claims use explicit BEGIN IMMEDIATE transactions
+        self.conn = sqlite3.connect(
+            str(db_path), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ==================== SENDING ====================
+
+    def send_to_user(
+        self,
+        client,
+        account_id: str,
+        user_id: str,
+        text: str,
+        campaign_id: Optional[str] = None,
+    ) -> SendRecord:
+        """Idempotent UniPileClient.send_to_user()."""
+
+        def post() -> tuple[str, str]:
+            if self.chat_index:
+                return self.chat_index.send_to_user(client, account_id, user_id, text)
+            return client.send_to_user(account_id, user_id, text)
+
+        return self._send(client, account_id, f"user:{user_id}", text, campaign_id, post)
+
+    def send_message(
+        self,
+        client,
+        chat_id: str,
+        text: str,
+        account_id: str = "",
+        campaign_id: Optional[str] = None,
+    ) -> SendRecord:
+        """Idempotent UniPileClient.send_message()."""
+
+        def post() -> tuple[str, str]:
+            return chat_id, client.send_message(chat_id, text).id
+
+        return self._send(client, account_id, f"chat:{chat_id}", text, campaign_id, post, chat_id=chat_id)
+
+    def _send(
+        self,
+        client,
+        account_id: str,
+        recipient: str,
+        text: str,
+        campaign_id: Optional[str],
+        post: Callable[[], tuple[str, str]],
+        chat_id: Optional[str] = None,
+    ) -> SendRecord:
+        key = send_key(account_id, recipient, text, campaign_id)
+        record, claimed = self._claim(key, account_id, recipient, text, campaign_id, chat_id)
+
+        if not claimed:
+            if record.status == "pending" and self._is_stale(record):
+                # Previous sender vanished mid-flight: did the message go out?
+                record = self.reconcile(client, record.key, text)
+                if record.status == "sent":
+                    return record.model_copy(update={"duplicate": True})
+                record, claimed = self._claim(key, account_id, recipient, text, campaign_id, chat_id, force=True)
+            if not claimed:
+                return record.model_copy(update={"duplicate": True})
+
+        try:
+            sent_chat_id, message_id = post()
+        except UniPileError as e:
+            if e.status_code in DEFINITE_FAILURE_CODES or isinstance(e, AccountUnavailable):
+                self._update(key, status="failed", error=str(e))
+            else:
+                # Ambiguous (timeout, 5xx, connection): keep pending for reconciliation
+                self._update(key, error=str(e))
+            raise
+
+        self._update(key, status="sent", chat_id=sent_chat_id or chat_id, message_id=message_id, error=None)
+        if self.near_duplicates:
+            self.near_duplicates.add(text, account_id, recipient, message_id)
+        return self.get(key)
+
+    # ==================== RECONCILIATION ====================
+
+    def reconcile(self, client, key: str, text: Optional[str] = None, pages: int = 2) -> SendRecord:
+        """
+        Check a pending send against the chat's messages.
+
+        Marks it sent if an outgoing message with the same content exists
+        after the send was first attempted, otherwise leaves it pending.
+
+        Args:
+            client: UniPileClient instance
+            key: Ledger key
+            text: Message text (only its hash is stored; needed to match)
+            pages: Message pages to scan (newest first)
+        """
+        record = self.get(key)
+        if record is None or record.status != "pending":
+            return record
+
+        chat_id = record.chat_id
+        if not chat_id and record.recipient.startswith("user:"):
+            chat_id = self._find_chat(client, record.account_id, record.recipient[5:])
+        if not chat_id:
+            return record
+
+        row = self.conn.execute("SELECT content_hash FROM sends WHERE key = ?", (key,)).fetchone()
+        wanted_hash = content_hash(text) if text else row["content_hash"]
+        since = record.created_at.timestamp() - 300 if record.created_at else 0  # clock skew margin
+
+        cursor = None
+        for _ in range(pages):
+            messages, cursor = client.list_messages(chat_id, limit=50, cursor=cursor)
+            for msg in messages:
+                if not msg.is_sender or not msg.text:
+                    continue
+                if (to_epoch(msg.timestamp) or 0) < since:
+                    continue
+                if content_hash(msg.text) == wanted_hash:
+                    self._update(key, status="sent", chat_id=chat_id, message_id=msg.id, error=None)
+                    return self.get(key)
+            if not cursor:
+                break
+
+        # Still pending: keep updated_at, so the send stays stale and exactly
+        # one sender can take it over (see _claim(force=True))
+        self._update(key, touch=False, chat_id=chat_id)
+        return self.get(key)
+
+    def reconcile_pending(self, client) -> List[SendRecord]:
+        """Reconcile all stale pending sends. Returns their updated records."""
+        cutoff = time.time() - self.stale_after
+        rows = self.conn.execute(
+            "SELECT key FROM sends WHERE status = 'pending' AND updated_at < ?", (cutoff,)
+        ).fetchall()
+        return [self.reconcile(client, row["key"]) for row in rows]
+
+    def _find_chat(self, client, account_id: str, user_id: str, pages: int = 3) -> Optional[str]:
+        """Find the 1:1 chat with a user (chat index, else scan recent chats)."""
+        if self.chat_index:
+            chat_id = self.chat_index.chat_for(account_id, user_id)
+            if chat_id:
+                return chat_id
+        cursor = None
+        for _ in range(pages):
+            chats, cursor = client.list_chats(account_id, limit=50, cursor=cursor)
+            for chat in chats:
+                if self.chat_index:
+                    self.chat_index.apply_chat(chat)
+                if not chat.is_group and any(a.attendee_provider_id == user_id for a in chat.attendees):
+                    return chat.id
+            if not cursor:
+                break
+        return None
+
+    # ==================== QUERIES ====================
+
+    def get(self, key: str) -> Optional[SendRecord]:
+        row = self.conn.execute("SELECT * FROM sends WHERE key = ?", (key,)).fetchone()
+        return self._to_record(row) if row else None
+
+    def lookup(
+        self,
+        account_id: str,
+        recipient: str,
+        text: str,
+        campaign_id: Optional[str] = None,
+    ) -> Optional[SendRecord]:
+        """Ledger entry for a would-be send, e.g. to warn before asking for approval."""
+        return self.get(send_key(account_id, recipient, text, campaign_id))
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[SendRecord]:
+        if status:
+            rows = self.conn.execute(
+                "SELECT * FROM sends WHERE status = ? ORDER BY updated_at DESC LIMIT ?", (status, limit)
+            )
+        else:
+            rows = self.conn.execute("SELECT * FROM sends ORDER BY updated_at DESC LIMIT ?", (limit,))
+        return [self._to_record(row) for row in rows]
+
+    # ==================== INTERNAL ====================
+
+    def _claim(
+        self,
+        key: str,
+        account_id: str,
+        recipient: str,
+        text: str,
+        campaign_id: Optional[str],
+        chat_id: Optional[str],
+        force: bool = False,
+    ) -> tuple[SendRecord, bool]:
+        """
+        Atomically take ownership of a send. Returns (record, claimed).
+
+        Args:
+            force: Also take over a pending send if it is still stale (after reconcile())
+        """
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute("SELECT * FROM sends WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.conn.execute(
+                        "INSERT INTO sends (key, account_id, recipient, content_hash, campaign_id, status, "
+                        "chat_id, attempts, owner, created_at, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?, 'pending', ?, 1, ?, ?, ?)",
+                        (key, account_id, recipient, content_hash(text), campaign_id, chat_id,
+                         self.owner, now, now),
+                    )
+                    claimed = True
+                elif row["status"] == "failed":
+                    self.conn.execute(
+                        "UPDATE sends SET status = 'pending', attempts = attempts + 1, owner = ?, "
+                        "updated_at = ? WHERE key = ?",
+                        (self.owner, now, key),
+                    )
+                    claimed = True
+                elif force and row["status"] == "pending":
+                    # Compare-and-swap: only a send that is still stale is taken
+                    # over, so of several senders that reconciled it one wins
+                    cursor = self.conn.execute(
+                        "UPDATE sends SET attempts = attempts + 1, owner = ?, updated_at = ? "
+                        "WHERE key = ? AND status = 'pending' AND updated_at < ?",
+                        (self.owner, now, key, now - self.stale_after),
+                    )
+                    claimed = cursor.rowcount == 1
+                else:
+                    claimed = False
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return self.get(key), claimed
+
+    def _update(self, key: str, touch: bool = True, **fields) -> None:
+        if touch:
+            fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self.conn.execute(
+                f"UPDATE sends SET {assignments} WHERE key = ?",
+                (*fields.values(), key),
+            )
+
+    def _is_stale(self, record: SendRecord) -> bool:
+        return record.updated_at is not None and (
+            time.time() - record.updated_at.timestamp() > self.stale_after
+        )
+
+    @staticmethod
+    def _to_record(row: sqlite3.Row) -> SendRecord:
+        return SendRecord(
+            key=row["key"],
+            account_id=row["account_id"],
+            recipient=row["recipient"],
+            campaign_id=row["campaign_id"],
+            status=row["status"],
+            chat_id=row["chat_id"],
+            message_id=row["message_id"],
+            attempts=row["attempts"],
+            error=row["error"],
+            created_at=datetime.fromtimestamp(row["created_at"], tz=timezone.utc),
+            updated_at=datetime.fromtimestamp(row["updated_at"], tz=timezone.utc),
+        )
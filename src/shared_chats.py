@@ -0,0 +1,253 @@
+"""
+Conversations shared by several of our seats.
+
+When several connected accounts sit in the same conversation, each seat
+has its own chat id for it and a per-seat sweep downloads the same
+messages once per seat. detect() finds these chats in two steps:
+
+1. candidates: chats of different seats with the same member set
+   (attendee provider ids plus the seat's own provider id)
+2. confirmation: the newest message of each candidate has the same
+   provider message id (one list_messages(limit=1) call per candidate)
+
+Every group of confirmed chats gets one primary seat whose chat is read;
+the other seats' chats are mirrors. reading_plan() tells a sweep of some
+seats which chats to skip (the primary's chat is read when its seat is
+swept, else a swept mirror stands in), and fan_out() turns a message read
+through one member into the other swept seats' views of it without
+fetching it again.
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+from src.config import Config
+from src.models import Account, Chat, Message
+from src.timeline import iter_chats
+from src.timeutils import to_epoch
+from src.unipile_client import UniPileError
+
+DEFAULT_DB_PATH = Config.DATA_DIR / "shared_chats.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shared_chats (
+    chat_id TEXT PRIMARY KEY,
+    group_id TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    seat_user_id TEXT,
+    is_primary INTEGER NOT NULL DEFAULT 0,
+    name TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_shared_chats_group ON shared_chats (group_id);
+CREATE INDEX IF NOT EXISTS idx_shared_chats_account ON shared_chats (account_id, is_primary);
+"""
+
+log = logging.getLogger("unipile.shared_chats")
+
+
+def member_key(chat: Chat, seat_user_id: Optional[str]) -> Optional[str]:
+    """Key of a chat's full member set, None if fewer than two members are known."""
+    members = {a.attendee_provider_id for a in chat.attendees if a.attendee_provider_id}
+    if seat_user_id:
+        members.add(seat_user_id)
+    if len(members) < 2:
+        return None
+    return hashlib.sha1("\n".join(sorted(members)).encode()).hexdigest()
+
+
+def message_fingerprint(message: Message) -> str:
+    """Provider message id, or (time, sender, text) when the API doesn't return one."""
+    if message.provider_id:
+        return message.provider_id
+    text = hashlib.sha1((message.text or "").encode()).hexdigest()
+    return f"{to_epoch(message.timestamp)}|{message.sender_id}|{text}"
+
+
+def fan_out(message: Message, mirrors: Iterable[Dict[str, Any]]) -> List[Message]:
+    """
+    The message, read through one member chat, as seen by the other members.
+
+    Args:
+        message: Message of the chat that was read
+        mirrors: Members (chat_id, account_id, seat_user_id) from reading_plan()
+
+    Returns:
+        Copies with the mirror's chat id and is_sender relative to the mirror seat
+    """
+    views = []
+    for member in mirrors:
+        seat = member.get("seat_user_id")
+        views.append(message.model_copy(update={
+            "chat_id": member["chat_id"],
+            "is_sender": bool(seat) and message.sender_id == seat,
+        }))
+    return views
+
+
+class SharedChats:
+    """Groups of chats (one per seat) that are the same conversation (SQLite, thread-safe)."""
+
+    def __init__(self, db_path: Path = DEFAULT_DB_PATH):
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path), timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ==================== DETECTION ====================
+
+    def detect(
+        self,
+        client,
+        accounts: Sequence[Account],
+        since: Optional[float] = None,
+        page_size: int = 50,
+        prefer: Sequence[str] = (),
+    ) -> Dict[str, int]:
+        """
+        Find shared conversations among the chats of the given seats.
+
+        Replaces the stored groups of these seats. A group keeps its primary
+        seat across runs while that seat is still in it; new groups take the
+        first seat of `prefer` that is a member, else the lowest account id.
+
+        Args:
+            client: UniPileClient instance
+            accounts: Seats to compare (need provider_user_id for exact member sets)
+            since: Only consider chats active at or after this epoch time
+            page_size: Chats per list_chats page
+            prefer: Account ids in order of preference as primary seat
+
+        Returns:
+            Dict with chats scanned, candidates checked, groups and mirrors found
+        """
+        candidates: Dict[str, List[tuple[Account, Chat]]] = defaultdict(list)
+        stats = {"chats": 0, "candidates": 0, "groups": 0, "mirrors": 0}
+        for account in accounts:
+            for chat in iter_chats(client, account.id, page_size=page_size):
+                last = to_epoch(chat.last_message_timestamp)
+                if since is not None and last is not None and last < since:
+                    break  # Chats come most recently active first
+                stats["chats"] += 1
+                key = member_key(chat, account.provider_user_id)
+                if key:
+                    candidates[key].append((account, chat))
+
+        groups: List[List[tuple[Account, Chat]]] = []
+        for entries in candidates.values():
+            if len({account.id for account, _ in entries}) < 2:
+                continue
+            by_message: Dict[str, List[tuple[Account, Chat]]] = defaultdict(list)
+            for account, chat in entries:
+                stats["candidates"] += 1
+                try:
+                    messages, _ = client.list_messages(chat.id, limit=1)
+                except UniPileError as e:
+                    log.warning("Cannot read candidate chat", extra={"chat_id": chat.id, "error": str(e)})
+                    continue
+                if messages:
+                    by_message[message_fingerprint(messages[0])].append((account, chat))
+            for members in by_message.values():
+                per_seat = {}
+                for account, chat in members:
+                    per_seat.setdefault(account.id, (account, chat))
+                if len(per_seat) > 1:
+                    groups.append(list(per_seat.values()))
+
+        with self._lock:
+            previous = {row["chat_id"]: dict(row) for row in self.conn.execute("SELECT * FROM shared_chats")}
+            primaries = {row["group_id"]: row["account_id"] for row in previous.values() if row["is_primary"]}
+            self.conn.executemany(
+                "DELETE FROM shared_chats WHERE account_id = ?", [(account.id,) for account in accounts]
+            )
+            now = time.time()
+            for members in groups:
+                old = next((previous[chat.id] for _, chat in members if chat.id in previous), None)
+                seats = [account.id for account, _ in members]
+                primary = primaries.get(old["group_id"]) if old else None
+                if primary not in seats:
+                    primary = next((a for a in prefer if a in seats), min(seats))
+                group_id = old["group_id"] if old else next(chat.id for account, chat in members if account.id == primary)
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO shared_chats "
+                    "(chat_id, group_id, account_id, seat_user_id, is_primary, name, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (chat.id, group_id, account.id, account.provider_user_id,
+                         int(account.id == primary), chat.name, now)
+                        for account, chat in members
+                    ],
+                )
+                stats["groups"] += 1
+                stats["mirrors"] += len(members) - 1
+            self.conn.commit()
+        return stats
+
+    # ==================== LOOKUP ====================
+
+    def mirror_ids(self, account_ids: Optional[Iterable[str]] = None) -> Set[str]:
+        """Chat ids a sync of these seats (default: all) skips, see reading_plan()."""
+        return self.reading_plan(account_ids)[0]
+
+    def reading_plan(
+        self, account_ids: Optional[Iterable[str]] = None
+    ) -> tuple[Set[str], Dict[str, List[Dict[str, Any]]]]:
+        """
+        Which chat of each shared conversation a sync of some seats reads.
+
+        The primary's chat is read when its seat is synced, else the chat of
+        the first synced member (by account id), so a conversation is never
+        skipped by every seat. The other synced members' chats are skipped.
+
+        Args:
+            account_ids: Seats being synced (default: all)
+
+        Returns:
+            Tuple of (chat ids to skip, read chat id -> members to fan its
+            messages out to, see fan_out())
+        """
+        wanted = set(account_ids) if account_ids is not None else None
+        skip: Set[str] = set()
+        mirrors: Dict[str, List[Dict[str, Any]]] = {}
+        for group in self.groups():
+            synced = [m for m in group["members"] if wanted is None or m["account_id"] in wanted]
+            if len(synced) < 2:
+                continue
+            reader, *others = synced  # Primary first
+            skip.update(m["chat_id"] for m in others)
+            mirrors[reader["chat_id"]] = [
+                {k: m[k] for k in ("chat_id", "account_id", "seat_user_id")} for m in others
+            ]
+        return skip, mirrors
+
+    def members(self, chat_id: str) -> List[Dict[str, Any]]:
+        """All members of the chat's group, primary first (empty if not shared)."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT m.* FROM shared_chats c JOIN shared_chats m ON m.group_id = c.group_id "
+                "WHERE c.chat_id = ? ORDER BY m.is_primary DESC, m.account_id",
+                (chat_id,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def groups(self) -> List[Dict[str, Any]]:
+        """Every group with its members, primary first."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM shared_chats ORDER BY group_id, is_primary DESC, account_id"
+            ).fetchall()
+        groups: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            group = groups.setdefault(row["group_id"], {"group_id": row["group_id"], "members": []})
+            group["members"].append(dict(row))
+        return list(groups.values())
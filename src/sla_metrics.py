@@ -0,0 +1,397 @@
+"""
+Streaming reply-latency and SLA metrics.
+
+Consumes message events one at a time (list_messages sweeps or webhook
+events) and keeps, per chat, only what the next event needs:
+
+- pending_since: time of the first inbound message not yet answered
+- open_inbound: inbound messages since the last reply
+- a (timestamp, message id) high-water mark so re-sweeps and duplicate
+  webhook deliveries are ignored
+
+An outbound message answering a pending chat records its time to reply in
+a latency sketch for the account and one for all accounts. The sketch is
+log-bucketed (relative error ~1%, like HDR/DDSketch histograms), so an
+update is O(1) and percentiles come from a few hundred counters instead
+of all latencies. Chats waiting longer than the SLA are read from an
+index on pending_since.
+
+State lives in data/sla_metrics.db; updates are buffered in memory and
+written by flush().
+"""
+import json
+import math
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.config import Config
+from src.models import Message
+from src.timeline import chat_stream, iter_chats
+from src.timeutils import to_epoch
+from src.triage import webhook_message
+
+DEFAULT_DB_PATH = Config.DATA_DIR / "sla_metrics.db"
+
+ALL_ACCOUNTS = "all"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_sla (
+    chat_id TEXT PRIMARY KEY,
+    account_id TEXT NOT NULL,
+    name TEXT,
+    pending_since REAL,
+    open_inbound INTEGER NOT NULL DEFAULT 0,
+    last_ts REAL,
+    last_id TEXT,
+    replies INTEGER NOT NULL DEFAULT 0,
+    breaches INTEGER NOT NULL DEFAULT 0,
+    last_latency REAL
+);
+CREATE INDEX IF NOT EXISTS idx_chat_sla_pending ON chat_sla (pending_since);
+CREATE INDEX IF NOT EXISTS idx_chat_sla_account_pending ON chat_sla (account_id, pending_since);
+
+CREATE TABLE IF NOT EXISTS latency_sketches (
+    scope TEXT PRIMARY KEY,
+    sketch TEXT NOT NULL,
+    breaches INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class LatencySketch:
+    """
+    Log-bucketed histogram of latencies in seconds.
+
+    Bucket i covers (gamma^(i-1), gamma^i] with gamma = (1+a)/(1-a), so
+    every reported percentile is within relative error `a` of a recorded
+    value. Latencies under MIN_SECONDS share the first bucket.
+    """
+
+    MIN_SECONDS = 1.0
+
+    def __init__(self, accuracy: float = 0.01):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, seconds: float) -> None:
+        seconds = max(seconds, 0.0)
+        index = math.ceil(math.log(max(seconds, self.MIN_SECONDS)) / self._log_gamma)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency at quantile q (0..1), or None without data."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q * self.count))  # Nearest rank
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def merge(self, other: "LatencySketch") -> None:
+        if other.accuracy != self.accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for index, n in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + n
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "accuracy": self.accuracy,
+            "counts": {str(i): n for i, n in self.counts.items()},
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, raw: str) -> "LatencySketch":
+        data = json.loads(raw)
+        sketch = cls(data["accuracy"])
+        sketch.counts = {int(i): n for i, n in data["counts"].items()}
+        sketch.count = data["count"]
+        sketch.total = data["total"]
+        sketch.min = data["min"]
+        sketch.max = data["max"]
+        return sketch
+
+
+@dataclass
+class ChatSLA:
+    chat_id: str
+    account_id: str
+    name: Optional[str] = None
+    pending_since: Optional[float] = None
+    open_inbound: int = 0
+    last_ts: Optional[float] = None
+    last_id: Optional[str] = None
+    replies: int = 0
+    breaches: int = 0
+    last_latency: Optional[float] = None
+
+
+class SLAMetrics:
+    """Incremental per-chat / per-account reply-latency metrics."""
+
+    def __init__(
+        self,
+        db_path: Path = DEFAULT_DB_PATH,
+        sla_seconds: float = Config.REPLY_SLA_HOURS * 3600,
+        accuracy: float = 0.01,
+    ):
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self.sla_seconds = sla_seconds
+        self.accuracy = accuracy
+
+        self._chats: Dict[str, ChatSLA] = {}
+        self._dirty_chats: set = set()
+        self._sketches: Dict[str, LatencySketch] = {}
+        self._breaches: Dict[str, int] = {}
+        self._dirty_scopes: set = set()
+        for row in self.conn.execute("SELECT scope, sketch, breaches FROM latency_sketches"):
+            self._sketches[row["scope"]] = LatencySketch.from_json(row["sketch"])
+            self._breaches[row["scope"]] = row["breaches"]
+
+    def close(self) -> None:
+        self.flush()
+        self.conn.close()
+
+    # ==================== UPDATES ====================
+
+    def observe(self, account_id: str, message: Message, chat_name: Optional[str] = None) -> Optional[str]:
+        """
+        Apply one message. Messages of a chat must arrive oldest first.
+
+        Returns:
+            "inbound", "reply", "breach" (reply later than the SLA),
+            "outbound" (not answering anything) or None if ignored
+            (no timestamp, or not newer than the chat's high-water mark)
+        """
+        ts = to_epoch(message.timestamp)
+        if ts is None:
+            return None
+        state = self._chat(message.chat_id, account_id)
+        if state.last_ts is not None and (
+            ts < state.last_ts or (ts == state.last_ts and message.id == state.last_id)
+        ):
+            return None
+
+        state.last_ts, state.last_id = ts, message.id
+        if chat_name:
+            state.name = chat_name
+        self._dirty_chats.add(state.chat_id)
+
+        if not message.is_sender:
+            if state.pending_since is None:
+                state.pending_since = ts
+            state.open_inbound += 1
+            return "inbound"
+
+        if state.pending_since is None:
+            return "outbound"
+
+        latency = ts - state.pending_since
+        breached = latency > self.sla_seconds
+        for scope in (f"account:{state.account_id}", ALL_ACCOUNTS):
+            self._sketch(scope).add(latency)
+            if breached:
+                self._breaches[scope] = self._breaches.get(scope, 0) + 1
+            self._dirty_scopes.add(scope)
+
+        state.pending_since = None
+        state.open_inbound = 0
+        state.replies += 1
+        state.breaches += int(breached)
+        state.last_latency = latency
+        return "breach" if breached else "reply"
+
+    def observe_many(self, account_id: str, messages: Iterable[Message], chat_name: Optional[str] = None) -> int:
+        """Apply messages (oldest first). Returns how many were not ignored."""
+        return sum(self.observe(account_id, m, chat_name) is not None for m in messages)
+
+    def apply_webhook_event(self, payload: Dict[str, Any]) -> bool:
+        """Apply a UniPile "message_received" webhook payload. Returns True if counted."""
+        parsed = webhook_message(payload)
+        if parsed is None:
+            return False
+        account_id, message = parsed
+        applied = self.observe(account_id, message) is not None
+        self.flush()
+        return applied
+
+    def flush(self) -> None:
+        """Write changed chats and sketches to the database."""
+        if self._dirty_chats:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO chat_sla (chat_id, account_id, name, pending_since, open_inbound, "
+                "last_ts, last_id, replies, breaches, last_latency) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        s.chat_id, s.account_id, s.name, s.pending_since, s.open_inbound,
+                        s.last_ts, s.last_id, s.replies, s.breaches, s.last_latency,
+                    )
+                    for s in (self._chats[chat_id] for chat_id in self._dirty_chats)
+                ],
+            )
+        if self._dirty_scopes:
+            now = time.time()
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO latency_sketches (scope, sketch, breaches, updated_at) VALUES (?, ?, ?, ?)",
+                [
+                    (scope, self._sketches[scope].to_json(), self._breaches.get(scope, 0), now)
+                    for scope in self._dirty_scopes
+                ],
+            )
+        self.conn.commit()
+        self._dirty_chats.clear()
+        self._dirty_scopes.clear()
+
+    # ==================== SYNC ====================
+
+    def sync_account(
+        self,
+        client,
+        account_id: str,
+        since: Optional[float] = None,
+        page_size: int = 50,
+    ) -> tuple[int, int]:
+        """
+        Feed new messages of an account from the API.
+
+        Each chat is read back to its high-water mark (or `since` for chats
+        not seen yet). Chats come most recently active first, so paging
+        stops at the first chat with nothing newer than its mark.
+
+        Returns:
+            Tuple of (chats updated, messages applied)
+        """
+        chats = applied = 0
+        for chat in iter_chats(client, account_id, page_size=page_size):
+            state = self._chat(chat.id, account_id, create=False)
+            last_activity = to_epoch(chat.last_message_timestamp)
+            mark = state.last_ts if state and state.last_ts is not None else since
+            if mark is not None and last_activity is not None:
+                if last_activity < mark or (state and last_activity == state.last_ts):
+                    break  # This chat and all less recently active ones are up to date
+
+            entries = list(chat_stream(client, chat, mark, page_size))
+            entries.reverse()  # Oldest first
+            count = self.observe_many(account_id, (e.message for e in entries), chat.name)
+            if count:
+                chats += 1
+                applied += count
+            self.flush()
+        return chats, applied
+
+    # ==================== QUERIES ====================
+
+    def sketch(self, account_id: Optional[str] = None) -> LatencySketch:
+        """Time-to-reply sketch of one account (or of all accounts)."""
+        scope = f"account:{account_id}" if account_id else ALL_ACCOUNTS
+        return self._sketches.get(scope) or LatencySketch(self.accuracy)
+
+    def summary(self, account_id: Optional[str] = None, now: Optional[float] = None) -> Dict[str, Any]:
+        """Percentiles, late replies and open/breaching counts of one account (or all)."""
+        self.flush()
+        now = time.time() if now is None else now
+        where, params = ("WHERE account_id = ?", (account_id,)) if account_id else ("", ())
+        row = self.conn.execute(
+            "SELECT COUNT(pending_since), COALESCE(SUM(open_inbound), 0), "
+            "COALESCE(SUM(pending_since < ?), 0), MIN(pending_since) "
+            f"FROM chat_sla {where}",
+            (now - self.sla_seconds, *params),
+        ).fetchone()
+        sketch = self.sketch(account_id)
+        scope = f"account:{account_id}" if account_id else ALL_ACCOUNTS
+        return {
+            "replies": sketch.count,
+            "p50": sketch.percentile(0.5),
+            "p90": sketch.percentile(0.9),
+            "p95": sketch.percentile(0.95),
+            "p99": sketch.percentile(0.99),
+            "mean": sketch.mean(),
+            "max": sketch.max,
+            "late_replies": self._breaches.get(scope, 0),
+            "open_chats": row[0],
+            "open_inbound": row[1],
+            "breaching": row[2],
+            "oldest_pending": row[3],
+        }
+
+    def breaching(
+        self,
+        n: int = 20,
+        account_id: Optional[str] = None,
+        now: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Chats waiting for a reply longer than the SLA, longest waiting first."""
+        self.flush()
+        cutoff = (time.time() if now is None else now) - self.sla_seconds
+        if account_id:
+            rows = self.conn.execute(
+                "SELECT * FROM chat_sla WHERE account_id = ? AND pending_since < ? "
+                "ORDER BY pending_since LIMIT ?",
+                (account_id, cutoff, n),
+            )
+        else:
+            rows = self.conn.execute(
+                "SELECT * FROM chat_sla WHERE pending_since < ? ORDER BY pending_since LIMIT ?",
+                (cutoff, n),
+            )
+        return [dict(row) for row in rows]
+
+    def accounts(self) -> List[str]:
+        """Accounts with recorded state."""
+        return [row[0] for row in self.conn.execute("SELECT DISTINCT account_id FROM chat_sla ORDER BY account_id")]
+
+    # ==================== INTERNAL ====================
+
+    def _chat(self, chat_id: str, account_id: str, create: bool = True) -> Optional[ChatSLA]:
+        state = self._chats.get(chat_id)
+        if state is not None:
+            return state
+        row = self.conn.execute("SELECT * FROM chat_sla WHERE chat_id = ?", (chat_id,)).fetchone()
+        if row is not None:
+            state = ChatSLA(**dict(row))
+        elif create:
+            state = ChatSLA(chat_id=chat_id, account_id=account_id)
+        else:
+            return None
+        self._chats[chat_id] = state
+        return state
+
+    def _sketch(self, scope: str) -> LatencySketch:
+        sketch = self._sketches.get(scope)
+        if sketch is None:
+            sketch = self._sketches[scope] = LatencySketch(self.accuracy)
+        return sketch
@@ -0,0 +1,243 @@
+"""
+Message sync split into leased work units (see src/work_leases.py).
+
+plan_sync() pages through the chats of each account (most recently
+active first) and turns every page of chats active since the cutoff into
+one unit: account x chat page. SyncWorker claims units, fetches the
+messages of the unit's chats since the cutoff and writes them to
+<output_dir>/<run_id>/<unit_id>.jsonl, so throughput grows with the
+number of workers and a re-leased unit simply rewrites its file.
+
+Chats shared by several seats (see src/shared_chats.py) can be left out
+with skip_chats, so each shared conversation is read once; the messages
+of the chat that is read are written again as each skipped seat's view
+(mirrors, carried in the unit) and matched for that seat's alerts.
+
+With an AlertEngine, every synced message is also matched against the
+alert rules; alerts of a unit are logged once the unit is completed, so a
+re-leased unit does not log them twice.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from src.alerts import Alert, AlertEngine, AlertLog
+from src.config import Config
+from src.log_context import correlation
+from src.models import Chat
+from src.shared_chats import fan_out
+from src.timeline import chat_stream, iter_chats
+from src.timeutils import to_epoch
+from src.unipile_client import UniPileError
+from src.work_leases import WorkUnit
+
+DEFAULT_OUTPUT_DIR = Config.OUTPUTS_DIR / "sync"
+
+log = logging.getLogger("unipile.sync")
+
+
+class LeaseLost(Exception):
+    """The unit's lease expired and may be held by another worker."""
+
+
+def plan_sync(
+    client,
+    store,
+    run_id: str,
+    account_ids: Iterable[str],
+    since: float,
+    chats_per_unit: int = 50,
+    skip_chats: Optional[Set[str]] = None,
+    mirrors: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+) -> int:
+    """
+    Add the units of a sync run to a lease store.
+
+    Args:
+        client: UniPileClient instance
+        store: Lease store (SQLiteLeaseStore / RedisLeaseStore)
+        run_id: Run to add the units to
+        account_ids: Accounts to sync
+        since: Sync messages at or after this epoch time
+        chats_per_unit: Chats per unit (= chats per list_chats page)
+        skip_chats: Chat ids not to sync (e.g. SharedChats.reading_plan()[0])
+        mirrors: Chat id -> members of skipped chats to write its messages for
+            (e.g. SharedChats.reading_plan()[1])
+
+    Returns:
+        Number of units added
+    """
+    added = skipped = 0
+    for account_id in account_ids:
+        units = []
+        page: List[list] = []
+        for chat in iter_chats(client, account_id, page_size=chats_per_unit):
+            last = to_epoch(chat.last_message_timestamp)
+            if last is not None and last < since:
+                break  # Chats come most recently active first: the rest are older too
+            if skip_chats and chat.id in skip_chats:
+                skipped += 1
+                continue
+            page.append([chat.id, last])
+            if len(page) == chats_per_unit:
+                units.append(_unit(account_id, len(units), page, since, mirrors))
+                page = []
+        if page:
+            units.append(_unit(account_id, len(units), page, since, mirrors))
+        added += store.add_units(run_id, units)
+    if skipped:
+        log.info("Skipped shared chats", extra={"run_id": run_id, "chats": skipped})
+    return added
+
+
+def _unit(
+    account_id: str, page_no: int, chats: List[list], since: float, mirrors: Optional[Dict[str, List[Dict]]]
+) -> tuple[str, Dict]:
+    unit_id = f"{account_id}-p{page_no:05d}"
+    payload = {"account_id": account_id, "page": page_no, "chats": chats, "since": since}
+    unit_mirrors = {chat_id: mirrors[chat_id] for chat_id, _ in chats if mirrors and chat_id in mirrors}
+    if unit_mirrors:
+        payload["mirrors"] = unit_mirrors
+    return unit_id, payload
+
+
+class SyncWorker:
+    """Claims sync units until the run has no claimable units left."""
+
+    def __init__(
+        self,
+        client,
+        store,
+        run_id: str,
+        output_dir: Path = DEFAULT_OUTPUT_DIR,
+        lease_seconds: float = Config.LEASE_SECONDS,
+        page_size: int = 50,
+        worker_id: Optional[str] = None,
+        alerts: Optional[AlertEngine] = None,
+        alert_log: Optional[AlertLog] = None,
+    ):
+        self.client = client
+        self.store = store
+        self.run_id = run_id
+        self.output_dir = Path(output_dir) / run_id
+        self.lease_seconds = lease_seconds
+        self.page_size = page_size
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.alerts = alerts
+        self.alert_log = alert_log or (AlertLog() if alerts else None)
+        self.stats = {"units": 0, "messages": 0, "lost": 0, "failed": 0, "alerts": 0}
+
+    def run(
+        self,
+        stop: Optional[threading.Event] = None,
+        wait: bool = False,
+        poll_interval: float = 5.0,
+        on_event: Optional[Callable[[str, WorkUnit, object], None]] = None,
+    ) -> Dict[str, int]:
+        """
+        Process units until none is claimable (or until stopped).
+
+        Args:
+            stop: Set to stop after the current unit
+            wait: Keep polling for units (re-leases, units added later) instead of exiting
+            poll_interval: Seconds between polls when waiting
+            on_event: Called with ("done"|"lost"|"failed", unit, detail)
+        """
+        stop = stop or threading.Event()
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        while not stop.is_set():
+            unit = self.store.claim(self.run_id, self.worker_id, self.lease_seconds)
+            if unit is None:
+                if not wait:
+                    break
+                stop.wait(poll_interval)
+                continue
+            with correlation(f"sync-{unit.unit_id}"):
+                event, detail = self._process(unit)
+            if on_event:
+                on_event(event, unit, detail)
+        return self.stats
+
+    def _process(self, unit: WorkUnit) -> tuple[str, object]:
+        lost = threading.Event()
+        done = threading.Event()
+        beat = threading.Thread(target=self._heartbeat, args=(unit, lost, done), daemon=True)
+        beat.start()
+        started = time.time()
+        try:
+            count, alerts = self._sync_unit(unit, lost)
+        except LeaseLost:
+            self.stats["lost"] += 1
+            log.warning("Lease lost", extra={"unit": unit.unit_id, "run_id": self.run_id})
+            return "lost", None
+        except (UniPileError, OSError) as e:
+            self.stats["failed"] += 1
+            self.store.fail(unit, str(e))
+            log.warning("Unit failed", extra={"unit": unit.unit_id, "attempt": unit.attempt, "error": str(e)})
+            return "failed", e
+        finally:
+            done.set()
+            beat.join()
+
+        result = {
+            "messages": count,
+            "chats": len(unit.payload["chats"]),
+            "seconds": round(time.time() - started, 3),
+            "worker": self.worker_id,
+        }
+        if not self.store.complete(unit, result):
+            self.stats["lost"] += 1
+            return "lost", None
+        self.stats["units"] += 1
+        self.stats["messages"] += count
+        if alerts:
+            self.stats["alerts"] += self.alert_log.append(alerts)
+        log.info("Unit done", extra={"unit": unit.unit_id, **result})
+        return "done", result
+
+    def _sync_unit(self, unit: WorkUnit, lost: threading.Event) -> tuple[int, List[Alert]]:
+        """Write the unit's messages to its JSONL file (atomically). Returns (message count, alerts)."""
+        payload = unit.payload
+        mirrors = payload.get("mirrors", {})
+        path = self.output_dir / f"{unit.unit_id}.jsonl"
+        tmp = path.with_name(f"{path.name}.{self.worker_id}.tmp")
+        count = 0
+        alerts = []
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                for chat_id, _ in payload["chats"]:
+                    if lost.is_set():
+                        raise LeaseLost(unit.unit_id)
+                    chat = Chat(id=chat_id, account_id=payload["account_id"])
+                    chat_mirrors = mirrors.get(chat_id, [])
+                    for entry in chat_stream(self.client, chat, payload["since"], self.page_size):
+                        f.write(entry.message.model_dump_json() + "\n")
+                        count += 1
+                        if self.alerts:
+                            alerts += self.alerts.match(entry.message, payload["account_id"])
+                        for member, view in zip(chat_mirrors, fan_out(entry.message, chat_mirrors)):
+                            f.write(view.model_dump_json() + "\n")
+                            count += 1
+                            if self.alerts:
+                                alerts += self.alerts.match(view, member["account_id"])
+            if lost.is_set():
+                raise LeaseLost(unit.unit_id)
+            os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        return count, alerts
+
+    def _heartbeat(self, unit: WorkUnit, lost: threading.Event, done: threading.Event) -> None:
+        """Renew the lease every third of its length until the unit is finished."""
+        while not done.wait(self.lease_seconds / 3):
+            try:
+                if not self.store.heartbeat(unit, self.lease_seconds):
+                    lost.set()
+                    return
+            except Exception as e:  # Store unreachable: keep trying until the lease runs out
+                log.warning("Heartbeat failed", extra={"unit": unit.unit_id, "error": str(e)})
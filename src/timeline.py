@@ -0,0 +1,180 @@
+"""
+Global message timeline as a streaming k-way merge.
+
+Each chat's messages come from the API newest first, so every chat is a
+sorted stream. The chats themselves come ordered by last activity, and a
+chat's last activity is an upper bound for all of its messages. The
+merge keeps one head message per opened chat in a heap and only opens
+the next chat once the heap's newest head is older than that chat's
+last activity. Together this gives:
+
+- output starts as soon as the first heads are known
+- memory is bounded by the chats active in the window (one page each),
+  not by the number of messages
+- with a limit, paging stops as soon as N messages have been produced
+  (no further chats or pages are fetched)
+
+With prefetch=N, opening a chat also fetches the first pages of the next
+chats within the window in one concurrent batch (list_messages_many), so
+opening many chats no longer costs one round trip each; at most N - 1
+first pages are fetched beyond what the merge ends up reading.
+"""
+import heapq
+import math
+from collections import deque
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from src.models import Chat, Message
+from src.timeutils import to_epoch
+from src.unipile_client import UniPileError
+
+
+class TimelineEntry(NamedTuple):
+    ts: float
+    chat: Chat
+    message: Message
+
+
+def iter_chats(client, account_id: str, page_size: int = 50) -> Iterator[Chat]:
+    """All chats of an account, most recently active first (lazy paging)."""
+    cursor = None
+    while True:
+        chats, cursor = client.list_chats(account_id, limit=page_size, cursor=cursor)
+        yield from chats
+        if not cursor or not chats:
+            return
+
+
+def chat_stream(
+    client,
+    chat: Chat,
+    since: Optional[float] = None,
+    page_size: int = 50,
+    first_page: Optional[tuple] = None,
+) -> Iterator[TimelineEntry]:
+    """
+    A chat's messages newest first, lazily paged, stopping at `since`.
+
+    Messages without a timestamp are skipped. first_page is an already
+    fetched (messages, cursor) newest page.
+    """
+    cursor = None
+    while True:
+        if first_page is not None:
+            (messages, cursor), first_page = first_page, None
+        else:
+            messages, cursor = client.list_messages(chat.id, limit=page_size, cursor=cursor)
+        for message in messages:
+            ts = to_epoch(message.timestamp)
+            if ts is None:
+                continue
+            if since is not None and ts < since:
+                return
+            yield TimelineEntry(ts, chat, message)
+        if not cursor or not messages:
+            return
+
+
+def merge_timeline(
+    client,
+    account_id: str,
+    since: Optional[float] = None,
+    limit: Optional[int] = None,
+    page_size: int = 50,
+    chat_page_size: int = 50,
+    on_error: Optional[Callable[[Chat, UniPileError], None]] = None,
+    prefetch: int = 0,
+) -> Iterator[TimelineEntry]:
+    """
+    Messages across all chats of an account, newest first.
+
+    Args:
+        client: UniPileClient instance
+        account_id: Account to read
+        since: Only messages at or after this epoch time
+        limit: Stop after this many messages
+        page_size: Messages per API page
+        chat_page_size: Chats per API page
+        on_error: Called for chats whose messages cannot be read (they are skipped)
+        prefetch: Fetch the first pages of up to this many chats at once (0: one by one)
+
+    Yields:
+        TimelineEntry(ts, chat, message), newest first
+    """
+    chats = iter_chats(client, account_id, chat_page_size)
+    heap: List[tuple] = []  # (-ts, seq, entry, stream)
+    seq = 0
+    emitted = 0
+    lookahead: deque = deque()  # Chats taken from `chats` for a prefetch, not opened yet
+    first_pages: Dict[str, object] = {}  # chat id -> BatchResult of its first page
+
+    def take_chat() -> Optional[Chat]:
+        return lookahead.popleft() if lookahead else next(chats, None)
+
+    def first_page(chat: Chat):
+        """Prefetched first page of a chat, batch-fetching it with the chats after it."""
+        if chat.id not in first_pages:
+            batch = [chat] + [
+                c for c in lookahead if c.id not in first_pages and (since is None or bound(c) >= since)
+            ][:prefetch - 1]
+            while len(batch) < prefetch:
+                upcoming = next(chats, None)
+                if upcoming is None:
+                    break
+                lookahead.append(upcoming)
+                if since is not None and bound(upcoming) < since:
+                    break  # This and all later chats are outside the window
+                batch.append(upcoming)
+            for result in client.list_messages_many([c.id for c in batch], limit=page_size, workers=prefetch):
+                first_pages[result.key] = result
+        return first_pages.pop(chat.id)
+
+    def bound(chat: Optional[Chat]) -> float:
+        """Upper bound for a chat's messages (inf when unknown)."""
+        if chat is None:
+            return -math.inf
+        ts = to_epoch(chat.last_message_timestamp)
+        return math.inf if ts is None else ts
+
+    def push_next(stream: Iterator[TimelineEntry], chat: Chat) -> None:
+        nonlocal seq
+        try:
+            entry = next(stream)
+        except StopIteration:
+            return
+        except UniPileError as e:
+            if on_error:
+                on_error(chat, e)
+            return
+        heapq.heappush(heap, (-entry.ts, seq, entry, stream))
+        seq += 1
+
+    if limit is not None and limit <= 0:
+        return
+
+    next_chat = take_chat()
+    while True:
+        # Open chats until no unopened chat can hold a newer message than the heap top
+        while next_chat is not None and (not heap or bound(next_chat) > -heap[0][0]):
+            if since is not None and bound(next_chat) < since:
+                next_chat = None  # All remaining chats are older than the window
+                break
+            if prefetch > 1:
+                result = first_page(next_chat)
+                if result.ok:
+                    push_next(chat_stream(client, next_chat, since, page_size, result.value), next_chat)
+                elif on_error:
+                    on_error(next_chat, result.error)
+            else:
+                push_next(chat_stream(client, next_chat, since, page_size), next_chat)
+            next_chat = take_chat()
+
+        if not heap:
+            return
+
+        _, _, entry, stream = heapq.heappop(heap)
+        yield entry
+        emitted += 1
+        if limit is not None and emitted >= limit:
+            return
+        push_next(stream, entry.chat)
@@ -0,0 +1,25 @@
+"""
+Timestamp helpers shared by the stores and indexes.
+
+UniPile returns timestamps as ISO strings ("...Z"), the Pydantic models
+hold datetimes and the SQLite stores keep epoch seconds; to_epoch()
+normalizes all of them.
+"""
+from datetime import datetime
+from typing import Any, Optional
+
+
+def to_epoch(ts: Any) -> Optional[float]:
+    """Convert datetime / ISO string / epoch to epoch seconds."""
+    if ts is None or ts == "":
+        return None
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    if isinstance(ts, str):
+        try:
+            ts = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if isinstance(ts, datetime):
+        return ts.timestamp()
+    return None
@@ -0,0 +1,289 @@
+"""
+Unread/triage index across all chats and accounts.
+
+Keeps one row per chat with the fields that decide whether it needs a
+reply, and an index ordered by priority:
+1. awaiting reply (last message is inbound) first
+2. more unread messages first
+3. longest waiting (oldest last inbound message) first
+
+Top-N is an index scan of N rows, independent of how many chats exist.
+Rows are updated incrementally from list_chats sweeps, single messages
+and UniPile webhook events.
+"""
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.config import Config
+from src.models import Chat, Message
+from src.timeutils import to_epoch
+
+DEFAULT_DB_PATH = Config.DATA_DIR / "triage.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS triage (
+    chat_id TEXT PRIMARY KEY,
+    account_id TEXT NOT NULL,
+    name TEXT,
+    unread_count INTEGER NOT NULL DEFAULT 0,
+    last_message_at REAL,
+    last_is_sender INTEGER,
+    last_inbound_at REAL,
+    awaiting_reply INTEGER NOT NULL DEFAULT 0,
+    needs_attention INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_triage_priority
+    ON triage (needs_attention, awaiting_reply DESC, unread_count DESC, last_inbound_at);
+CREATE INDEX IF NOT EXISTS idx_triage_account_priority
+    ON triage (account_id, needs_attention, awaiting_reply DESC, unread_count DESC, last_inbound_at);
+"""
+
+PRIORITY_ORDER = "ORDER BY awaiting_reply DESC, unread_count DESC, last_inbound_at ASC"
+
+
+def webhook_message(payload: Dict[str, Any]) -> Optional[tuple[str, Message]]:
+    """(account_id, Message) of a "message_received" webhook payload, else None."""
+    chat_id = payload.get("chat_id")
+    if payload.get("event") != "message_received" or not chat_id:
+        return None
+
+    sender = payload.get("sender") or {}
+    account_info = payload.get("account_info") or {}
+    is_sender = payload.get("is_sender")
+    if is_sender is None:
+        own_id = account_info.get("user_id")
+        is_sender = bool(own_id) and sender.get("attendee_provider_id") == own_id
+
+    return payload.get("account_id", ""), Message(
+        id=payload.get("message_id", ""),
+        chat_id=chat_id,
+        sender_id=sender.get("attendee_provider_id"),
+        sender_name=sender.get("attendee_name"),
+        text=payload.get("message"),
+        timestamp=payload.get("timestamp"),
+        is_sender=bool(is_sender),
+    )
+
+
+class TriageIndex:
+    """SQLite-backed priority index of chats needing attention."""
+
+    def __init__(self, db_path: Path = DEFAULT_DB_PATH):
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ==================== QUERIES ====================
+
+    def top(self, n: int = 20, account_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Top-N chats needing attention, highest priority first."""
+        if account_id:
+            rows = self.conn.execute(
+                f"SELECT * FROM triage WHERE account_id = ? AND needs_attention = 1 {PRIORITY_ORDER} LIMIT ?",
+                (account_id, n),
+            )
+        else:
+            rows = self.conn.execute(
+                f"SELECT * FROM triage WHERE needs_attention = 1 {PRIORITY_ORDER} LIMIT ?",
+                (n,),
+            )
+        return [dict(row) for row in rows]
+
+    def get(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT * FROM triage WHERE chat_id = ?", (chat_id,)).fetchone()
+        return dict(row) if row else None
+
+    def count(self) -> tuple[int, int]:
+        """Returns (chats indexed, chats needing attention)."""
+        row = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(needs_attention), 0) FROM triage"
+        ).fetchone()
+        return row[0], row[1]
+
+    # ==================== UPDATES ====================
+
+    def apply_chat(self, chat: Chat, last_is_sender: Optional[bool] = None) -> None:
+        """
+        Update a chat from list_chats/get_chat data.
+
+        Args:
+            chat: Chat model
+            last_is_sender: Direction of the last message if known
+                (defaults to chat.last_message_is_sender)
+        """
+        if last_is_sender is None:
+            last_is_sender = chat.last_message_is_sender
+
+        current = self.get(chat.id) or {}
+        last_message_at = to_epoch(chat.last_message_timestamp) or current.get("last_message_at")
+        last_inbound_at = current.get("last_inbound_at")
+
+        if last_is_sender is None:
+            last_is_sender = current.get("last_is_sender")
+        elif not last_is_sender and last_message_at:
+            last_inbound_at = max(last_inbound_at or 0, last_message_at)
+
+        self._write(
+            chat.id,
+            chat.account_id,
+            chat.name or current.get("name"),
+            chat.unread_count,
+            last_message_at,
+            last_is_sender,
+            last_inbound_at,
+        )
+
+    def apply_message(
+        self,
+        account_id: str,
+        message: Message,
+        chat_name: Optional[str] = None,
+    ) -> None:
+        """Update a chat with a single new message (e.g. from a webhook)."""
+        if not message.chat_id:
+            return
+
+        current = self.get(message.chat_id) or {}
+        ts = to_epoch(message.timestamp) or time.time()
+
+        # Ignore events older than what the index already reflects
+        if current.get("last_message_at") and ts < current["last_message_at"]:
+            return
+
+        if message.is_sender:
+            unread = 0
+            last_inbound_at = current.get("last_inbound_at")
+        else:
+            unread = (current.get("unread_count") or 0) + 1
+            last_inbound_at = ts
+
+        self._write(
+            message.chat_id,
+            account_id or current.get("account_id", ""),
+            chat_name or current.get("name"),
+            unread,
+            ts,
+            message.is_sender,
+            last_inbound_at,
+        )
+
+    def mark_read(self, chat_id: str) -> None:
+        """Reset unread count (chat stays awaiting reply if last message is inbound)."""
+        self.conn.execute(
+            "UPDATE triage SET unread_count = 0, needs_attention = awaiting_reply, updated_at = ? "
+            "WHERE chat_id = ?",
+            (time.time(), chat_id),
+        )
+        self.conn.commit()
+
+    def remove(self, chat_id: str) -> None:
+        self.conn.execute("DELETE FROM triage WHERE chat_id = ?", (chat_id,))
+        self.conn.commit()
+
+    def apply_webhook_event(self, payload: Dict[str, Any]) -> bool:
+        """
+        Apply a UniPile messaging webhook payload.
+
+        Handles "message_received" (new inbound or outbound message) and
+        "message_read" events.
+
+        Returns:
+            True if the index was updated
+        """
+        event = payload.get("event")
+        chat_id = payload.get("chat_id")
+        if not chat_id:
+            return False
+
+        if event == "message_read":
+            self.mark_read(chat_id)
+            return True
+
+        if event != "message_received":
+            return False
+
+        parsed = webhook_message(payload)
+        if parsed is None:
+            return False
+        account_id, message = parsed
+        self.apply_message(account_id, message)
+        return True
+
+    # ==================== SYNC ====================
+
+    def sync_account(self, client, account_id: str, page_size: int = 50) -> tuple[int, int]:
+        """
+        Refresh the index from list_chats.
+
+        Chats come newest first, so paging stops at the first page where no
+        chat changed since the last sync. For changed chats whose last
+        message direction is unknown, one message is fetched to find out.
+
+        Returns:
+            Tuple of (chats seen, chats updated)
+        """
+        seen = updated = 0
+        cursor = None
+        while True:
+            chats, cursor = client.list_chats(account_id, limit=page_size, cursor=cursor)
+            changed_in_page = 0
+
+            for chat in chats:
+                seen += 1
+                current = self.get(chat.id)
+                ts = to_epoch(chat.last_message_timestamp)
+                if (
+                    current
+                    and current["last_message_at"] == ts
+                    and current["unread_count"] == chat.unread_count
+                ):
+                    continue
+
+                last_is_sender = chat.last_message_is_sender
+                if last_is_sender is None:
+                    messages, _ = client.list_messages(chat.id, limit=1)
+                    if messages:
+                        last_is_sender = messages[0].is_sender
+
+                self.apply_chat(chat, last_is_sender=last_is_sender)
+                changed_in_page += 1
+
+            updated += changed_in_page
+            if not cursor or not chats or changed_in_page == 0:
+                break
+
+        return seen, updated
+
+    # ==================== INTERNAL ====================
+
+    def _write(
+        self,
+        chat_id: str,
+        account_id: str,
+        name: Optional[str],
+        unread_count: int,
+        last_message_at: Optional[float],
+        last_is_sender: Optional[bool],
+        last_inbound_at: Optional[float],
+    ) -> None:
+        awaiting = int(last_is_sender is not None and not last_is_sender)
+        needs_attention = int(awaiting or unread_count > 0)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO triage (chat_id, account_id, name, unread_count, last_message_at, "
+            "last_is_sender, last_inbound_at, awaiting_reply, needs_attention, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                chat_id, account_id, name, unread_count, last_message_at,
+                None if last_is_sender is None else int(last_is_sender),
+                last_inbound_at, awaiting, needs_attention, time.time(),
+            ),
+        )
+        self.conn.commit()
@@ -1,12 +1,23 @@
 """
 UniPile API Client - Core wrapper for UniPile messaging API.
 """
+import logging
 import time
-from typing import List, Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, NamedTuple, Optional
 import requests
+from requests.adapters import HTTPAdapter
 
+from src.account_health import AccountHealth
 from src.config import Config
-from src.models import Account, Chat, Message, ChatParticipant
+from src.http_cache import HTTPCache
+from src.interning import INTERNER, Interner
+from src.log_context import get_correlation_id, new_id, wrap
+from src.models import Account, Chat, Message
+from src.profiling import phase
+
+log = logging.getLogger("unipile.client")
+logging.getLogger("unipile").addHandler(logging.NullHandler())
 
 
 class UniPileError(Exception):
@@ -25,15 +36,72 @@ class UniPileError(Exception):
         return s
 
 
+class AccountUnavailable(UniPileError):
+    """Request refused locally: the account is marked down by the health registry."""
+
+    def __init__(self, account_id: str, reason: str, retry_at: Optional[float] = None):
+        self.account_id = account_id
+        self.reason = reason
+        self.retry_at = retry_at  # Next health probe (epoch time)
+        suggestion = (
+            "Reconnect the account in the UniPile dashboard" if reason.startswith("status ")
+            else "Requests resume once a health probe of the account succeeds"
+        )
+        super().__init__(f"Account {account_id} unavailable ({reason})", suggestion=suggestion)
+
+
+class BatchResult(NamedTuple):
+    """Outcome of one id of a batch call: value, or the error it failed with."""
+
+    key: Hashable  # The requested id
+    value: Any = None
+    error: Optional[UniPileError] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def provider_user_id(account: Dict[str, Any]) -> Optional[str]:
+    """The seat's own provider id from a raw /accounts item (connection_params.im.id)."""
+    params = account.get("connection_params")
+    im = params.get("im") if isinstance(params, dict) else None
+    return im.get("id") if isinstance(im, dict) else None
+
+
 class UniPileClient:
     """Client for interacting with UniPile API."""
 
-    def __init__(self):
-        """Initialize client with credentials from environment."""
+    def __init__(
+        self,
+        cache: Optional[HTTPCache] = None,
+        interner: Optional[Interner] = None,
+        health: Optional[AccountHealth] = None,
+    ):
+        """
+        Initialize client with credentials from environment.
+
+        Args:
+            cache: HTTP cache for GET requests (default: per HTTP_CACHE in .env, off if unset)
+            interner: Identity map for repeated ids/names and participants
+                (default: the process-wide INTERNER)
+            health: Account health registry gating requests for broken seats
+                (default: per ACCOUNT_HEALTH in .env, on if unset)
+        """
         Config.validate()
 
+        self.cache = cache if cache is not None else HTTPCache.from_config()
+        self.interner = interner if interner is not None else INTERNER
+        self.health = health if health is not None else AccountHealth.from_config()
+        if self.health is not None and self.health.prober is None:
+            self.health.prober = self.get_account
+
         self.base_url = Config.get_base_url()
         self.session = requests.Session()
+        # One pooled connection per concurrent batch worker (keep-alive reuse across calls)
+        adapter = HTTPAdapter(pool_maxsize=max(10, Config.BATCH_WORKERS))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.session.headers.update({
             "X-API-KEY": Config.UNIPILE_ACCESS_TOKEN,
             "Accept": "application/json",
@@ -60,94 +128,262 @@ class UniPileClient:
             Parsed JSON response
 
         Raises:
+            AccountUnavailable: If the request is for an account marked down
             UniPileError: On API errors
         """
         url = f"{self.base_url}{endpoint}"
-        start_time = time.time()
+        request_id = new_id()
+        start_time = time.perf_counter()
+
+        account_id = self.health.account_for(endpoint, params, json) if self.health is not None else None
+        if account_id:
+            seat = self.health.blocked(account_id)
+            if seat is not None:
+                self._log_request(logging.DEBUG, method, endpoint, request_id, start_time, error="account_down")
+                raise AccountUnavailable(account_id, seat.reason, seat.next_probe_at)
+
+        cache_key = entry = headers = None
+        if self.cache is not None and method == "GET":
+            cache_key = HTTPCache.key(url, params, Config.UNIPILE_ACCESS_TOKEN or "")
+            entry = self.cache.get(cache_key)
+            if entry is not None:
+                if entry.is_fresh():
+                    self.cache.count("hit")
+                    self._log_request(logging.DEBUG, method, endpoint, request_id, start_time, cache="hit")
+                    with phase("parse"):
+                        return entry.data()
+                headers = entry.conditional_headers() or None
 
         try:
-            response = self.session.request(
-                method=method,
-                url=url,
-                params=params,
-                json=json,
-                timeout=30,
-            )
-
-            elapsed = round(time.time() - start_time, 2)
-
-            # Handle errors
-            if response.status_code == 401:
-                raise UniPileError(
-                    "Authentication failed",
-                    status_code=401,
-                    suggestion="Check your UNIPILE_ACCESS_TOKEN in .env file",
-                )
-            elif response.status_code == 404:
-                raise UniPileError(
-                    f"Resource not found: {endpoint}",
-                    status_code=404,
-                    suggestion="Check if the ID is correct",
-                )
-            elif response.status_code >= 400:
-                error_msg = response.text[:200] if response.text else "Unknown error"
-                raise UniPileError(
-                    f"API error: {error_msg}",
-                    status_code=response.status_code,
+            with phase("network"):
+                response = self.session.request(
+                    method=method,
+                    url=url,
+                    params=params,
+                    json=json,
+                    headers=headers,
+                    timeout=30,
                 )
-
-            return response.json()
-
         except requests.exceptions.Timeout:
+            self._log_request(logging.WARNING, method, endpoint, request_id, start_time, error="timeout")
+            if account_id:
+                self.health.record(account_id, 0)
             raise UniPileError(
                 "Request timed out",
                 suggestion="Check your internet connection or try again",
             )
         except requests.exceptions.ConnectionError:
+            self._log_request(logging.WARNING, method, endpoint, request_id, start_time, error="connection")
+            if account_id:
+                self.health.record(account_id, 0)
             raise UniPileError(
                 "Connection failed",
                 suggestion="Check UNIPILE_DSN in .env and your internet connection",
             )
 
+        if account_id:
+            self.health.record(account_id, response.status_code)
+
+        cache_status = None
+        if cache_key is not None:
+            if response.status_code == 304 and entry is not None:
+                entry = self.cache.revalidated(cache_key, entry, response)
+                cache_status = "revalidated"
+            else:
+                cache_status = self.cache.store(cache_key, response, entry)
+
+        level = logging.WARNING if response.status_code >= 400 else logging.DEBUG
+        self._log_request(
+            level, method, endpoint, request_id, start_time,
+            status=response.status_code, bytes=len(response.content), cache=cache_status,
+        )
+
+        if cache_status == "revalidated":
+            with phase("parse"):
+                return entry.data()
+
+        self._raise_for_status(response, endpoint)
+
+        with phase("parse"):
+            return response.json()
+
+    @staticmethod
+    def _log_request(
+        level: int,
+        method: str,
+        endpoint: str,
+        request_id: str,
+        start_time: float,
+        **fields,
+    ) -> None:
+        """Structured request timing log (no cost when the level is disabled)."""
+        if not log.isEnabledFor(level):
+            return
+        elapsed_ms = round((time.perf_counter() - start_time) * 1000, 1)
+        log.log(
+            level,
+            "%s %s %s in %.0f ms", method, endpoint,
+            fields.get("status") or fields.get("error") or fields.get("cache"), elapsed_ms,
+            extra={
+                "method": method,
+                "endpoint": endpoint,
+                "elapsed_ms": elapsed_ms,
+                "request_id": request_id,
+                # Requests outside any operation are their own correlation scope
+                "correlation_id": get_correlation_id() or request_id,
+                **{name: value for name, value in fields.items() if value is not None},
+            },
+        )
+
+    @staticmethod
+    def _raise_for_status(response: requests.Response, endpoint: str) -> None:
+        """Raise UniPileError for error responses."""
+        if response.status_code == 401:
+            raise UniPileError(
+                "Authentication failed",
+                status_code=401,
+                suggestion="Check your UNIPILE_ACCESS_TOKEN in .env file",
+            )
+        elif response.status_code == 404:
+            raise UniPileError(
+                f"Resource not found: {endpoint}",
+                status_code=404,
+                suggestion="Check if the ID is correct",
+            )
+        elif response.status_code >= 400:
+            error_msg = response.text[:200] if response.text else "Unknown error"
+            raise UniPileError(
+                f"API error: {error_msg}",
+                status_code=response.status_code,
+            )
+
+    # ==================== RAW PAGING ====================
+
+    def iter_pages(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        page_size: int = 50,
+        max_items: Optional[int] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield pages of raw API items, following cursors.
+
+        This is the fetch stage of pipelines (src/pipeline.py): pages are
+        decoded JSON, models are built by a later stage (parse_chat,
+        parse_message).
+
+        Args:
+            endpoint: List endpoint (e.g., /chats/{id}/messages)
+            params: Extra query parameters
+            page_size: Items per page
+            max_items: Stop after this many items
+
+        Yields:
+            Lists of raw item dicts as returned by the API
+        """
+        params = dict(params or {})
+        count = 0
+        cursor = None
+        while True:
+            page_params = {**params, "limit": page_size}
+            if max_items is not None:
+                page_params["limit"] = min(page_size, max_items - count)
+            if cursor:
+                page_params["cursor"] = cursor
+
+            data = self._request("GET", endpoint, params=page_params)
+            items = data.get("items", [])
+            if max_items is not None:
+                items = items[:max_items - count]
+            if items:
+                yield items
+            count += len(items)
+
+            cursor = data.get("cursor")
+            if not cursor or not items or (max_items is not None and count >= max_items):
+                return
+
+    def iter_items(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        page_size: int = 50,
+        max_items: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield raw API items across cursor pages without building models.
+
+        Use with projections from scripts/formatters.py when only a few
+        fields are needed.
+
+        Args:
+            endpoint: List endpoint (e.g., /chats/{id}/messages)
+            params: Extra query parameters
+            page_size: Items per page
+            max_items: Stop after this many items
+
+        Yields:
+            Raw item dicts as returned by the API
+        """
+        for page in self.iter_pages(endpoint, params, page_size, max_items):
+            yield from page
+
     # ==================== ACCOUNTS ====================
 
-    def list_accounts(self) -> List[Account]:
+    def list_accounts(self, usable_only: bool = False) -> List[Account]:
         """
         List all connected accounts.
 
+        Args:
+            usable_only: Leave out accounts the health registry has marked down
+                (bad connection status or failing requests)
+
         Returns:
             List of Account objects
         """
         data = self._request("GET", "/accounts")
         items = data.get("items", data) if isinstance(data, dict) else data
 
-        accounts = []
-        for item in items:
-            try:
-                accounts.append(Account(
-                    id=item.get("id", ""),
-                    provider=item.get("type", item.get("provider", "LINKEDIN")),
-                    name=item.get("name"),
-                    identifier=item.get("identifier"),
-                    status=item.get("connection_params", {}).get("status", "OK")
-                    if isinstance(item.get("connection_params"), dict) else "OK",
-                ))
-            except Exception:
-                continue
-
+        intern = self.interner.str
+        with phase("model"):
+            accounts = []
+            for item in items:
+                try:
+                    accounts.append(Account(
+                        id=intern(item.get("id", "")),
+                        provider=intern(item.get("type", item.get("provider", "LINKEDIN"))),
+                        name=item.get("name"),
+                        identifier=item.get("identifier"),
+                        provider_user_id=intern(provider_user_id(item)),
+                        status=item.get("connection_params", {}).get("status", "OK")
+                        if isinstance(item.get("connection_params"), dict) else "OK",
+                    ))
+                except Exception:
+                    continue
+
+        if self.health is not None:
+            for account in accounts:
+                self.health.observe_status(account.id, account.status)
+        if usable_only and self.health is not None:
+            accounts = [a for a in accounts if self.health.is_healthy(a.id)]
         return accounts
 
     def get_account(self, account_id: str) -> Account:
         """Get single account by ID."""
         data = self._request("GET", f"/accounts/{account_id}")
-        return Account(
+        account = Account(
             id=data.get("id", account_id),
             provider=data.get("type", data.get("provider", "LINKEDIN")),
             name=data.get("name"),
             identifier=data.get("identifier"),
+            provider_user_id=provider_user_id(data),
             status=data.get("connection_params", {}).get("status", "OK")
             if isinstance(data.get("connection_params"), dict) else "OK",
         )
+        if self.health is not None:
+            self.health.observe_status(account.id, account.status)
+        return account
 
     # ==================== CHATS ====================
 
@@ -175,68 +411,86 @@ class UniPileClient:
         data = self._request("GET", "/chats", params=params)
         items = data.get("items", [])
 
-        chats = []
-        for item in items:
-            # Handle attendees - API returns single attendee_provider_id, not array
-            attendees = []
-            if item.get("attendees"):
-                for att in item.get("attendees", []):
-                    attendees.append(ChatParticipant(
-                        attendee_id=att.get("attendee_id"),
-                        attendee_provider_id=att.get("attendee_provider_id"),
-                        name=att.get("name"),
-                        profile_url=att.get("profile_url"),
-                        profile_picture_url=att.get("profile_picture_url"),
-                    ))
-            elif item.get("attendee_provider_id"):
-                # Single attendee from flat structure
-                attendees.append(ChatParticipant(
-                    attendee_provider_id=item.get("attendee_provider_id"),
-                ))
+        with phase("model"):
+            chats = [self.parse_chat(item, account_id) for item in items]
+
+        return chats, data.get("cursor")
+
+    def parse_chat(self, item: Dict[str, Any], account_id: str) -> Chat:
+        """Build a Chat from a raw /chats item (shared participants, interned ids)."""
+        intern = self.interner.str
+        participant = self.interner.participant
 
-            # Chat name: use name, subject, or content_type as fallback
-            chat_name = item.get("name") or item.get("subject")
-            content_type = item.get("content_type", "")
-            if content_type == "inmail" and not chat_name:
-                chat_name = "[InMail]"
-
-            chats.append(Chat(
-                id=item.get("id", ""),
-                account_id=account_id,
-                provider=item.get("account_type", item.get("provider", "LINKEDIN")),
-                name=chat_name,
-                attendees=attendees,
-                last_message_text=item.get("last_message", {}).get("text")
-                if isinstance(item.get("last_message"), dict) else None,
-                last_message_timestamp=item.get("timestamp"),  # Use chat timestamp
-                unread_count=item.get("unread_count", 0),
-                is_group=item.get("type", 0) > 0,  # type > 0 indicates group
+        # Handle attendees - API returns single attendee_provider_id, not array
+        # (one shared ChatParticipant per person across all chats)
+        attendees = []
+        if item.get("attendees"):
+            for att in item.get("attendees", []):
+                attendees.append(participant(
+                    attendee_id=att.get("attendee_id"),
+                    attendee_provider_id=att.get("attendee_provider_id"),
+                    name=att.get("name"),
+                    profile_url=att.get("profile_url"),
+                    profile_picture_url=att.get("profile_picture_url"),
+                ))
+        elif item.get("attendee_provider_id"):
+            # Single attendee from flat structure
+            attendees.append(participant(
+                attendee_provider_id=item.get("attendee_provider_id"),
             ))
 
-        return chats, data.get("cursor")
+        # Chat name: use name, subject, or content_type as fallback
+        chat_name = item.get("name") or item.get("subject")
+        content_type = item.get("content_type", "")
+        if content_type == "inmail" and not chat_name:
+            chat_name = "[InMail]"
+
+        last_message = item.get("last_message")
+        if not isinstance(last_message, dict):
+            last_message = {}
+
+        chat = Chat(
+            id=intern(item.get("id", "")),
+            account_id=intern(account_id),
+            provider=intern(item.get("account_type", item.get("provider", "LINKEDIN"))),
+            name=intern(chat_name),
+            attendees=attendees,
+            last_message_text=last_message.get("text"),
+            last_message_timestamp=item.get("timestamp"),  # Use chat timestamp
+            last_message_is_sender=last_message.get("is_sender"),
+            unread_count=item.get("unread_count", 0),
+            is_group=item.get("type", 0) > 0,  # type > 0 indicates group
+        )
+        if self.health is not None:
+            self.health.remember_chat(chat.id, account_id)
+        return chat
 
     def get_chat(self, chat_id: str) -> Chat:
         """Get single chat by ID."""
         data = self._request("GET", f"/chats/{chat_id}")
 
+        intern = self.interner.str
         attendees = []
         for att in data.get("attendees", []):
-            attendees.append(ChatParticipant(
+            attendees.append(self.interner.participant(
                 attendee_id=att.get("attendee_id"),
                 attendee_provider_id=att.get("attendee_provider_id"),
                 name=att.get("name"),
                 profile_url=att.get("profile_url"),
             ))
 
-        return Chat(
-            id=data.get("id", chat_id),
-            account_id=data.get("account_id", ""),
-            provider=data.get("provider", "LINKEDIN"),
-            name=data.get("name"),
+        chat = Chat(
+            id=intern(data.get("id", chat_id)),
+            account_id=intern(data.get("account_id", "")),
+            provider=intern(data.get("provider", "LINKEDIN")),
+            name=intern(data.get("name")),
             attendees=attendees,
             unread_count=data.get("unread_count", 0),
             is_group=data.get("is_group", False),
         )
+        if self.health is not None:
+            self.health.remember_chat(chat.id, chat.account_id)
+        return chat
 
     def start_chat(self, account_id: str, attendee_id: str) -> Chat:
         """
@@ -320,22 +574,29 @@ class UniPileClient:
         data = self._request("GET", f"/chats/{chat_id}/messages", params=params)
         items = data.get("items", [])
 
-        messages = []
-        for item in items:
-            messages.append(Message(
-                id=item.get("id", ""),
-                chat_id=chat_id,
-                sender_id=item.get("sender_id"),
-                sender_name=item.get("sender", {}).get("name")
-                if isinstance(item.get("sender"), dict) else None,
-                text=item.get("text", ""),
-                timestamp=item.get("timestamp"),
-                is_sender=item.get("is_sender", False),
-                attachments=item.get("attachments", []),
-            ))
+        with phase("model"):
+            messages = [self.parse_message(item, chat_id) for item in items]
 
         return messages, data.get("cursor")
 
+    def parse_message(self, item: Dict[str, Any], chat_id: str) -> Message:
+        """Build a Message from a raw /chats/{id}/messages item."""
+        # Ids and names repeat on every message of a chat: keep one copy each
+        # (message ids and texts are unique and are not interned)
+        intern = self.interner.str
+        return Message(
+            id=item.get("id", ""),
+            chat_id=intern(chat_id),
+            provider_id=item.get("provider_id"),
+            sender_id=intern(item.get("sender_id")),
+            sender_name=intern(item.get("sender", {}).get("name"))
+            if isinstance(item.get("sender"), dict) else None,
+            text=item.get("text", ""),
+            timestamp=item.get("timestamp"),
+            is_sender=item.get("is_sender", False),
+            attachments=item.get("attachments") or [],
+        )
+
     def send_message(self, chat_id: str, text: str) -> Message:
         """
         Send a message to a chat.
@@ -360,6 +621,51 @@ class UniPileClient:
             is_sender=True,
         )
 
+    def stream_attachment(
+        self,
+        message_id: str,
+        attachment_id: str,
+        chunk_size: int = 64 * 1024,
+    ) -> Iterator[bytes]:
+        """
+        Download a message attachment in chunks (never buffers the whole file).
+
+        Args:
+            message_id: Message ID the attachment belongs to
+            attachment_id: Attachment ID
+            chunk_size: Bytes per chunk
+
+        Yields:
+            Raw file content chunks
+
+        Raises:
+            UniPileError: On API errors
+        """
+        endpoint = f"/messages/{message_id}/attachments/{attachment_id}"
+
+        try:
+            with self.session.get(
+                f"{self.base_url}{endpoint}",
+                headers={"Accept": "*/*"},
+                stream=True,
+                timeout=30,
+            ) as response:
+                self._raise_for_status(response, endpoint)
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        yield chunk
+
+        except requests.exceptions.Timeout:
+            raise UniPileError(
+                "Attachment download timed out",
+                suggestion="Check your internet connection or try again",
+            )
+        except requests.exceptions.ConnectionError:
+            raise UniPileError(
+                "Connection failed",
+                suggestion="Check UNIPILE_DSN in .env and your internet connection",
+            )
+
     # ==================== USERS ====================
 
     def get_user_profile(self, user_id: str, account_id: str) -> Dict[str, Any]:
@@ -382,6 +688,7 @@ class UniPileClient:
         keywords: str,
         api: str = "classic",
         limit: int = 10,
+        cursor: Optional[str] = None,
     ) -> tuple[List[Dict[str, Any]], Optional[str]]:
         """
         Search for people on LinkedIn.
@@ -391,6 +698,7 @@ class UniPileClient:
             keywords: Search terms (e.g., person's name, company)
             api: LinkedIn interface ("classic", "sales_navigator", "recruiter")
             limit: Max results to return (default: 10)
+            cursor: Pagination cursor from a previous call
 
         Returns:
             Tuple of (list of people/results, next cursor or None)
@@ -403,10 +711,12 @@ class UniPileClient:
             "page_count": limit,
         }
 
-        # account_id goes as query parameter, not in body
-        endpoint = f"/linkedin/search?account_id={account_id}"
+        # account_id (and cursor) go as query parameters, not in body
+        params = {"account_id": account_id}
+        if cursor:
+            params["cursor"] = cursor
 
-        data = self._request("POST", endpoint, json=payload)
+        data = self._request("POST", "/linkedin/search", params=params, json=payload)
         items = data.get("items", [])
         cursor = data.get("cursor")
 
@@ -437,3 +747,87 @@ class UniPileClient:
 
         data = self._request("GET", f"/users/{account_id}/relations", params=params)
         return data.get("items", []), data.get("cursor")
+
+    # ==================== BATCH ====================
+
+    def get_chats(
+        self,
+        chat_ids: Iterable[str],
+        workers: int = Config.BATCH_WORKERS,
+        ordered: bool = True,
+    ) -> Iterator[BatchResult]:
+        """
+        Fetch many chats concurrently (see batch()); values are Chat objects.
+        """
+        return self.batch(self.get_chat, chat_ids, workers, ordered)
+
+    def get_user_profiles(
+        self,
+        user_ids: Iterable[str],
+        account_id: str,
+        workers: int = Config.BATCH_WORKERS,
+        ordered: bool = True,
+    ) -> Iterator[BatchResult]:
+        """
+        Fetch many user profiles concurrently (see batch()); values are profile dicts.
+        """
+        return self.batch(lambda user_id: self.get_user_profile(user_id, account_id), user_ids, workers, ordered)
+
+    def list_messages_many(
+        self,
+        chat_ids: Iterable[str],
+        limit: int = 50,
+        workers: int = Config.BATCH_WORKERS,
+        ordered: bool = True,
+    ) -> Iterator[BatchResult]:
+        """
+        Fetch the newest page of messages of many chats concurrently (see batch()).
+
+        Values are (messages, next cursor) tuples like list_messages(); page
+        on with list_messages(chat_id, cursor=...).
+        """
+        return self.batch(lambda chat_id: self.list_messages(chat_id, limit=limit), chat_ids, workers, ordered)
+
+    def batch(
+        self,
+        fetch: Callable[[Any], Any],
+        keys: Iterable[Hashable],
+        workers: int = Config.BATCH_WORKERS,
+        ordered: bool = True,
+    ) -> Iterator[BatchResult]:
+        """
+        Run a single-id call for many ids on a thread pool sharing this client's session.
+
+        Duplicate ids are fetched once and yield one result. A failing id
+        yields a result with its UniPileError (e.g. AccountUnavailable) and
+        does not stop the others. Requests start when iteration starts.
+
+        Args:
+            fetch: Single-id call (e.g. self.get_chat)
+            keys: Ids to fetch
+            workers: Concurrent requests
+            ordered: Yield in the order of the ids (first occurrence) instead
+                of as completed
+
+        Yields:
+            BatchResult(key, value, error), one per distinct id
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return
+
+        def run(key) -> BatchResult:
+            try:
+                return BatchResult(key, fetch(key))
+            except UniPileError as e:
+                return BatchResult(key, error=e)
+
+        executor = ThreadPoolExecutor(max_workers=max(1, min(workers, len(keys))), thread_name_prefix="batch")
+        try:
+            # Each task gets a copy of the caller's context (correlation id)
+            futures = [executor.submit(wrap(run), key) for key in keys]
+            for future in (futures if ordered else as_completed(futures)):
+                yield future.result()
+        finally:
+            # Consumer stopped early: drop what has not started yet
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,380 @@
+"""
+Leased work units shared by any number of worker processes or hosts.
+
+A coordinator adds the units of a run to a lease store; workers claim
+one unit at a time, keep the lease alive with heartbeats while working
+and complete it with a result. A unit whose lease runs out (the worker
+died or hung) becomes claimable again, up to MAX_ATTEMPTS leases.
+
+Every lease carries a random token. Heartbeat, complete and fail only
+succeed with the current token, so a worker that lost its lease cannot
+overwrite the outcome of the worker that took the unit over.
+
+Backends:
+- SQLiteLeaseStore: data/work_leases.db, for processes on one machine
+- RedisLeaseStore: any Redis-protocol server (Redis, Valkey, KeyDB...),
+  for workers on several hosts; lease times use the server clock, so
+  host clocks do not need to agree. Needs the optional `redis` package.
+"""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.config import Config
+
+try:
+    import redis
+except ImportError:  # Optional: only needed for LEASE_BACKEND=redis
+    redis = None
+
+DEFAULT_DB_PATH = Config.DATA_DIR / "work_leases.db"
+
+MAX_ATTEMPTS = 3  # Leases per unit before it is marked failed
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_units (
+    run_id TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    token TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (run_id, unit_id)
+);
+CREATE INDEX IF NOT EXISTS idx_work_units_claim ON work_units (run_id, status, lease_until);
+"""
+
+STATUSES = ("pending", "leased", "done", "failed")
+
+
+@dataclass
+class WorkUnit:
+    """A claimed unit of work (valid while the lease is held)."""
+
+    run_id: str
+    unit_id: str
+    payload: Dict[str, Any]
+    token: str
+    attempt: int
+
+
+# ==================== SQLITE ====================
+
+class SQLiteLeaseStore:
+    """Lease table in SQLite, safe across processes on one machine."""
+
+    def __init__(self, db_path: Path = DEFAULT_DB_PATH, max_attempts: int = MAX_ATTEMPTS):
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode: claims run in explicit BEGIN IMMEDIATE transactions
+        self.conn = sqlite3.connect(str(db_path), timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def add_units(self, run_id: str, units: Iterable[tuple[str, Dict[str, Any]]]) -> int:
+        """Add (unit_id, payload) pairs to a run. Existing units are kept. Returns number added."""
+        now = time.time()
+        added = 0
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                for unit_id, payload in units:
+                    cur = self.conn.execute(
+                        "INSERT OR IGNORE INTO work_units (run_id, unit_id, payload, created_at, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (run_id, unit_id, json.dumps(payload), now, now),
+                    )
+                    added += cur.rowcount
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return added
+
+    def claim(self, run_id: str, worker: str, lease_seconds: float) -> Optional[WorkUnit]:
+        """Lease the next pending (or expired) unit of a run, or None if there is none."""
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Expired leases that used up their attempts fail instead of being re-leased
+                self.conn.execute(
+                    "UPDATE work_units SET status = 'failed', token = NULL, updated_at = ?, "
+                    "error = COALESCE(error, 'lease expired') "
+                    "WHERE run_id = ? AND status = 'leased' AND lease_until < ? AND attempts >= ?",
+                    (now, run_id, now, self.max_attempts),
+                )
+                row = self.conn.execute(
+                    "SELECT unit_id, payload, attempts FROM work_units WHERE run_id = ? "
+                    "AND (status = 'pending' OR (status = 'leased' AND lease_until < ?)) "
+                    "ORDER BY unit_id LIMIT 1",
+                    (run_id, now),
+                ).fetchone()
+                if row is not None:
+                    self.conn.execute(
+                        "UPDATE work_units SET status = 'leased', worker = ?, token = ?, lease_until = ?, "
+                        "attempts = attempts + 1, updated_at = ? WHERE run_id = ? AND unit_id = ?",
+                        (worker, token, now + lease_seconds, now, run_id, row["unit_id"]),
+                    )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return WorkUnit(run_id, row["unit_id"], json.loads(row["payload"]), token, row["attempts"] + 1)
+
+    def heartbeat(self, unit: WorkUnit, lease_seconds: float) -> bool:
+        """Extend a lease. False if the lease was lost."""
+        now = time.time()
+        return self._update(
+            unit, "lease_until = ?, updated_at = ?", (now + lease_seconds, now)
+        )
+
+    def complete(self, unit: WorkUnit, result: Optional[Dict[str, Any]] = None) -> bool:
+        """Mark a unit done. False if the lease was lost (the result is discarded)."""
+        return self._update(
+            unit, "status = 'done', token = NULL, result = ?, error = NULL, updated_at = ?",
+            (json.dumps(result or {}), time.time()),
+        )
+
+    def fail(self, unit: WorkUnit, error: str) -> bool:
+        """Give a unit back after an error; it fails for good after max_attempts leases."""
+        status = "failed" if unit.attempt >= self.max_attempts else "pending"
+        return self._update(
+            unit, "status = ?, token = NULL, lease_until = NULL, error = ?, updated_at = ?",
+            (status, error, time.time()),
+        )
+
+    def status(self, run_id: str) -> Dict[str, Any]:
+        """Unit counts by status (expired leases counted separately) and summed results."""
+        now = time.time()
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT status, (status = 'leased' AND lease_until < ?) AS expired, COUNT(*) AS n "
+                "FROM work_units WHERE run_id = ? GROUP BY 1, 2",
+                (now, run_id),
+            ).fetchall()
+            workers = self.conn.execute(
+                "SELECT worker, COUNT(*) AS n FROM work_units WHERE run_id = ? AND status = 'leased' "
+                "AND lease_until >= ? GROUP BY worker",
+                (run_id, now),
+            ).fetchall()
+            results = [r["result"] for r in self.conn.execute(
+                "SELECT result FROM work_units WHERE run_id = ? AND status = 'done'", (run_id,)
+            )]
+            errors = self.conn.execute(
+                "SELECT unit_id, error FROM work_units WHERE run_id = ? AND status = 'failed' "
+                "ORDER BY unit_id LIMIT 20",
+                (run_id,),
+            ).fetchall()
+        counts = {status: 0 for status in STATUSES}
+        counts["expired"] = 0
+        for row in rows:
+            counts["expired" if row["expired"] else row["status"]] += row["n"]
+        return _summary(counts, {r["worker"]: r["n"] for r in workers},
+                        [json.loads(r) for r in results], {r["unit_id"]: r["error"] for r in errors})
+
+    def runs(self) -> List[Dict[str, Any]]:
+        """Known runs, newest first."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT run_id, COUNT(*) AS units, SUM(status = 'done') AS done, MIN(created_at) AS created_at "
+                "FROM work_units GROUP BY run_id ORDER BY created_at DESC"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def _update(self, unit: WorkUnit, assignments: str, params: tuple) -> bool:
+        with self._lock:
+            cur = self.conn.execute(
+                f"UPDATE work_units SET {assignments} "
+                "WHERE run_id = ? AND unit_id = ? AND token = ? AND status = 'leased'",
+                (*params, unit.run_id, unit.unit_id, unit.token),
+            )
+        return cur.rowcount > 0
+
+
+# ==================== REDIS ====================
+
+# Scripts run atomically on the server and use its clock (TIME)
+_NOW = "local t = redis.call('TIME') local now = tonumber(t[1]) + tonumber(t[2]) / 1000000 "
+
+# KEYS: pending, leases, tokens, workers, attempts, failed
+# ARGV: lease seconds, token, worker, max attempts
+_CLAIM = _NOW + """
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)) do
+  redis.call('ZREM', KEYS[2], id)
+  redis.call('HDEL', KEYS[3], id)
+  redis.call('HDEL', KEYS[4], id)
+  if tonumber(redis.call('HGET', KEYS[5], id) or '0') >= tonumber(ARGV[4]) then
+    redis.call('HSET', KEYS[6], id, 'lease expired')
+  else
+    redis.call('RPUSH', KEYS[1], id)
+  end
+end
+local id = redis.call('LPOP', KEYS[1])
+if not id then return false end
+redis.call('ZADD', KEYS[2], now + tonumber(ARGV[1]), id)
+redis.call('HSET', KEYS[3], id, ARGV[2])
+redis.call('HSET', KEYS[4], id, ARGV[3])
+return {id, redis.call('HINCRBY', KEYS[5], id, 1)}
+"""
+
+# KEYS: leases, tokens   ARGV: unit id, token, lease seconds
+_HEARTBEAT = _NOW + """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then return 0 end
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[3]), ARGV[1])
+return 1
+"""
+
+# KEYS: leases, tokens, workers, target hash, pending
+# ARGV: unit id, token, value, requeue (1/0)
+_RELEASE = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then return 0 end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+if ARGV[4] == '1' then
+  redis.call('RPUSH', KEYS[5], ARGV[1])
+else
+  redis.call('HSET', KEYS[4], ARGV[1], ARGV[3])
+end
+return 1
+"""
+
+
+class RedisLeaseStore:
+    """Lease structures in a Redis-protocol server, shared by workers on any host."""
+
+    def __init__(self, url: str = Config.REDIS_URL, prefix: str = "unipile:lease", max_attempts: int = MAX_ATTEMPTS):
+        if redis is None:
+            raise RuntimeError("LEASE_BACKEND=redis needs the redis package (pip install redis)")
+        self.r = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self.max_attempts = max_attempts
+        self._claim = self.r.register_script(_CLAIM)
+        self._heartbeat = self.r.register_script(_HEARTBEAT)
+        self._release = self.r.register_script(_RELEASE)
+
+    def close(self) -> None:
+        self.r.close()
+
+    def _key(self, run_id: str, name: str) -> str:
+        return f"{self.prefix}:{run_id}:{name}"
+
+    def add_units(self, run_id: str, units: Iterable[tuple[str, Dict[str, Any]]]) -> int:
+        added = 0
+        for unit_id, payload in units:
+            if self.r.hsetnx(self._key(run_id, "units"), unit_id, json.dumps(payload)):
+                self.r.rpush(self._key(run_id, "pending"), unit_id)
+                added += 1
+        self.r.zadd(f"{self.prefix}:runs", {run_id: time.time()}, nx=True)
+        return added
+
+    def claim(self, run_id: str, worker: str, lease_seconds: float) -> Optional[WorkUnit]:
+        token = uuid.uuid4().hex
+        keys = [self._key(run_id, n) for n in ("pending", "leases", "tokens", "workers", "attempts", "failed")]
+        claimed = self._claim(keys=keys, args=[lease_seconds, token, worker, self.max_attempts])
+        if not claimed:
+            return None
+        unit_id, attempt = claimed
+        payload = self.r.hget(self._key(run_id, "units"), unit_id)
+        return WorkUnit(run_id, unit_id, json.loads(payload), token, int(attempt))
+
+    def heartbeat(self, unit: WorkUnit, lease_seconds: float) -> bool:
+        keys = [self._key(unit.run_id, "leases"), self._key(unit.run_id, "tokens")]
+        return bool(self._heartbeat(keys=keys, args=[unit.unit_id, unit.token, lease_seconds]))
+
+    def complete(self, unit: WorkUnit, result: Optional[Dict[str, Any]] = None) -> bool:
+        return self._release_unit(unit, "done", json.dumps(result or {}), requeue=False)
+
+    def fail(self, unit: WorkUnit, error: str) -> bool:
+        return self._release_unit(unit, "failed", error, requeue=unit.attempt < self.max_attempts)
+
+    def status(self, run_id: str) -> Dict[str, Any]:
+        now = self._server_time()
+        leases = self._key(run_id, "leases")
+        counts = {
+            "pending": self.r.llen(self._key(run_id, "pending")),
+            "leased": self.r.zcount(leases, now, "+inf"),
+            "expired": self.r.zcount(leases, "-inf", f"({now}"),
+            "done": self.r.hlen(self._key(run_id, "done")),
+            "failed": self.r.hlen(self._key(run_id, "failed")),
+        }
+        live = set(self.r.zrangebyscore(leases, now, "+inf"))
+        workers: Dict[str, int] = {}
+        for unit_id, worker in self.r.hgetall(self._key(run_id, "workers")).items():
+            if unit_id in live:
+                workers[worker] = workers.get(worker, 0) + 1
+        results = [json.loads(v) for v in self.r.hvals(self._key(run_id, "done"))]
+        errors = dict(sorted(self.r.hgetall(self._key(run_id, "failed")).items())[:20])
+        return _summary(counts, workers, results, errors)
+
+    def runs(self) -> List[Dict[str, Any]]:
+        runs = []
+        for run_id, created_at in self.r.zrevrange(f"{self.prefix}:runs", 0, -1, withscores=True):
+            runs.append({
+                "run_id": run_id,
+                "units": self.r.hlen(self._key(run_id, "units")),
+                "done": self.r.hlen(self._key(run_id, "done")),
+                "created_at": created_at,
+            })
+        return runs
+
+    def _release_unit(self, unit: WorkUnit, target: str, value: str, requeue: bool) -> bool:
+        keys = [self._key(unit.run_id, n) for n in ("leases", "tokens", "workers", target, "pending")]
+        return bool(self._release(keys=keys, args=[unit.unit_id, unit.token, value, "1" if requeue else "0"]))
+
+    def _server_time(self) -> float:
+        seconds, micros = self.r.time()
+        return seconds + micros / 1e6
+
+
+# ==================== HELPERS ====================
+
+def _summary(
+    counts: Dict[str, int],
+    workers: Dict[str, int],
+    results: List[Dict[str, Any]],
+    errors: Dict[str, str],
+) -> Dict[str, Any]:
+    totals: Dict[str, float] = {}
+    for result in results:
+        for name, value in result.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                totals[name] = totals.get(name, 0) + value
+    return {
+        "units": sum(counts.values()),
+        **counts,
+        "workers": workers,
+        "totals": totals,
+        "errors": errors,
+    }
+
+
+def lease_store_from_config(backend: Optional[str] = None):
+    """Lease store selected by LEASE_BACKEND (sqlite or redis)."""
+    backend = (backend or Config.LEASE_BACKEND).lower()
+    if backend == "redis":
+        return RedisLeaseStore(Config.REDIS_URL)
+    if backend == "sqlite":
+        return SQLiteLeaseStore()
+    raise ValueError(f"Unknown lease backend: {backend!r} (use sqlite or redis)")
@@ -0,0 +1,61 @@
+"""Two ledgers (separate connections, like two processes) racing for one stale send."""
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import Message
+from src.send_ledger import SendLedger, send_key
+
+
+class FakeClient:
+    """Both senders reconcile at the same time, then post."""
+
+    def __init__(self, barrier: threading.Barrier):
+        self.barrier = barrier
+        self.posts = 0
+        self._lock = threading.Lock()
+
+    def list_messages(self, chat_id, limit=50, cursor=None):
+        self.barrier.wait(timeout=5)  # Both senders have seen the stale send
+        return [], None
+
+    def send_message(self, chat_id, text):
+        with self._lock:
+            self.posts += 1
+        return Message(id=f"msg_{self.posts}", chat_id=chat_id)
+
+
+class StaleTakeoverTest(unittest.TestCase):
+    def test_only_one_sender_takes_over_a_stale_send(self):
+        db_path = Path(tempfile.mkdtemp()) / "send_ledger.db"
+        ledgers = [SendLedger(db_path, stale_after=60) for _ in range(2)]
+        key = send_key("", "chat:chat_1", "Hello")
+        ledgers[0]._claim(key, "", "chat:chat_1", "Hello", None, "chat_1")
+        ledgers[0].conn.execute("UPDATE sends SET updated_at = ? WHERE key = ?", (time.time() - 600, key))
+
+        client = FakeClient(threading.Barrier(2))
+        results = [None, None]
+
+        def send(i):
+            results[i] = ledgers[i].send_message(client, "chat_1", "Hello")
+
+        threads = [threading.Thread(target=send, args=(i,)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(client.posts, 1)
+        self.assertEqual(sorted(r.duplicate for r in results), [False, True])
+        self.assertEqual(ledgers[0].get(key).status, "sent")
+        for ledger in ledgers:
+            ledger.close()
+
+
+if __name__ == "__main__":
+    unittest.main()